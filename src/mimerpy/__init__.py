@@ -50,11 +50,12 @@ import mimerpy.cursorPy as _cursor_module
 from mimerpy.mimPyExceptions import *
 from mimerpy.mimPyErrorCodes import mimerpy_error
 from mimerpy.connectionPy import Connection
+from mimerpy.statementcache import DEFAULT_SIZE as _STATEMENT_CACHE_SIZE
 from mimerpy import mimerapi
 
 def connect(dsn='', user='', password='',
             autocommit=False, errorhandler=None, readonly=False,
-            trace=None, trace_unsafe=None):
+            trace=None, trace_unsafe=None, statement_cache_size=_STATEMENT_CACHE_SIZE):
     """
     Create a database connection.
 
@@ -102,9 +103,16 @@ def connect(dsn='', user='', password='',
                 environment variable MIMERPY_TRACE (set to 1/true/yes for
                 stderr, or a file path for file logging). An explicit trace
                 argument always takes precedence over the environment variable.
+
+    statement_cache_size
+                Number of idle prepared statements kept by the connection.
+                Cursors executing the same SQL text reuse a cached statement
+                instead of preparing it again. The least recently used
+                statement is ended when the cache is full. 0 disables the
+                cache. Default is statementcache.DEFAULT_SIZE (32).
     """
     return Connection(dsn, user, password, autocommit, errorhandler, readonly,
-                      trace, trace_unsafe)
+                      trace, trace_unsafe, statement_cache_size)
 
 def Binary(value):
     """DB-API helper for binary parameters."""
@@ -0,0 +1,685 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+
+"""asyncio support for MimerPy.
+
+Usage:
+
+    from mimerpy import aio
+
+    async def main():
+        async with await aio.connect(dsn, user, password) as con:
+            cur = await con.execute("select * from orders where id > ?", (10,))
+            async for row in cur:
+                print(row)
+
+Every AsyncConnection has a worker thread of its own that runs the blocking
+calls of the underlying Connection and its cursors, one at a time and in
+the order they were made. The event loop is never blocked by a round trip
+to the server. Rows read with async for are fetched in batches, and the
+next batch is fetched while the current one is processed.
+
+If a coroutine is cancelled while it waits for a cursor operation, the
+cursor is closed on the worker thread as soon as the operation in progress
+and the prefetch of the next rows have finished, and the statement is
+released.
+
+AsyncMimerPool is a connection pool for coroutines with the same sizing
+options as MimerPool:
+
+    pool = aio.AsyncMimerPool(dsn, user, password, maxconnections=10,
+                              block=True)
+    async with pool:
+        async with pool.acquire(timeout=5) as con:
+            cur = await con.execute("select count(*) from orders")
+            print(await cur.fetchone())
+
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import mimerpy
+from .pool import MimerPoolError, MimerPoolExhausted
+
+# Default number of rows fetched at a time by async for
+PREFETCH_ROWS = 1000
+
+
+async def connect(*args, **kwargs):
+    """Open a connection without blocking the event loop.
+
+    Takes the same arguments as mimerpy.connect().
+
+    Returns:
+        An AsyncConnection
+
+    """
+    executor = _worker()
+    loop = asyncio.get_running_loop()
+    try:
+        con = await loop.run_in_executor(
+            executor, functools.partial(mimerpy.connect, *args, **kwargs))
+    except BaseException:
+        executor.shutdown(wait=False)
+        raise
+    return AsyncConnection(con, executor)
+
+
+def _worker():
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='mimerpy-aio')
+
+
+class AsyncConnection:
+    """A Connection whose blocking calls run on a worker thread.
+
+    Use connect() to create one.
+
+    """
+
+    def __init__(self, connection, executor=None):
+        """Wrap an open connection.
+
+        Args:
+            connection(Connection): The connection to wrap. It must not be
+                used directly afterwards.
+            executor: Single thread executor to run the calls on.
+                Default a new one.
+
+        """
+        self.connection = connection
+        self._executor = executor or _worker()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    @property
+    def autocommitmode(self):
+        """True if the connection is in autocommit mode."""
+        return self.connection.autocommitmode
+
+    def _start(self, func, *args, **kwargs):
+        # Run func on the worker thread and return a concurrent future.
+        # Calls on a closed connection are run directly, they only raise
+        # errors.
+        if self._executor is None:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(func, *args, **kwargs)
+
+    def _submit(self, func, *args, **kwargs):
+        # Run func on the worker thread and return an asyncio future.
+        return asyncio.wrap_future(self._start(func, *args, **kwargs))
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(connection, *args, **kwargs) on the worker thread.
+
+        Use this for the Connection and Cursor methods that have no
+        asynchronous version.
+
+        """
+        return await self._submit(func, self.connection, *args, **kwargs)
+
+    async def cursor(self, prefetch=PREFETCH_ROWS, **kwargs):
+        """Return a new AsyncCursor.
+
+        Args:
+            prefetch(int): Rows fetched at a time by async for. Default 1000
+            **kwargs: Arguments of Connection.cursor().
+
+        """
+        cursor = await self._submit(self.connection.cursor, **kwargs)
+        return AsyncCursor(self, cursor, prefetch)
+
+    async def execute(self, *arg):
+        """Create a cursor, execute a statement and return the cursor."""
+        cursor = await self.cursor()
+        await cursor.execute(*arg)
+        return cursor
+
+    async def executemany(self, *arg, **kwargs):
+        """Create a cursor, execute a statement for every parameter
+        sequence and return the cursor."""
+        cursor = await self.cursor()
+        await cursor.executemany(*arg, **kwargs)
+        return cursor
+
+    async def commit(self):
+        """Commit any pending transaction."""
+        await self._submit(self.connection.commit)
+
+    async def rollback(self):
+        """Roll back any pending transaction."""
+        await self._submit(self.connection.rollback)
+
+    async def close(self):
+        """Close the connection and stop its worker thread."""
+        executor = self._executor
+        try:
+            await self._submit(self.connection.close)
+        finally:
+            if executor is not None:
+                self._executor = None
+                executor.shutdown(wait=False)
+
+
+class AsyncCursor:
+    """A Cursor whose blocking calls run on the connection's worker thread.
+
+    Use AsyncConnection.cursor() to create one.
+
+    """
+
+    def __init__(self, connection, cursor, prefetch=PREFETCH_ROWS):
+        self.connection = connection
+        self.cursor = cursor
+        self.prefetch = prefetch
+        self.__rows = collections.deque()
+        self.__pending = None
+        self.__exhausted = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        self.__discard()
+        await self.__call(self.cursor.__exit__, type, value, traceback)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self.__rows:
+            await self.__fill()
+            if not self.__rows:
+                raise StopAsyncIteration
+        return self.__rows.popleft()
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    @property
+    def rowcount(self):
+        return self.cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self.cursor.lastrowid
+
+    @property
+    def arraysize(self):
+        return self.cursor.arraysize
+
+    @arraysize.setter
+    def arraysize(self, size):
+        self.cursor.arraysize = size
+
+    async def execute(self, *arg):
+        """Execute a statement, see Cursor.execute()."""
+        self.__discard()
+        await self.__call(self.cursor.execute, *arg)
+
+    async def executemany(self, *arg, **kwargs):
+        """Execute a statement for every parameter sequence, see
+        Cursor.executemany()."""
+        self.__discard()
+        await self.__call(self.cursor.executemany, *arg, **kwargs)
+
+    async def fetchone(self):
+        """Fetch the next row, or None at the end of the result set."""
+        if not self.__rows:
+            await self.__fill(1)
+        return self.__rows.popleft() if self.__rows else None
+
+    async def fetchmany(self, *arg):
+        """Fetch the next rows, at most arraysize or the given number."""
+        if arg:
+            self.arraysize = arg[0]
+        size = self.arraysize
+        rows = []
+        while len(rows) < size:
+            if not self.__rows:
+                await self.__fill(size - len(rows))
+                if not self.__rows:
+                    break
+            rows.append(self.__rows.popleft())
+        return rows
+
+    async def fetchall(self):
+        """Fetch all remaining rows."""
+        rows = list(self.__rows)
+        self.__rows.clear()
+        if self.__pending is not None:
+            rows.extend(await self.__take())
+        if not self.__exhausted:
+            rows.extend(await self.__call(self.cursor.fetchall))
+            self.__exhausted = True
+        return rows
+
+    async def close(self):
+        """Close the cursor."""
+        self.__discard()
+        await self.__call(self.cursor.close)
+
+    async def __fill(self, size=None):
+        # Read the next batch into the row buffer. The fetch of the batch
+        # after it is started at once, unless a single row was asked for.
+        if self.__pending is None:
+            if self.__exhausted:
+                return
+            self.__pending = self.__fetch(size or self.prefetch)
+        batch = await self.__take()
+        self.__rows.extend(batch)
+        if size is None and not self.__exhausted:
+            self.__pending = self.__fetch(self.prefetch)
+
+    def __fetch(self, size):
+        return (self.connection._start(_fetch_batch, self.cursor, size), size)
+
+    async def __take(self):
+        # Wait for the pending fetch and return its rows.
+        future, size = self.__pending
+        try:
+            batch = await self.__wait(future)
+        finally:
+            self.__pending = None
+        if len(batch) < size:
+            self.__exhausted = True
+        return batch
+
+    def __discard(self):
+        # Forget buffered and prefetched rows before the cursor is reused.
+        if self.__pending is not None:
+            _forget(self.__pending[0])
+            self.__pending = None
+        self.__rows.clear()
+        self.__exhausted = False
+
+    async def __call(self, func, *args, **kwargs):
+        return await self.__wait(self.connection._start(func, *args, **kwargs))
+
+    async def __wait(self, future):
+        # Wait for future, a call started on the worker thread. If the
+        # waiting coroutine is cancelled, close the cursor once that call
+        # and any prefetch have finished.
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            futures = [future]
+            if self.__pending is not None and self.__pending[0] is not future:
+                futures.append(self.__pending[0])
+            self.__discard()
+            executor = self.connection._executor
+            if executor is not None:
+                executor.submit(_close_after, self.cursor, futures)
+            raise
+
+
+def _forget(future):
+    # Drop a future nobody will await. An exception it already holds is
+    # retrieved, so that asyncio does not log it as never retrieved.
+    if future.done():
+        if not future.cancelled():
+            future.exception()
+    else:
+        future.cancel()
+
+
+def _fetch_batch(cursor, size):
+    return list(next(cursor.iter_batches(size), ()))
+
+
+def _close(handle):
+    try:
+        handle.close()
+    except Exception:
+        pass
+
+
+def _close_after(handle, futures):
+    # Close handle once the calls of futures that were already running are
+    # done. The ones that had not started are cancelled.
+    for future in futures:
+        future.cancel()
+    concurrent.futures.wait(futures)
+    _close(handle)
+
+
+class AsyncMimerPool:
+    """Connection pool handing out AsyncConnections.
+
+    Coroutines waiting for a connection are served in the order they
+    started to wait, and new connections are opened concurrently on their
+    own worker threads.
+
+    """
+
+    def __init__(self, dsn='', user='', password='', initialconnections=0,
+                 maxunused=0, maxconnections=0, block=False,
+                 deep_health_check=False, autocommit=False, errorhandler=None,
+                 readonly=False):
+        """Set up the pool. No connection is opened until open() is awaited
+        or the pool is entered with async with.
+
+        Args:
+            initialconnections(int): Number of connections opened by open().
+                Default 0
+            maxunused(int): Maximum number of unused connections kept in the
+                pool. Default 0, no limit
+            maxconnections(int): Maximum number of connections. Default 0,
+                no limit
+            block(bool): If True, acquire() waits for a connection when
+                maxconnections are in use. Default False, raise
+                MimerPoolExhausted
+            deep_health_check(bool): Run a query on an unused connection to
+                check it before it is handed out. Default False
+            dsn(str): The database name
+            user(str): The database username
+            password(str): The database password
+            autocommit(bool): Autocommit mode
+            errorhandler: Custom errorhandler
+            readonly(bool): Open the connections in read-only mode.
+                Default False
+
+        """
+        self._connect_args = dict(dsn=dsn, user=user, password=password,
+                                  autocommit=autocommit,
+                                  errorhandler=errorhandler, readonly=readonly)
+        self._autocommit = autocommit
+        self._block = block
+        self._initialconnections = initialconnections
+        self._deep_health_check = deep_health_check
+        if maxunused > 0 and maxunused < initialconnections:
+            self._maxunused = initialconnections
+        else:
+            self._maxunused = maxunused
+        if maxconnections > 0 and maxconnections < self._maxunused:
+            self._maxconnections = self._maxunused
+        else:
+            self._maxconnections = maxconnections
+        self.__cached_connections = collections.deque()
+        self.__used_connections = set()
+        self.__opening = 0      # Connections being opened or reserved for a waiter
+        self.__waiters = collections.deque()
+        self.__closed = False
+
+    @property
+    def cached_connections(self):
+        """The number of available connections in the pool."""
+        return len(self.__cached_connections)
+
+    @property
+    def used_connections(self):
+        """The number of used connections."""
+        return len(self.__used_connections)
+
+    @property
+    def connections(self):
+        """Total number of open connections."""
+        return len(self.__used_connections) + len(self.__cached_connections)
+
+    async def open(self):
+        """Open the initial connections."""
+        count = self._initialconnections - self.connections
+        if count > 0:
+            self.__opening += count
+            results = await asyncio.gather(
+                *(self.__open() for _ in range(count)), return_exceptions=True)
+            self.__opening -= count
+            for result in results:
+                if isinstance(result, BaseException):
+                    for con in results:
+                        if isinstance(con, AsyncPooledConnection):
+                            _discard(con)
+                    raise result
+            self.__cached_connections.extend(results)
+
+    def acquire(self, timeout=None):
+        """Get a connection from the pool.
+
+        Use either con = await pool.acquire() and return the connection with
+        await con.close(), or async with pool.acquire() as con.
+
+        Args:
+            timeout(float): Seconds to wait for a connection when block is
+                True. Default None, wait as long as needed
+
+        Returns:
+            An awaitable of an AsyncPooledConnection
+
+        """
+        return _Acquire(self, timeout)
+
+    async def _acquire(self, timeout):
+        if self.__closed:
+            raise MimerPoolError("The pool is closed")
+        while self.__cached_connections and not self.__waiters:
+            con = self.__cached_connections.popleft()
+            self.__used_connections.add(con)
+            try:
+                healthy = await self.__check(con)
+            except BaseException:
+                self.__used_connections.discard(con)
+                _discard(con)
+                raise
+            if healthy:
+                return con
+            self.__used_connections.discard(con)
+            _discard(con)
+        if (self.__waiters or (self._maxconnections > 0 and
+                self.connections + self.__opening >= self._maxconnections)):
+            if not self._block:
+                raise MimerPoolExhausted
+            con = await self.__wait(timeout)
+            if con is not None:
+                return con
+        else:
+            self.__opening += 1
+        # A connection slot is reserved, open a new connection in it
+        try:
+            con = await self.__open()
+        except BaseException:
+            self.__dispatch(None)
+            raise
+        self.__opening -= 1
+        self.__used_connections.add(con)
+        return con
+
+    async def __open(self):
+        executor = _worker()
+        loop = asyncio.get_running_loop()
+        try:
+            con = await loop.run_in_executor(
+                executor, functools.partial(mimerpy.connect,
+                                            **self._connect_args))
+        except BaseException:
+            executor.shutdown(wait=False)
+            raise
+        return AsyncPooledConnection(self, con, executor)
+
+    async def __check(self, con):
+        # Make an unused connection ready, return False if it is broken.
+        if con.connection._session is None:
+            return False
+        if self._deep_health_check:
+            return await con._submit(_healthy, con.connection)
+        if con.connection._transaction:
+            await con.rollback()
+        return True
+
+    async def __wait(self, timeout):
+        # Queue up for a connection. Returns a connection or None when a
+        # slot has been reserved for a new one.
+        waiter = asyncio.get_running_loop().create_future()
+        self.__waiters.append(waiter)
+        try:
+            done, _ = await asyncio.wait((waiter,), timeout=timeout)
+        except BaseException:
+            self.__abandon(waiter)
+            raise
+        if not done:
+            self.__abandon(waiter)
+            raise MimerPoolExhausted("Timed out waiting for a connection")
+        return waiter.result()
+
+    def __abandon(self, waiter):
+        # Give away what was handed to a waiter that stopped waiting. An
+        # exception set on it is retrieved, so that it is not logged.
+        if waiter.done() and not waiter.cancelled():
+            if waiter.exception() is None:
+                self.__dispatch(waiter.result())
+        else:
+            waiter.cancel()
+            self.__waiters.remove(waiter)
+
+    def __dispatch(self, con):
+        # Hand a connection, or with None a reserved slot, to the first
+        # waiter. Without waiters the connection is cached or closed.
+        while self.__waiters:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(con)
+                return
+        if con is None:
+            self.__opening -= 1
+            return
+        self.__used_connections.discard(con)
+        if (not self.__closed and (not self._maxunused or (
+                len(self.__cached_connections) < self._maxunused and
+                (not self._maxconnections or
+                 self.connections < self._maxconnections)))):
+            self.__cached_connections.append(con)
+        else:
+            _discard(con)
+
+    async def release(self, con):
+        """Return a connection to the pool.
+
+        Args:
+            con(AsyncPooledConnection): The connection to return.
+
+        """
+        if con not in self.__used_connections:
+            return
+        try:
+            if con.connection._session is None:
+                raise MimerPoolError("The connection is closed")
+            await con._submit(_reset, con.connection, self._autocommit)
+        except Exception:
+            self.__used_connections.discard(con)
+            _discard(con)
+            self.__opening += 1
+            self.__dispatch(None)
+            return
+        self.__dispatch(con)
+
+    async def close(self):
+        """Close all connections in the pool."""
+        self.__closed = True
+        while self.__waiters:
+            waiter = self.__waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(MimerPoolError("The pool is closed"))
+        cons = list(self.__cached_connections) + list(self.__used_connections)
+        self.__cached_connections.clear()
+        self.__used_connections.clear()
+        await asyncio.gather(*(con._close() for con in cons),
+                             return_exceptions=True)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+
+class AsyncPooledConnection(AsyncConnection):
+    """An AsyncConnection that goes back to its pool when it is closed."""
+
+    def __init__(self, pool, connection, executor):
+        super().__init__(connection, executor)
+        self._pool = pool
+
+    async def close(self):
+        """Return the connection to the pool."""
+        await self._pool.release(self)
+
+    async def _close(self):
+        """Truly close the connection."""
+        await super().close()
+
+
+class _Acquire:
+    # Awaitable and async context manager returned by acquire().
+
+    def __init__(self, pool, timeout):
+        self.pool = pool
+        self.timeout = timeout
+        self.connection = None
+
+    def __await__(self):
+        return self.pool._acquire(self.timeout).__await__()
+
+    async def __aenter__(self):
+        self.connection = await self.pool._acquire(self.timeout)
+        return self.connection
+
+    async def __aexit__(self, type, value, traceback):
+        await self.connection.close()
+
+
+def _reset(connection, autocommit):
+    connection.reset()
+    connection.autocommit(autocommit)
+
+
+def _healthy(connection):
+    try:
+        cur = connection.execute("select m from system.onerow")
+        row = cur.fetchone()
+        cur.close()
+        if not connection.autocommitmode:
+            connection.rollback()
+        return bool(row)
+    except Exception:
+        return False
+
+
+def _discard(con):
+    # Close a connection on its worker thread without waiting for it.
+    executor = con._executor
+    if executor is not None:
+        con._executor = None
+        executor.submit(_close, con.connection)
+        executor.shutdown(wait=False)
@@ -0,0 +1,318 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+
+"""Parallel bulk loading over several MimerPy connections.
+
+Usage:
+
+Create a ParallelLoader with the INSERT or MERGE statement to run and
+either a MimerPool or the arguments of mimerpy.connect, then pass any
+iterable of rows to load():
+
+    from mimerpy.bulk import ParallelLoader
+    loader = ParallelLoader("insert into orders values (?, ?, ?)",
+                            pool=pool, workers=8, batch_size=1000)
+    result = loader.load(rows)
+    for failed in result.failed:
+        print(failed.error, len(failed.rows))
+
+The rows are cut into batches that are put on a bounded queue and executed
+with executemany by one worker thread per connection, so reading the rows
+never runs far ahead of the database. Every worker commits its own
+transaction each time commit_every rows have been inserted. A batch that
+fails with a DataError, IntegrityError or ProgrammingError, or holds a
+value that cannot be converted, is rolled back and reported with its rows
+and the error. The other uncommitted batches of that worker are executed
+again, so one bad row does not stop the load. Any other error, such as a
+lost connection, stops the load and is raised by load().
+
+"""
+
+import itertools
+import queue
+import threading
+import time
+
+from .mimPyExceptions import Error, DataError, IntegrityError, ProgrammingError
+
+# Default number of rows per batch
+BATCH_SIZE = 1000
+
+# Default number of rows a worker inserts between commits
+COMMIT_EVERY = 50000
+
+# Default number of seconds between calls to the progress callback
+PROGRESS_INTERVAL = 1.0
+
+_STOP = object()
+
+# Errors caused by the rows of a batch rather than by the connection,
+# including values that cannot be converted to the parameter type
+_BATCH_ERRORS = (DataError, IntegrityError, ProgrammingError, ValueError,
+                 TypeError)
+
+
+class FailedBatch:
+    """A batch that could not be loaded.
+
+    Attributes:
+        rows(list): The rows of the batch, as they were read.
+        error(Exception): The exception raised by the database.
+
+    """
+
+    __slots__ = ('rows', 'error')
+
+    def __init__(self, rows, error):
+        self.rows = rows
+        self.error = error
+
+    def __repr__(self):
+        return '<FailedBatch %d rows: %s>' % (len(self.rows), self.error)
+
+
+class LoadProgress:
+    """Progress of a load.
+
+    Attributes:
+        rows_read(int): Rows read from the input so far.
+        rows_loaded(int): Rows inserted and committed so far.
+        rows_failed(int): Rows in batches that failed so far.
+        elapsed(float): Seconds since the load started.
+        rows_per_second(float): rows_loaded divided by elapsed.
+        failed(list): The FailedBatch objects, only set in the final result.
+
+    """
+
+    __slots__ = ('rows_read', 'rows_loaded', 'rows_failed', 'elapsed',
+                 'rows_per_second', 'failed')
+
+    def __init__(self, rows_read, rows_loaded, rows_failed, elapsed, failed=()):
+        self.rows_read = rows_read
+        self.rows_loaded = rows_loaded
+        self.rows_failed = rows_failed
+        self.elapsed = elapsed
+        self.rows_per_second = rows_loaded / elapsed if elapsed > 0 else 0.0
+        self.failed = list(failed)
+
+    def __repr__(self):
+        return ('<LoadProgress read=%d loaded=%d failed=%d %.0f rows/s>'
+                % (self.rows_read, self.rows_loaded, self.rows_failed,
+                   self.rows_per_second))
+
+
+class ParallelLoader:
+    """Loads rows with one statement over several connections in parallel."""
+
+    def __init__(self, query, pool=None, workers=4, batch_size=BATCH_SIZE,
+                 commit_every=COMMIT_EVERY, queue_size=None, progress=None,
+                 progress_interval=PROGRESS_INTERVAL, **connect_args):
+        """Set up the loader.
+
+        Args:
+            query(str): INSERT or MERGE statement with parameter markers.
+            pool(MimerPool): Pool the worker connections are taken from.
+                If None, every worker opens its own connection with
+                mimerpy.connect(**connect_args).
+            workers(int): Number of worker threads and connections. Default 4
+            batch_size(int): Rows per executemany call. Default 1000
+            commit_every(int): Rows a worker inserts before it commits. Default 50000
+            queue_size(int): Number of batches that may wait on the queue.
+                Default twice the number of workers.
+            progress: Callable called with a LoadProgress about every
+                progress_interval seconds, from the thread calling load().
+            progress_interval(float): Seconds between progress calls. Default 1.0
+            connect_args: Arguments for mimerpy.connect when no pool is given.
+
+        """
+        if workers < 1 or batch_size < 1 or commit_every < 1:
+            raise ValueError("workers, batch_size and commit_every must be positive")
+        self.query = query
+        self.pool = pool
+        self.workers = workers
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.queue_size = queue_size or 2 * workers
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.connect_args = connect_args
+        self.__lock = threading.Lock()
+
+    def load(self, rows):
+        """Load all rows and wait for the workers to finish.
+
+        Args:
+            rows: Iterable of parameter sequences or mappings.
+
+        Returns:
+            A LoadProgress with the totals and the failed batches.
+
+        Raises:
+            The first error that stopped a worker, such as a failed login
+            or a lost connection, after the other workers have finished.
+
+        """
+        self.__rows_loaded = 0
+        self.__rows_failed = 0
+        self.__failed = []
+        self.__fatal = None
+        work = queue.Queue(self.queue_size)
+        threads = [threading.Thread(target=self.__worker, args=(work,),
+                                    name='mimerpy-loader-%d' % n, daemon=True)
+                   for n in range(self.workers)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        rows_read = 0
+        reported = started
+        try:
+            rows = iter(rows)
+            while self.__fatal is None:
+                batch = list(itertools.islice(rows, self.batch_size))
+                if not batch:
+                    break
+                rows_read += len(batch)
+                self.__put(work, batch, threads)
+                if self.progress is not None:
+                    now = time.perf_counter()
+                    if now - reported >= self.progress_interval:
+                        reported = now
+                        self.progress(self.__snapshot(rows_read, now - started))
+        finally:
+            for thread in threads:
+                self.__put(work, _STOP, threads)
+            for thread in threads:
+                thread.join()
+        if self.__fatal is not None:
+            raise self.__fatal
+        result = self.__snapshot(rows_read, time.perf_counter() - started,
+                                 self.__failed)
+        if self.progress is not None:
+            self.progress(result)
+        return result
+
+    def __snapshot(self, rows_read, elapsed, failed=()):
+        with self.__lock:
+            return LoadProgress(rows_read, self.__rows_loaded,
+                                self.__rows_failed, elapsed, failed)
+
+    def __put(self, work, item, threads):
+        # Put item on the queue, giving up if all workers have stopped.
+        while True:
+            try:
+                work.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if not any(thread.is_alive() for thread in threads):
+                    return
+
+    def __connect(self):
+        if self.pool is not None:
+            return self.pool.get_connection()
+        import mimerpy
+        return mimerpy.connect(**self.connect_args)
+
+    def __worker(self, work):
+        # Worker thread executing batches until it gets _STOP. After a
+        # fatal error the worker keeps draining the queue so load() is not
+        # blocked, without executing anything.
+        con = None
+        cur = None
+        try:
+            con = self.__connect()
+            con.autocommit(False)
+            cur = con.cursor()
+        except Exception as e:
+            self.__stop(e)
+        pending = []
+        pending_rows = 0
+        while True:
+            batch = work.get()
+            if batch is _STOP:
+                break
+            if self.__fatal is not None:
+                continue
+            try:
+                if self.__execute(cur, batch, pending):
+                    pending.append(batch)
+                # A failed batch may have dropped earlier pending batches
+                pending_rows = sum(len(b) for b in pending)
+                if pending_rows >= self.commit_every:
+                    self.__commit(con, cur, pending)
+                    pending = []
+                    pending_rows = 0
+            except Exception as e:
+                self.__stop(e)
+        try:
+            if self.__fatal is None and pending:
+                self.__commit(con, cur, pending)
+        except Exception as e:
+            self.__stop(e)
+        finally:
+            try:
+                if cur is not None:
+                    cur.close()
+                if con is not None:
+                    con.close()
+            except Error:
+                pass
+
+    def __execute(self, cur, batch, pending):
+        # Execute batch, returning False if its rows were rejected. The
+        # transaction is then rolled back and the pending batches are
+        # executed again. Other errors are raised to stop the worker.
+        try:
+            cur.executemany(self.query, batch, batch_size=len(batch))
+            return True
+        except _BATCH_ERRORS as e:
+            cur.connection.rollback()
+            self.__reject(batch, e)
+        retried = []
+        for earlier in pending:
+            if self.__execute(cur, earlier, retried):
+                retried.append(earlier)
+        pending[:] = retried
+        return False
+
+    def __commit(self, con, cur, pending):
+        try:
+            con.commit()
+        except Error as e:
+            try:
+                con.rollback()
+            except Error:
+                pass
+            for batch in pending:
+                self.__reject(batch, e)
+            return
+        with self.__lock:
+            self.__rows_loaded += sum(len(batch) for batch in pending)
+
+    def __reject(self, batch, error):
+        with self.__lock:
+            self.__failed.append(FailedBatch(batch, error))
+            self.__rows_failed += len(batch)
+
+    def __stop(self, error):
+        with self.__lock:
+            if self.__fatal is None:
+                self.__fatal = error
@@ -0,0 +1,858 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+"""
+Column-oriented data exchange with NumPy, Apache Arrow and pandas.
+
+None of these packages is required by MimerPy. They are imported the first
+time a column-oriented method is used, and an ImportError is raised then if
+the package is missing.
+"""
+
+import collections
+import os
+from decimal import Decimal
+from array import array
+from urllib.parse import quote
+
+from . import mimerapi
+
+_INT32_TYPES = frozenset((
+    mimerapi.MIMER_TYPE_T_INTEGER,
+    mimerapi.MIMER_TYPE_NATIVE_SMALLINT_NULLABLE,
+    mimerapi.MIMER_TYPE_NATIVE_INTEGER_NULLABLE,
+    mimerapi.MIMER_TYPE_N_TINYINT_NULLABLE,
+))
+
+_INT64_TYPES = frozenset((
+    mimerapi.MIMER_TYPE_NATIVE_BIGINT_NULLABLE,
+    mimerapi.MIMER_TYPE_GOLDEN_INTEGER,
+))
+
+_DOUBLE_TYPES = frozenset((
+    mimerapi.MIMER_TYPE_T_DOUBLE,
+    mimerapi.MIMER_TYPE_DOUBLE,
+))
+
+_STRING_TYPES = frozenset((
+    mimerapi.MIMER_TYPE_CHARACTER,
+    mimerapi.MIMER_TYPE_CHARACTER_VARYING,
+    mimerapi.MIMER_TYPE_NCHAR,
+    mimerapi.MIMER_TYPE_NCHAR_VARYING,
+    mimerapi.MIMER_TYPE_UTF8,
+))
+
+_INT32_RANGE = (-(1 << 31), (1 << 31) - 1)
+_INT64_RANGE = (-(1 << 63), (1 << 63) - 1)
+
+
+def import_pyarrow():
+    """Return the pyarrow module, raising ImportError if it is not installed."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("pyarrow is required for Arrow operations") from e
+    return pyarrow
+
+def import_numpy():
+    """Return the numpy module, raising ImportError if it is not installed."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("numpy is required for column-oriented operations") from e
+    return numpy
+
+def _is_from(obj, package):
+    return type(obj).__module__.split('.', 1)[0] == package
+
+
+# ---------------------------------------------------------------------------
+# Column-oriented parameters
+# ---------------------------------------------------------------------------
+
+def as_columns(columns):
+    """
+    Return a list of (name, values, mask) for column-oriented input.
+
+    columns is a pyarrow Table or RecordBatch, a pandas DataFrame, a mapping
+    of names to columns or a sequence of columns. A column is a NumPy array
+    (masked arrays mark NULLs), a pyarrow Array or ChunkedArray, a pandas
+    Series or any sequence, where None marks NULL. values is a 1-dimensional
+    ndarray and mask a boolean ndarray marking NULLs, or None if there are
+    none. name is None for a sequence of columns.
+    """
+    np = import_numpy()
+    if _is_from(columns, 'pyarrow') and hasattr(columns, 'column_names'):
+        items = [(name, columns.column(i))
+                 for i, name in enumerate(columns.column_names)]
+    elif _is_from(columns, 'pandas') and hasattr(columns, 'columns'):
+        items = [(str(name), columns.iloc[:, i])
+                 for i, name in enumerate(columns.columns)]
+    elif isinstance(columns, dict):
+        items = list(columns.items())
+    elif isinstance(columns, (str, bytes, bytearray)):
+        raise TypeError("columns must be a sequence of columns")
+    else:
+        items = [(None, column) for column in columns]
+    return [(name,) + _column_arrays(np, column) for name, column in items]
+
+def _column_arrays(np, column):
+    mask = None
+    if isinstance(column, np.ma.MaskedArray):
+        mask = np.ma.getmaskarray(column)
+        values = np.ma.getdata(column)
+    elif _is_from(column, 'pyarrow'):
+        values, mask = _arrow_arrays(column)
+    elif _is_from(column, 'pandas'):
+        mask = column.isna().to_numpy(dtype=bool)
+        numpy_dtype = getattr(column.dtype, 'numpy_dtype', None)
+        if numpy_dtype is not None and numpy_dtype.kind in 'biuf':
+            # Nullable extension types, NULLs are replaced and masked
+            values = column.to_numpy(dtype=numpy_dtype, na_value=0)
+        else:
+            values = column.to_numpy()
+    else:
+        values = np.asarray(column)
+        if values.dtype.kind == 'O':
+            mask = np.equal(values, None)
+    if values.ndim != 1:
+        raise TypeError("columns must be 1-dimensional")
+    if mask is not None and not mask.any():
+        mask = None
+    return (values, mask)
+
+def _arrow_arrays(column):
+    import pyarrow
+    if isinstance(column, pyarrow.ChunkedArray):
+        column = column.combine_chunks()
+    mask = None
+    if column.null_count:
+        mask = column.is_null().to_numpy(zero_copy_only=False)
+        t = column.type
+        if pyarrow.types.is_integer(t):
+            column = column.fill_null(0)
+        elif pyarrow.types.is_boolean(t):
+            column = column.fill_null(False)
+    return (column.to_numpy(zero_copy_only=False), mask)
+
+def column_binding(parameter_type, values, mask, setter):
+    """
+    Validate a column for a parameter and return its (kind, values, nulls).
+
+    Columns of the native integer, floating point, boolean and character
+    types are checked for range, NaN and infinity with one vectorized
+    operation per column and converted to the Python values expected by
+    mimerExecuteColumns. Other columns are converted to Python objects and
+    bound one value at a time with setter. Raises OverflowError or
+    ValueError if a value can not be bound to the parameter.
+    """
+    np = import_numpy()
+    kind = values.dtype.kind
+    valid = values if mask is None else values[~mask]
+    nulls = None if mask is None else mask.tolist()
+
+    if parameter_type in _INT32_TYPES or parameter_type in _INT64_TYPES:
+        if kind in 'biuf':
+            if kind == 'f':
+                if not np.isfinite(valid).all() or (valid != np.trunc(valid)).any():
+                    raise ValueError("column contains non-integral values")
+                if mask is not None:
+                    values = np.where(mask, 0, values)
+            if parameter_type in _INT32_TYPES:
+                column_kind, (low, high) = mimerapi.MIMERPY_COLUMN_INT32, _INT32_RANGE
+            else:
+                column_kind, (low, high) = mimerapi.MIMERPY_COLUMN_INT64, _INT64_RANGE
+            if valid.size and (valid.min() < low or valid.max() > high):
+                raise OverflowError("column value out of range")
+            return (column_kind, values.astype(np.int64).tolist(), nulls)
+
+    elif parameter_type in _DOUBLE_TYPES or parameter_type == mimerapi.MIMER_NATIVE_REAL_NULLABLE:
+        if kind in 'biuf':
+            values = values.astype(np.float64)
+            if not np.isfinite(values if mask is None else values[~mask]).all():
+                raise ValueError("column contains NaN or infinity")
+            if parameter_type in _DOUBLE_TYPES:
+                column_kind = mimerapi.MIMERPY_COLUMN_DOUBLE
+            else:
+                column_kind = mimerapi.MIMERPY_COLUMN_FLOAT
+            return (column_kind, values.tolist(), nulls)
+
+    elif parameter_type == mimerapi.MIMER_TYPE_BOOLEAN:
+        if kind in 'biu':
+            return (mimerapi.MIMERPY_COLUMN_BOOLEAN,
+                    (values != 0).astype(np.int32).tolist(), nulls)
+
+    elif parameter_type in _STRING_TYPES:
+        if kind == 'U':
+            encoded = np.char.encode(values, 'utf-8').tolist()
+        elif kind == 'S':
+            encoded = values.tolist()
+        else:
+            encoded = [v if isinstance(v, bytes) else str(v).encode('utf-8')
+                       for v in values.tolist()]
+        return (mimerapi.MIMERPY_COLUMN_STRING, encoded, nulls)
+
+    # Everything else is bound one value at a time
+    if kind == 'M':
+        unit = 'D' if parameter_type == mimerapi.MIMER_TYPE_DATE else 'us'
+        values = values.astype('datetime64[%s]' % unit)
+    return (setter, values.tolist(), nulls)
+
+
+# ---------------------------------------------------------------------------
+# Column-oriented results
+# ---------------------------------------------------------------------------
+
+# Column types collected in typed arrays: (array typecode, NumPy dtype)
+_FETCH_ARRAYS = {
+    mimerapi.MIMER_TYPE_T_INTEGER: ('i', 'int32'),
+    mimerapi.MIMER_TYPE_NATIVE_SMALLINT_NULLABLE: ('i', 'int32'),
+    mimerapi.MIMER_TYPE_NATIVE_INTEGER_NULLABLE: ('i', 'int32'),
+    mimerapi.MIMER_TYPE_N_TINYINT_NULLABLE: ('i', 'int32'),
+    mimerapi.MIMER_TYPE_NATIVE_BIGINT_NULLABLE: ('q', 'int64'),
+    mimerapi.MIMER_TYPE_GOLDEN_INTEGER: ('q', 'int64'),
+    mimerapi.MIMER_TYPE_T_DOUBLE: ('d', 'float64'),
+    mimerapi.MIMER_TYPE_DOUBLE: ('d', 'float64'),
+    mimerapi.MIMER_NATIVE_REAL_NULLABLE: ('f', 'float32'),
+    mimerapi.MIMER_TYPE_BOOLEAN: ('b', 'bool'),
+}
+
+# Column types converted to datetime64 when the column is complete
+_FETCH_DATETIMES = {
+    mimerapi.MIMER_TYPE_DATE: 'datetime64[D]',
+    mimerapi.MIMER_TYPE_TIMESTAMP: 'datetime64[us]',
+}
+
+class ColumnBuilder:
+    """
+    Collects the values of one result set column.
+
+    Values of the native integer, floating point and boolean types are
+    stored unboxed in an array.array, which grows in place as rows are
+    appended, and NULLs are recorded in a separate byte mask. Other values
+    are kept in a list until the column is converted. A builder is used for
+    one batch of rows only, the converted arrays may share its memory.
+    If getter is given, a cursor fetching into the builder uses it instead
+    of the default getter of the column type. append_value() takes a value
+    as the default getter returns it, such as a stored row of a client side
+    ScrollCursor.
+    """
+    __slots__ = ('column_type', 'getter', 'values', 'nulls', '_fill')
+
+    def __init__(self, column_type, getter=None):
+        self.column_type = column_type
+        self.getter = getter
+        spec = _FETCH_ARRAYS.get(column_type)
+        if spec is None:
+            self.values = []
+            self._fill = None
+        else:
+            self.values = array(spec[0])
+            self._fill = 0
+        self.nulls = bytearray()
+
+    def __len__(self):
+        return len(self.nulls)
+
+    def append(self, value):
+        if value is None:
+            self.values.append(self._fill)
+            self.nulls.append(1)
+        else:
+            self.values.append(value)
+            self.nulls.append(0)
+
+    # The conversions to arrays accept decoded values as well
+    append_value = append
+
+    def to_masked_array(self):
+        """Return the values as a NumPy masked array, masked where NULL."""
+        np = import_numpy()
+        n = len(self.nulls)
+        spec = _FETCH_ARRAYS.get(self.column_type)
+        if spec is not None:
+            data = (np.frombuffer(self.values, dtype=spec[1]) if n
+                    else np.empty(0, dtype=spec[1]))
+        elif self.column_type in _FETCH_DATETIMES:
+            data = np.array(self.values, dtype=_FETCH_DATETIMES[self.column_type])
+        else:
+            data = np.fromiter(self.values, dtype=object, count=n)
+        if 1 in self.nulls:
+            mask = np.frombuffer(self.nulls, dtype=bool)
+        else:
+            mask = np.ma.nomask
+        return np.ma.MaskedArray(data, mask=mask)
+
+def unique_names(names):
+    """Return the column names, with empty and duplicate names made unique."""
+    seen = set()
+    result = []
+    for number, name in enumerate(names, 1):
+        base = name or 'column%d' % number
+        candidate = base
+        suffix = 1
+        while candidate in seen:
+            suffix += 1
+            candidate = '%s_%d' % (base, suffix)
+        seen.add(candidate)
+        result.append(candidate)
+    return result
+
+def to_structured(names, columns):
+    """Combine masked column arrays into one structured masked array."""
+    np = import_numpy()
+    rows = len(columns[0]) if columns else 0
+    data = np.empty(rows, dtype=[(name, c.dtype) for name, c in zip(names, columns)])
+    mask = np.zeros(rows, dtype=[(name, bool) for name in names])
+    for name, column in zip(names, columns):
+        data[name] = np.ma.getdata(column)
+        mask[name] = np.ma.getmaskarray(column)
+    return np.ma.MaskedArray(data, mask=mask)
+
+
+# ---------------------------------------------------------------------------
+# Apache Arrow
+# ---------------------------------------------------------------------------
+
+# Default number of rows per RecordBatch
+ARROW_BATCH_ROWS = 65536
+
+# Fixed point types. FLOAT is a decimal floating point type with a varying
+# exponent and is fetched as float64 instead.
+_DECIMAL_TYPES = frozenset((
+    mimerapi.MIMER_TYPE_DECIMAL,
+    mimerapi.MIMER_TYPE_NUMERIC,
+    mimerapi.MIMER_TYPE_GOLDEN_DECIMAL,
+))
+
+def _arrow_types(pa):
+    types = {
+        mimerapi.MIMER_TYPE_T_INTEGER: pa.int32(),
+        mimerapi.MIMER_TYPE_NATIVE_SMALLINT_NULLABLE: pa.int32(),
+        mimerapi.MIMER_TYPE_NATIVE_INTEGER_NULLABLE: pa.int32(),
+        mimerapi.MIMER_TYPE_N_TINYINT_NULLABLE: pa.int32(),
+        mimerapi.MIMER_TYPE_NATIVE_BIGINT_NULLABLE: pa.int64(),
+        mimerapi.MIMER_TYPE_GOLDEN_INTEGER: pa.int64(),
+        mimerapi.MIMER_TYPE_INTEGER: pa.decimal128(38, 0),
+        mimerapi.MIMER_TYPE_T_DOUBLE: pa.float64(),
+        mimerapi.MIMER_TYPE_DOUBLE: pa.float64(),
+        mimerapi.MIMER_TYPE_FLOAT: pa.float64(),
+        mimerapi.MIMER_NATIVE_REAL_NULLABLE: pa.float32(),
+        mimerapi.MIMER_TYPE_BOOLEAN: pa.bool_(),
+        mimerapi.MIMER_TYPE_DATE: pa.date32(),
+        mimerapi.MIMER_TYPE_TIME: pa.time64('us'),
+        mimerapi.MIMER_TYPE_TIMESTAMP: pa.timestamp('us'),
+        mimerapi.MIMER_TYPE_BINARY: pa.binary(),
+        mimerapi.MIMER_TYPE_BINARY_VARYING: pa.binary(),
+        mimerapi.MIMER_TYPE_BLOB: pa.large_binary(),
+        mimerapi.MIMER_TYPE_CLOB: pa.large_string(),
+        mimerapi.MIMER_TYPE_NCLOB: pa.large_string(),
+        mimerapi.MIMER_TYPE_UUID: pa.binary(16),
+        mimerapi.MIMER_TYPE_LATITUDE: pa.float64(),
+        mimerapi.MIMER_TYPE_LONGITUDE: pa.float64(),
+        mimerapi.MIMER_TYPE_LOCATION: pa.list_(pa.float64(), 2),
+    }
+    for code in (mimerapi.MIMER_TYPE_CHARACTER,
+                 mimerapi.MIMER_TYPE_CHARACTER_VARYING,
+                 mimerapi.MIMER_TYPE_NCHAR,
+                 mimerapi.MIMER_TYPE_NCHAR_VARYING,
+                 mimerapi.MIMER_TYPE_UTF8,
+                 *range(mimerapi.MIMER_TYPE_INTERVAL_YEAR,
+                        mimerapi.MIMER_TYPE_INTERVAL_MINUTE_TO_SECOND + 1)):
+        types[code] = pa.string()
+    return types
+
+class _DecimalScales:
+    # Scales of the DECIMAL columns of a result set. The Mimer API does not
+    # report the declared scale of a column, but the server renders every
+    # DECIMAL value with exactly the declared number of fraction digits, so
+    # the scale is known from the first value that is not NULL.
+
+    def __init__(self, column_types):
+        self.unknown = {i for i, t in enumerate(column_types)
+                        if t in _DECIMAL_TYPES}
+        self.scales = {}
+
+    def learn(self, columns):
+        """Take the scales from the builders, return True if all are known."""
+        for i in list(self.unknown):
+            for value in columns[i].values:
+                if value is not None:
+                    self.scales[i] = max(-Decimal(value).as_tuple().exponent, 0)
+                    self.unknown.discard(i)
+                    break
+        return not self.unknown
+
+    def get(self, i):
+        """Return the scale of column i, 0 for a column with only NULLs."""
+        return self.scales.get(i, 0)
+
+class ArrowBatchBuilder:
+    """
+    Builds pyarrow RecordBatches from the columns of a result set.
+
+    Every Mimer type code is mapped to an Arrow type. Native integer,
+    floating point and boolean columns are wrapped around the buffers of
+    their ColumnBuilder without copying. DECIMAL columns are typed
+    decimal128(38, scale) with the declared scale of the column, so that
+    all batches share one schema. Since the scale is only known once a
+    value that is not NULL has been fetched, add() holds batches back until
+    every DECIMAL column has had one.
+    """
+
+    def __init__(self, names, column_types):
+        self._pa = import_pyarrow()
+        import pyarrow.compute
+        self._pc = pyarrow.compute
+        self.names = list(names)
+        self.column_types = list(column_types)
+        self.schema = None
+        self.scales = _DecimalScales(self.column_types)
+        self._types = _arrow_types(self._pa)
+        self._pending = []
+
+    def new_columns(self):
+        """Return empty column builders for the next batch."""
+        return [ColumnBuilder(t) for t in self.column_types]
+
+    def __field_type(self, i, column_type):
+        if column_type in _DECIMAL_TYPES:
+            return self._pa.decimal128(38, self.scales.get(i))
+        return self._types.get(column_type, self._pa.string())
+
+    def empty_schema(self):
+        """Return the schema, typing decimals with only NULLs with scale 0."""
+        if self.schema is None:
+            self.schema = self._pa.schema([
+                (name, self.__field_type(i, t))
+                for i, (name, t) in enumerate(zip(self.names, self.column_types))])
+        return self.schema
+
+    def add(self, columns):
+        """Add the builders of a batch and return the batches that can be built."""
+        self._pending.append(columns)
+        if self.schema is None and not self.scales.learn(columns):
+            return []
+        return self.finish()
+
+    def finish(self):
+        """Return the batches held back by add()."""
+        batches = [self.to_batch(columns) for columns in self._pending]
+        self._pending = []
+        return batches
+
+    def to_batch(self, columns):
+        """Return a RecordBatch holding the values of the column builders."""
+        pa = self._pa
+        if self.schema is None:
+            self.scales.learn(columns)
+            self.empty_schema()
+        arrays = [self.__to_array(builder, field.type)
+                  for builder, field in zip(columns, self.schema)]
+        return pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+
+    def __to_array(self, builder, arrow_type):
+        pa = self._pa
+        pc = self._pc
+        n = len(builder)
+        if not isinstance(builder.values, array):
+            values = builder.values
+            if builder.column_type == mimerapi.MIMER_TYPE_UUID:
+                values = [None if v is None else v.bytes for v in values]
+            elif builder.column_type == mimerapi.MIMER_TYPE_FLOAT:
+                values = [None if v is None else float(v) for v in values]
+            elif builder.column_type not in self._types and builder.column_type not in _DECIMAL_TYPES:
+                values = [None if v is None else str(v) for v in values]
+            return pa.array(values, type=arrow_type)
+
+        null_count = builder.nulls.count(1)
+        validity = None
+        if null_count:
+            nulls = pa.Array.from_buffers(pa.uint8(), n, [None, pa.py_buffer(builder.nulls)])
+            validity = pc.equal(nulls, 0).buffers()[1]
+        data = pa.py_buffer(builder.values)
+        if builder.column_type == mimerapi.MIMER_TYPE_BOOLEAN:
+            flags = pa.Array.from_buffers(pa.uint8(), n, [None, data])
+            data = pc.not_equal(flags, 0).buffers()[1]
+        return pa.Array.from_buffers(arrow_type, n, [validity, data], null_count=null_count)
+
+
+# ---------------------------------------------------------------------------
+# Apache Parquet
+# ---------------------------------------------------------------------------
+
+# Default number of rows per Parquet row group
+PARQUET_ROW_GROUP_ROWS = 131072
+
+# Default number of Parquet files kept open at the same time
+PARQUET_MAX_OPEN_FILES = 64
+
+_NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+class _ParquetPartition:
+    # Pending batches and the open file of one output directory.
+    __slots__ = ('directory', 'pending', 'rows', 'writer', 'sink')
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.pending = []
+        self.rows = 0
+        self.writer = None
+        self.sink = None
+
+class ParquetExporter:
+    """
+    Writes a stream of Arrow record batches to Parquet files.
+
+    The files are written to the directory path as part-NNNNN.parquet.
+    With partition_by, rows are split into Hive style column=value
+    subdirectories and the partition columns are left out of the files.
+    Rows are written in row groups of row_group_size rows, and a new file is
+    started once a file has grown past max_file_size bytes. At most
+    row_group_size rows are held in memory in total, and at most
+    max_open_files files are open at a time, so memory use does not depend
+    on the size of the result or the number of partitions.
+    """
+
+    def __init__(self, path, row_group_size=PARQUET_ROW_GROUP_ROWS,
+                 max_file_size=None, partition_by=None, compression='snappy',
+                 max_open_files=PARQUET_MAX_OPEN_FILES):
+        self._pa = import_pyarrow()
+        try:
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("pyarrow.parquet is required for Parquet export") from e
+        self._pq = pyarrow.parquet
+        if isinstance(partition_by, str):
+            partition_by = [partition_by]
+        self.path = path
+        self.row_group_size = row_group_size
+        self.max_file_size = max_file_size
+        self.partition_by = list(partition_by or ())
+        self.compression = compression
+        self.max_open_files = max_open_files
+        self.files = []
+        self._schema = None
+        self._partitions = {}
+        self._open = collections.OrderedDict()
+        self._pending_rows = 0
+
+    def write(self, batch):
+        """Add a record batch to the output."""
+        if self._schema is None:
+            schema = batch.schema
+            for name in self.partition_by:
+                schema = schema.remove(schema.get_field_index(name))
+            self._schema = schema
+        if not self.partition_by:
+            self.__add(self.__partition(()), batch)
+            return
+        for key, part in self.__split(batch):
+            self.__add(self.__partition(key), part)
+
+    def close(self, schema=None):
+        """
+        Write all pending rows and close the open files.
+
+        If no file was written, an empty file with the given schema is
+        written for an unpartitioned export. Returns the paths of the
+        files written.
+        """
+        try:
+            for partition in self._partitions.values():
+                if partition.rows:
+                    self.__flush(partition, partition.rows)
+            if not self.files and not self.partition_by and schema is not None:
+                if self._schema is None:
+                    self._schema = schema
+                self.__writer(self.__partition(()))
+        finally:
+            for partition in list(self._open.values()):
+                self.__close_file(partition)
+        return self.files
+
+    def __split(self, batch):
+        # Yield (key, batch) for each distinct value of the partition columns.
+        pc = self._pa.compute
+        order = pc.sort_indices(batch, sort_keys=[(name, 'ascending')
+                                                  for name in self.partition_by])
+        batch = batch.take(order)
+        keys = list(zip(*[batch.column(name).to_pylist()
+                          for name in self.partition_by]))
+        drop = [batch.schema.get_field_index(name) for name in self.partition_by]
+        batch = batch.select([i for i in range(batch.num_columns) if i not in drop])
+        start = 0
+        for stop in range(1, len(keys) + 1):
+            if stop == len(keys) or keys[stop] != keys[start]:
+                yield (keys[start], batch.slice(start, stop - start))
+                start = stop
+
+    def __partition(self, key):
+        partition = self._partitions.get(key)
+        if partition is None:
+            directory = os.path.join(self.path, *[
+                '%s=%s' % (name, _NULL_PARTITION if value is None
+                           else quote(str(value), safe=''))
+                for name, value in zip(self.partition_by, key)])
+            partition = self._partitions[key] = _ParquetPartition(directory)
+        return partition
+
+    def __add(self, partition, batch):
+        partition.pending.append(batch)
+        partition.rows += batch.num_rows
+        self._pending_rows += batch.num_rows
+        if partition.rows >= self.row_group_size:
+            self.__flush(partition, partition.rows - partition.rows % self.row_group_size)
+        while self._pending_rows > self.row_group_size:
+            largest = max(self._partitions.values(), key=lambda p: p.rows)
+            self.__flush(largest, largest.rows)
+
+    def __flush(self, partition, rows):
+        # Write the first rows pending rows of partition as row groups.
+        table = self._pa.Table.from_batches(partition.pending, schema=self._schema)
+        rest = table.slice(rows)
+        partition.pending = rest.to_batches()
+        partition.rows = rest.num_rows
+        self._pending_rows -= rows
+        table = table.slice(0, rows)
+        for start in range(0, rows, self.row_group_size):
+            writer = self.__writer(partition)
+            writer.write_table(table.slice(start, self.row_group_size),
+                               row_group_size=self.row_group_size)
+            if (self.max_file_size is not None
+                    and partition.sink.tell() >= self.max_file_size):
+                self.__close_file(partition)
+
+    def __writer(self, partition):
+        # Return the open writer of partition, opening a new file if needed.
+        if partition.writer is not None:
+            self._open.move_to_end(partition.directory)
+            return partition.writer
+        while len(self._open) >= self.max_open_files:
+            self.__close_file(next(iter(self._open.values())))
+        os.makedirs(partition.directory, exist_ok=True)
+        filename = os.path.join(partition.directory,
+                                'part-%05d.parquet' % len(self.files))
+        partition.sink = self._pa.OSFile(filename, 'wb')
+        partition.writer = self._pq.ParquetWriter(partition.sink, self._schema,
+                                                  compression=self.compression)
+        self.files.append(filename)
+        self._open[partition.directory] = partition
+        return partition.writer
+
+    def __close_file(self, partition):
+        self._open.pop(partition.directory, None)
+        try:
+            partition.writer.close()
+        finally:
+            partition.sink.close()
+            partition.writer = None
+            partition.sink = None
+
+
+# ---------------------------------------------------------------------------
+# pandas
+# ---------------------------------------------------------------------------
+
+DECIMAL_MODES = ('object', 'float', 'scaled')
+
+DTYPE_BACKENDS = (None, 'numpy_nullable', 'pyarrow')
+
+# Column types fetched as their string form and converted per column
+_DATAFRAME_RAW_TYPES = frozenset((
+    mimerapi.MIMER_TYPE_DECIMAL,
+    mimerapi.MIMER_TYPE_NUMERIC,
+    mimerapi.MIMER_TYPE_GOLDEN_DECIMAL,
+    mimerapi.MIMER_TYPE_DATE,
+    mimerapi.MIMER_TYPE_TIMESTAMP,
+))
+
+def import_pandas():
+    """Return the pandas module, raising ImportError if it is not installed."""
+    try:
+        import pandas
+    except ImportError as e:
+        raise ImportError("pandas is required for DataFrame operations") from e
+    return pandas
+
+def _scaled(value, scale):
+    # Return value times 10**scale as an int, which must be exact.
+    scaled = Decimal(value).scaleb(scale)
+    result = int(scaled)
+    if result != scaled:
+        raise ValueError("%s has more than %d decimals" % (value, scale))
+    return result
+
+class DataFrameBuilder:
+    """
+    Builds pandas DataFrames from the columns of a result set.
+
+    With the default dtype_backend, native integer and floating point
+    columns become int32, int64, float32 or float64 columns, or float64
+    with NaN where there are NULLs, and BOOLEAN columns become bool, or
+    object where there are NULLs. With 'numpy_nullable' they become the
+    pandas masked extension types instead, and with 'pyarrow' all columns
+    are ArrowDtype columns converted from ArrowBatchBuilder batches.
+
+    DATE and TIMESTAMP columns are fetched as strings and parsed a whole
+    column at a time into datetime64. DECIMAL columns become Decimal
+    objects with decimal 'object', float64 with 'float', or Int64 holding
+    the value times 10**scale with 'scaled', where scale is the declared
+    scale of the column, recorded in DataFrame.attrs['decimal_scale'].
+    Where the frame depends on the scale, add() holds chunks back until
+    every DECIMAL column has had a value that is not NULL, as in
+    ArrowBatchBuilder. FLOAT columns become float64.
+    """
+
+    def __init__(self, names, column_types, dtype_backend=None,
+                 decimal='object'):
+        self._pd = import_pandas()
+        self._np = import_numpy()
+        self.names = list(names)
+        self.column_types = list(column_types)
+        self.dtype_backend = dtype_backend
+        self.decimal = decimal
+        if dtype_backend == 'pyarrow':
+            self._arrow = ArrowBatchBuilder(names, column_types)
+            self.scales = self._arrow.scales
+        else:
+            self._arrow = None
+            self.scales = _DecimalScales(self.column_types)
+        self._hold = decimal == 'scaled' or self._arrow is not None
+        self._pending = []
+
+    def new_columns(self):
+        """Return empty column builders for the next chunk."""
+        if self._arrow is not None:
+            return self._arrow.new_columns()
+        return [ColumnBuilder(t, mimerapi.mimerGetString8
+                              if t in _DATAFRAME_RAW_TYPES else None)
+                for t in self.column_types]
+
+    def add(self, columns):
+        """Add the builders of a chunk and return the frames that can be built."""
+        self._pending.append(columns)
+        if self._hold and not self.scales.learn(columns):
+            return []
+        return self.finish()
+
+    def finish(self):
+        """Return the frames held back by add()."""
+        frames = [self.to_frame(columns) for columns in self._pending]
+        self._pending = []
+        return frames
+
+    def to_frame(self, columns):
+        """Return a DataFrame holding the values of the column builders."""
+        self.scales.learn(columns)
+        if self._arrow is not None:
+            frame = self.__arrow_frame(self._arrow.to_batch(columns))
+        else:
+            frame = self._pd.DataFrame(
+                {name: self.__to_series(i, builder)
+                 for i, (name, builder) in enumerate(zip(self.names, columns))},
+                columns=self.names)
+        if self.decimal == 'scaled':
+            scales = {name: self.scales.get(i)
+                      for i, (name, t) in enumerate(zip(self.names, self.column_types))
+                      if t in _DECIMAL_TYPES}
+            if scales:
+                frame.attrs['decimal_scale'] = scales
+        return frame
+
+    def __arrow_frame(self, batch):
+        pa = self._arrow._pa
+        arrays = []
+        for array_ in batch.columns:
+            if pa.types.is_decimal(array_.type):
+                if self.decimal == 'float':
+                    array_ = array_.cast(pa.float64())
+                elif self.decimal == 'scaled':
+                    array_ = self.__arrow_scaled(pa, array_)
+            arrays.append(array_)
+        table = pa.Table.from_arrays(arrays, names=self.names)
+        return table.to_pandas(types_mapper=self._pd.ArrowDtype)
+
+    def __arrow_scaled(self, pa, array_):
+        # The decimal128 storage holds the value times 10**scale.
+        unscaled = pa.Array.from_buffers(pa.decimal128(38, 0), len(array_),
+                                         array_.buffers(),
+                                         null_count=array_.null_count,
+                                         offset=array_.offset)
+        return unscaled.cast(pa.int64())
+
+    def __to_series(self, i, builder):
+        np = self._np
+        pd = self._pd
+        nullable = self.dtype_backend == 'numpy_nullable'
+        column_type = builder.column_type
+        n = len(builder)
+        has_nulls = 1 in builder.nulls
+        mask = np.frombuffer(builder.nulls, dtype=bool) if n else np.zeros(0, bool)
+        spec = _FETCH_ARRAYS.get(column_type)
+        if spec is not None:
+            data = (np.frombuffer(builder.values, dtype=spec[1]) if n
+                    else np.empty(0, dtype=spec[1]))
+            if nullable:
+                if spec[1] == 'bool':
+                    return pd.arrays.BooleanArray(data, mask.copy())
+                if spec[1].startswith('int'):
+                    return pd.arrays.IntegerArray(data, mask.copy())
+                return pd.arrays.FloatingArray(data, mask.copy())
+            if not has_nulls:
+                return data
+            if spec[1] == 'bool':
+                data = data.astype(object)
+                data[mask] = None
+            else:
+                data = data.astype('float64')
+                data[mask] = np.nan
+            return data
+        values = builder.values
+        if column_type in _FETCH_DATETIMES:
+            data = np.array(values, dtype=_FETCH_DATETIMES[column_type])
+            if column_type == mimerapi.MIMER_TYPE_DATE:
+                data = data.astype('datetime64[s]')
+            return data
+        if column_type == mimerapi.MIMER_TYPE_FLOAT:
+            data = np.array([np.nan if v is None else float(v) for v in values],
+                            dtype='float64')
+            if nullable:
+                data[mask] = 0
+                return pd.arrays.FloatingArray(data, mask.copy())
+            return data
+        if column_type in _DECIMAL_TYPES:
+            if self.decimal == 'float':
+                data = np.array(values, dtype='float64')
+                if nullable:
+                    data[mask] = 0
+                    return pd.arrays.FloatingArray(data, mask.copy())
+                return data
+            if self.decimal == 'scaled':
+                scale = self.scales.get(i)
+                data = np.array([0 if v is None else _scaled(v, scale)
+                                 for v in values], dtype='int64')
+                return pd.arrays.IntegerArray(data, mask.copy())
+            values = [None if v is None else Decimal(v) for v in values]
+        data = np.fromiter(values, dtype=object, count=n)
+        if nullable and column_type in _STRING_TYPES:
+            return pd.array(data, dtype='string')
+        return data
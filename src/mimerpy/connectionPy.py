@@ -23,6 +23,7 @@
 from . import mimerapi
 import weakref
 from .cursorPy import *
+from .statementcache import StatementCache, DEFAULT_SIZE as _STATEMENT_CACHE_SIZE
 from .mimPyExceptionHandler import *
 import sys
 import logging
@@ -145,13 +146,15 @@ class Connection:
 
     def __init__(self, dsn='', user='', password='',
                  autocommit=False, errorhandler=None, readonly=False,
-                 trace=None, trace_unsafe=None):
+                 trace=None, trace_unsafe=None,
+                 statement_cache_size=_STATEMENT_CACHE_SIZE):
         """
         Creates a database connection.
 
         Use the mimerpy.connect() function to create a connection rather than
         calling this function.
         """
+        self.statement_cache = StatementCache(statement_cache_size)
         self.autocommitmode = autocommit
         self.readonly = readonly
         self.errorhandler = (errorhandler if errorhandler
@@ -228,6 +231,7 @@ class Connection:
         if (not self._session == None):
             for cur in self.__cursors:
                 cur.close()
+            self.statement_cache.clear()
 
             if (self._transaction):
                 rc_value = mimerapi.mimerEndTransaction(self._session, 1)
@@ -274,14 +278,21 @@ class Connection:
             Returns a new Cursor Object using the connection.
             If scrollable is unspecified, the default cursor class
             will be returned. If scrollable = True a scrollable
-            cursor will be returned.
+            cursor will be returned. The scrollable cursor keeps the
+            result set on the server unless client_side = True, in which
+            case the whole result set is fetched when it is executed.
+            memory_limit sets how many bytes of a client side result set
+            are kept in memory before it is moved to a temporary file.
 
         """
         self.__check_if_open()
         kwargs2 = kwargs.copy()
         mode = kwargs2.pop('scrollable', False)
+        client_side = kwargs2.pop('client_side', False)
+        memory_limit = kwargs2.pop('memory_limit', MEMORY_LIMIT)
         if (mode):
-             curs = ScrollCursor(self, self._session)
+             curs = ScrollCursor(self, self._session, client_side,
+                                 memory_limit)
         else:
              curs = Cursor(self, self._session)
 
@@ -305,7 +316,7 @@ class Connection:
         curs.execute(*arg)
         return curs
 
-    def executemany(self, *arg):
+    def executemany(self, *arg, **kwargs):
         """
             Creates a cursor and executes a database operation.
 
@@ -320,7 +331,7 @@ class Connection:
         self.__check_if_open()
         curs = Cursor(self, self._session)
         self.__cursors.add(curs)
-        curs.executemany(*arg)
+        curs.executemany(*arg, **kwargs)
         return curs
 
     def _set_autocommit(self, mode):
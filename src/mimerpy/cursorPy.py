@@ -22,12 +22,25 @@
 
 from .mimPyExceptionHandler import *
 from . import mimerapi
-import collections, decimal, uuid, re
-from types import GeneratorType
+import collections, csv, decimal, itertools, uuid, re
 import uuid
 import string
 from datetime import date, time, datetime
 from mimerpy.utils import tolerant_fromiso_datetime, tolerant_fromiso_time
+from mimerpy.resultstore import ResultStore, MEMORY_LIMIT
+from mimerpy import columnar
+from mimerpy import delimited
+from mimerpy import jsonstream
+from mimerpy import resultset
+from time import perf_counter
+
+# Default number of parameter sets executed together by executemany
+EXECUTEMANY_BATCH_SIZE = 1000
+
+# Bounds and target duration of a batch when executemany adapts the size
+_ADAPTIVE_MIN_BATCH = 16
+_ADAPTIVE_MAX_BATCH = 65536
+_ADAPTIVE_TARGET_SECONDS = 0.2
     
 def _pythonSetDecimal(statement, cur_column, parameter):
     if parameter is None:
@@ -362,6 +375,85 @@ DATETIME_TYPE_CODES = _type_codes_for(
     _pythonGetTimestamp,
 )
 
+class _GetterError(Exception):
+    # Raised inside the row decoder when a getter returns an error code
+    pass
+
+def _make_row_decoder(statement, column_types):
+    """
+    Build the row decoder for a result set.
+
+    The getter for every column is looked up in get_funcs once, when the
+    result set is opened, instead of once per fetched cell. The returned
+    function decodes the current row of statement and returns (rc, row),
+    where rc is the first negative return code from any getter or 0.
+    The column types must all have an entry in get_funcs.
+    """
+    plan = tuple((get_funcs[column_type], cur_column)
+                 for cur_column, column_type in enumerate(column_types, 1))
+
+    def values():
+        for getter, cur_column in plan:
+            rc, value = getter(statement, cur_column)
+            if rc < 0:
+                raise _GetterError(rc)
+            yield value
+
+    def decode():
+        try:
+            return (0, tuple(values()))
+        except _GetterError as e:
+            return (e.args[0], None)
+
+    return decode
+
+def _pythonSetUnsupported(statement, col, val):
+    # Setter used for parameter types that have no entry in set_funcs
+    return mimerapi.MIMERPY_DATA_CONVERSION_ERROR
+
+class _AdaptiveBatchSize:
+    """
+    Batch size for executemany chosen from the observed time per row.
+
+    After every batch the size is set so that the next batch is expected
+    to take about _ADAPTIVE_TARGET_SECONDS, changing by at most a factor
+    of two at a time and staying between _ADAPTIVE_MIN_BATCH and
+    _ADAPTIVE_MAX_BATCH rows.
+    """
+    __slots__ = ('size',)
+
+    def __init__(self, size):
+        self.size = max(_ADAPTIVE_MIN_BATCH, min(size, _ADAPTIVE_MAX_BATCH))
+
+    def update(self, rows, seconds):
+        if seconds > 0:
+            size = int(rows * _ADAPTIVE_TARGET_SECONDS / seconds)
+        else:
+            size = 2 * self.size
+        size = max(self.size // 2, min(size, 2 * self.size))
+        self.size = max(_ADAPTIVE_MIN_BATCH, min(size, _ADAPTIVE_MAX_BATCH))
+        return self.size
+
+class _BindPlan:
+    """
+    Parameter layout of a prepared statement.
+
+    The setter for every parameter marker is looked up in set_funcs once,
+    when the statement is prepared, and the parameter names are read the
+    first time a mapping is bound. The plan is kept together with the
+    statement in the statement cache, so that reusing a cached statement
+    only has to bind the values.
+    """
+    __slots__ = ('count', 'types', 'setters', 'named')
+
+    def __init__(self, types, setters):
+        self.count = len(setters)
+        self.types = tuple(types)
+        # Tuple of (column, setter) pairs for sequence parameters
+        self.setters = tuple(enumerate(setters, 1))
+        # Tuple of (column, name, setter) for mapping parameters
+        self.named = None
+
 class Cursor:
     """
         MimerSQL Cursor.
@@ -370,6 +462,9 @@ class Cursor:
 
     """
 
+    # Option passed to mimerBeginStatement8 by execute
+    _statement_option = mimerapi.MIMER_FORWARD_ONLY
+
     def __init__(self, connection, session):
         """
             Creates a MimerPy cursor.
@@ -390,9 +485,13 @@ class Cursor:
         self._last_query = None
         self._DDL_rc_value = None
         self._column_type = []
+        self._row_decoder = None
 
         self.__session = session
         self.__statement = None
+        self.__statement_key = None
+        self.__statement_generation = None
+        self.__bind_plan = None
         self.__mimcursor = False
         self.lastrowid = None
 
@@ -466,7 +565,7 @@ class Cursor:
         # If same query is used twice there is not need for a new statement
         if (query != self._last_query or self.__mimcursor):
             self.__close_statement()
-            values = mimerapi.mimerBeginStatement8(self.__session, query, 0)
+            values = self.__begin_statement(query, self._statement_option)
             rc_value = values[0]
             self._DDL_rc_value = values[0]
 
@@ -481,54 +580,22 @@ class Cursor:
         # mimerBeginStatementC.
         if (self._DDL_rc_value == -24005):
             self.messages = []
+            # Prepared statements may refer to objects changed by the DDL
+            self.connection.statement_cache.clear()
             rc_value = mimerapi.mimerExecuteStatement8(self.__session, query)
             self.__check_mimerapi_error(rc_value, self.__session)
         else:
-            rc_value = mimerapi.mimerParameterCount(self.__statement)
-            self.__check_mimerapi_error(rc_value, self.__statement)
+            plan = self.__get_bind_plan()
 
-            # Return value of mimerParameterCount = 0 implies a query with no
-            # parameters.
-            if (rc_value > 0):
-                self._number_of_parameters = rc_value
+            # A plan without parameters implies a query with no parameters.
+            if (plan.count > 0):
+                self._number_of_parameters = plan.count
                 try:
 
                     if (len(parameter_markers) < self._number_of_parameters):
                         self.__raise_exception(-25013)
 
-                    # Column number starts a 1
-                    for cur_column in range(1, self._number_of_parameters + 1):
-                        parameter_type = mimerapi.mimerParameterType(
-                            self.__statement, cur_column)
-                        self.__check_mimerapi_error(
-                            parameter_type, self.__statement)
-
-                        if (isinstance(parameter_markers, dict)):
-                            rc_value, parameter_name = mimerapi.mimerParameterName8(
-                                self.__statement, cur_column)
-                            self.__check_mimerapi_error(
-                                rc_value, self.__statement)
-                            if parameter_name in parameter_markers:
-                                parameter = parameter_markers.get(
-                                    parameter_name)
-                                if (parameter == None):
-                                    parameter_type = mimerapi.MIMER_TYPE_NULL
-                                rc_value = set_funcs[parameter_type](
-                                    self.__statement, cur_column, parameter)
-                            else:
-                                # self.__raise_exception(-25012,str(parameter_name))
-                                pass  # Skipping keys in dictionary that does not match with any column
-                        else:
-                            # If the parameter marker is None, we use mimerSetNull
-                            try:
-                                if (parameter_markers[cur_column - 1] == None):
-                                    parameter_type = mimerapi.MIMER_TYPE_NULL
-                            except TypeError:
-                                # End up here when invalid parameters are used
-                                self.__raise_exception(-25013)
-                            rc_value = set_funcs[parameter_type](self.__statement,
-                                                                cur_column, parameter_markers[cur_column - 1])
-                        self.__check_mimerapi_error(rc_value, self.__statement)
+                    self.__bind_parameters(plan, parameter_markers)
 
                 # Catching error for errorhandler
                 except KeyError as e:
@@ -541,7 +608,6 @@ class Cursor:
                 except OverflowError as e:
                     self.__raise_exception(-25020, exception=e)
 
-            self.__check_mimerapi_error(rc_value, self.__statement)
             rc_value = mimerapi.mimerColumnCount(self.__statement)
 
             # Return value of mimerColumnCount <= 0 implies a query with no
@@ -576,6 +642,8 @@ class Cursor:
                     rc_value = mimerapi.mimerColumnType(
                         self.__statement, cur_column)
                     self.__check_mimerapi_error(rc_value, self.__statement)
+                    if rc_value not in get_funcs:
+                        self.__raise_exception(-25017, rc_value)
                     self._column_type.append(rc_value)
                     type_code = rc_value
                     self.description = self.description + (description(name=name,
@@ -585,8 +653,10 @@ class Cursor:
                                                                        precision=None,
                                                                        scale=None,
                                                                        null_ok=None),)
+                self._row_decoder = _make_row_decoder(self.__statement,
+                                                      self._column_type)
 
-    def executemany(self, query, params):
+    def executemany(self, query, params, batch_size=None, adaptive=False):
         """
             Executes a database operation.
 
@@ -594,10 +664,20 @@ class Cursor:
                 query with parameter markers to execute.
 
             params
-                sequence of parameters.
+                iterable of parameter sequences or mappings.
+
+            batch_size
+                number of parameter sets executed together, defaults to
+                EXECUTEMANY_BATCH_SIZE.
+
+            adaptive
+                if true, batch_size is only the size of the first batch and
+                the following sizes are chosen from the time each batch took.
 
             Executes a database operation against all parameter sequences or mappings
-            found in params.
+            found in params. params is consumed one batch at a time, so it may be
+            an iterator or a generator producing any number of parameter sets.
+            rowcount is the total number of rows affected by all batches.
 
         """
         self.__check_if_open()
@@ -609,91 +689,302 @@ class Cursor:
         self.lastrowid = None
 
         if self.connection._logger:
-            if isinstance(params, GeneratorType):
-                params = list(params)
             logged_query = query if self.connection._log_unsafe else _strip_sql_literals(query)
             row_count = len(params) if hasattr(params, '__len__') else '?'
             self.connection._logger.info(
                 "executemany: %s -- %s rows", logged_query, row_count)
 
-        if isinstance(params, GeneratorType):
-            tmp_params = []
-            for i in params:
-                tmp_params.append(i)
-            params = tmp_params
-
-        # I would like to look over this at some point
         # Checking for invalid parameter structure
-        if (not isinstance(params, tuple) and not isinstance(params, list)):
+        if (isinstance(params, (str, bytes, bytearray, dict))):
             self.__raise_exception(-25013)
-        # else:
-        #    if (not isinstance(params[0], tuple) and not isinstance(params[0], dict)):
-        #        self.__raise_exception(-25013)
+        try:
+            params = iter(params)
+        except TypeError:
+            self.__raise_exception(-25013)
+        if (batch_size is None):
+            batch_size = EXECUTEMANY_BATCH_SIZE
+        if (not isinstance(batch_size, int) or batch_size < 1):
+            self.__raise_exception(-25013)
+        sizer = _AdaptiveBatchSize(batch_size) if adaptive else None
+        if (sizer is not None):
+            batch_size = sizer.size
 
         self.__close_statement()
-        values = mimerapi.mimerBeginStatement8(self.__session, query, 0)
+        values = self.__begin_statement(query, mimerapi.MIMER_FORWARD_ONLY)
         rc_value = values[0]
 
         self.__check_mimerapi_error(rc_value, self.__session)
         self.__statement = values[1]
         self.__check_mimerapi_error(rc_value, self.__statement)
 
-        rc_value = mimerapi.mimerParameterCount(self.__statement)
-        self._number_of_parameters = rc_value
+        plan = self.__get_bind_plan()
+        self._number_of_parameters = plan.count
+        self.messages = []
+
+        try:
+            self.__execute_rows(plan, params, batch_size, sizer)
+        # Catching error for errorhandler
+        except KeyError as e:
+            self.__raise_exception(-25020, exception=e)
+        # Catching error for errorhandler
+        except TypeError as e:
+            self.__raise_exception(-25020, exception=e)
+        # Catching error for errorhandler
+        except OverflowError as e:
+            self.__raise_exception(-25020, exception=e)
+
+    def copy_from(self, file, table_or_insert_sql, format='csv', header=True,
+                  columns=None, null='', batch_size=None):
+        """
+            Insert rows read from a CSV or TSV text file.
+
+            file
+                text file-like object, opened with newline=''.
+            table_or_insert_sql
+                table name, or an INSERT or MERGE statement with one
+                parameter marker per field.
+            format
+                'csv' or 'tsv'.
+            header
+                if true, the first record holds column names, which are used
+                as the column list of the INSERT statement for a table.
+            columns
+                column names to insert into, instead of the header.
+            null
+                field text that stands for NULL, defaults to the empty string.
+            batch_size
+                number of rows executed together, defaults to
+                EXECUTEMANY_BATCH_SIZE.
+
+            The file is read one batch at a time, so memory use does not
+            depend on its size. A parser is chosen once for every parameter
+            from its type. Returns the number of rows inserted, which is also
+            stored in rowcount.
+
+        """
+        self.__check_if_open()
+        self.__check_for_transaction()
+        self._last_query = None
+        self.rowcount = 0
+        self.lastrowid = None
+        if (format not in delimited.DIALECTS):
+            self.__raise_exception(-25013)
+        if (batch_size is None):
+            batch_size = EXECUTEMANY_BATCH_SIZE
+        if (not isinstance(batch_size, int) or batch_size < 1):
+            self.__raise_exception(-25013)
+
+        reader = csv.reader(file, delimited.DIALECTS[format])
+        records = reader
+        names = next(reader, None) if header else None
+        if (columns is not None):
+            names = list(columns)
+        query = table_or_insert_sql.strip()
+        if (not re.match(r'(?i)(insert|merge)\b', query)):
+            if (names is not None):
+                count = len(names)
+            else:
+                first = next(reader, None)
+                if (first is None):
+                    return 0
+                count = len(first)
+                records = itertools.chain((first,), reader)
+            query = delimited.insert_statement(query, names, count)
+
+        if self.connection._logger:
+            logged_query = query if self.connection._log_unsafe else _strip_sql_literals(query)
+            self.connection._logger.info("copy_from: %s", logged_query)
+
+        self.__close_statement()
+        values = self.__begin_statement(query, mimerapi.MIMER_FORWARD_ONLY)
+        rc_value = values[0]
+        self.__check_mimerapi_error(rc_value, self.__session)
+        self.__statement = values[1]
         self.__check_mimerapi_error(rc_value, self.__statement)
 
+        plan = self.__get_bind_plan()
+        self._number_of_parameters = plan.count
+        self.messages = []
+        parsers = [delimited.parser(t) for t in plan.types]
+        rows = delimited.parse_records(records, parsers, null, reader)
         try:
-            for laps in range(0, len(params)):
-                cur_param = params[laps]
+            self.__execute_rows(plan, rows, batch_size)
+        except (ValueError, TypeError, OverflowError, csv.Error) as e:
+            self.__raise_exception(-25020, exception=e)
+        return self.rowcount
 
-                # Column number starts a 1
-                for cur_column in range(1, self._number_of_parameters + 1):
-                    parameter_type = mimerapi.mimerParameterType(
-                        self.__statement, cur_column)
-                    self.__check_mimerapi_error(
-                        parameter_type, self.__statement)
-
-                    if (isinstance(cur_param, dict)):
-                        rc_value, parameter_name = mimerapi.mimerParameterName8(
-                            self.__statement, cur_column)
-                        self.__check_mimerapi_error(rc_value, self.__statement)
-                        if parameter_name in cur_param:
-                            parameter = cur_param.get(parameter_name)
-                            if (parameter == None):
-                                parameter_type = mimerapi.MIMER_TYPE_NULL
-                            rc_value = set_funcs[parameter_type](
-                                self.__statement, cur_column, parameter)
-                        else:
-                            #self.__raise_exception(-25012, str(parameter_name))
-                            pass  # Skipping keys in dictionary that does not match with any column
-                    else:
-                        # If the parameter marker is None, we use mimerSetNull
-                        try:
-                            if (cur_param[cur_column - 1] == None):
-                                parameter_type = mimerapi.MIMER_TYPE_NULL
-                        except TypeError as e:
-                            # End up here when invalid parameters are used
-                            self.__raise_exception(-25013)
-                        rc_value = set_funcs[parameter_type](self.__statement,
-                                                             cur_column, cur_param[cur_column - 1])
-                self.messages = []
+    def copy_to(self, file, query, params=None, format='csv', header=True,
+                null='', chunk_rows=delimited.CHUNK_ROWS):
+        """
+            Write the result of a query to a CSV or TSV text file.
 
-                # Batching after all parameters are set
-                if (laps != len(params) - 1):
-                    rc_value = mimerapi.mimerAddBatch(self.__statement)
-                    self.__check_mimerapi_error(rc_value, self.__statement)
-                self.rowcount = self.rowcount + rc_value
+            file
+                text file-like object, opened with newline=''.
+            query
+                query to execute.
+            params
+                parameters of the query, as for execute.
+            format
+                'csv' or 'tsv'.
+            header
+                if true, the column names are written as the first record.
+            null
+                text written for NULL, defaults to the empty string.
+            chunk_rows
+                number of rows fetched and written at a time.
+
+            DECIMAL, DATE, TIME and TIMESTAMP values are written in the
+            string form returned by the database, binary values as hex.
+            Only one chunk of rows is held in memory. Returns the number of
+            rows written.
 
-            rc_value = mimerapi.mimerExecute(self.__statement)
-            self.__check_mimerapi_error(rc_value, self.__statement)
+        """
+        if (format not in delimited.DIALECTS):
+            self.__raise_exception(-25013)
+        if (not isinstance(chunk_rows, int) or chunk_rows < 1):
+            self.__raise_exception(-25013)
+        if (params is None):
+            self.execute(query)
+        else:
+            self.execute(query, params)
+        if (not self.__mimcursor):
+            self.__raise_exception(-25014)
+        writer = csv.writer(file, delimited.DIALECTS[format])
+        if (header):
+            writer.writerow([d.name for d in self.description])
+        rows = 0
+        while True:
+            columns = delimited.new_columns(self._column_type, null)
+            count = self._fill_columns(columns, chunk_rows)
+            writer.writerows(zip(*[column.values for column in columns]))
+            rows += count
+            if (count < chunk_rows):
+                return rows
+            self.__check_if_open()
+            self.__check_for_transaction()
+
+    def executemany_columns(self, query, columns, batch_size=None):
+        """
+            Executes a database operation with column-oriented parameters.
 
-        # Catching error for errorhandler
+            query
+                query with parameter markers to execute.
+
+            columns
+                one column of values per parameter marker, see below.
+
+            batch_size
+                number of rows executed together, defaults to
+                EXECUTEMANY_BATCH_SIZE.
+
+            Executes a database operation once for every row of columns.
+            columns is a sequence of columns in parameter order, a
+            pyarrow Table or RecordBatch, a pandas DataFrame, or a mapping
+            from parameter names to columns. A column is a NumPy array, where
+            masked arrays mark NULL values, a pyarrow Array, a pandas Series
+            or any sequence. NumPy is required.
+
+            Columns bound to integer, floating point, boolean and character
+            parameters are checked for range, NaN and infinity once per
+            column and bound without converting each value separately.
+
+        """
+        self.__check_if_open()
+        self.__check_for_transaction()
+        self._last_query = None
+        self.rowcount = 0
+        self.lastrowid = None
+
+        if (batch_size is None):
+            batch_size = EXECUTEMANY_BATCH_SIZE
+        if (not isinstance(batch_size, int) or batch_size < 1):
+            self.__raise_exception(-25013)
+        try:
+            columns_in = columnar.as_columns(columns)
         except TypeError as e:
+            self.__raise_exception(-25013, exception=e)
+        rows = len(columns_in[0][1]) if columns_in else 0
+        if (any(len(values) != rows for _, values, _ in columns_in)):
+            self.__raise_exception(-25013)
+
+        if self.connection._logger:
+            logged_query = query if self.connection._log_unsafe else _strip_sql_literals(query)
+            self.connection._logger.info(
+                "executemany_columns: %s -- %s rows", logged_query, rows)
+
+        self.__close_statement()
+        values = self.__begin_statement(query, mimerapi.MIMER_FORWARD_ONLY)
+        rc_value = values[0]
+        self.__check_mimerapi_error(rc_value, self.__session)
+        self.__statement = values[1]
+
+        plan = self.__get_bind_plan()
+        self._number_of_parameters = plan.count
+        self.messages = []
+
+        if (isinstance(columns, dict)):
+            by_name = {name: (values, mask) for name, values, mask in columns_in}
+            selected = []
+            for cur_column, parameter_name, setter in self.__parameter_names(plan):
+                if parameter_name not in by_name:
+                    self.__raise_exception(-25013)
+                selected.append(by_name[parameter_name])
+        else:
+            if (len(columns_in) < plan.count):
+                self.__raise_exception(-25013)
+            selected = [(values, mask) for _, values, mask in columns_in]
+
+        bindings = []
+        try:
+            for (cur_column, setter), parameter_type, (values, mask) in zip(
+                    plan.setters, plan.types, selected):
+                bindings.append((cur_column,) + columnar.column_binding(
+                    parameter_type, values, mask, setter))
+        # Catching error for errorhandler
+        except (ValueError, OverflowError) as e:
             self.__raise_exception(-25020, exception=e)
+
+        try:
+            for start in range(0, rows, batch_size):
+                stop = min(start + batch_size, rows)
+                rc_value = mimerapi.mimerExecuteColumns(self.__statement,
+                                                        bindings, start, stop)
+                self.__check_mimerapi_error(rc_value, self.__statement)
+                self.rowcount = self.rowcount + rc_value
         # Catching error for errorhandler
-        except OverflowError as e:
+        except (TypeError, ValueError, OverflowError) as e:
             self.__raise_exception(-25020, exception=e)
 
+    def __execute_rows(self, plan, params, batch_size, sizer=None):
+        # Private method binding the parameter sets of params to the current
+        # statement and executing them in batches of batch_size.
+        pending = 0
+        started = perf_counter()
+        for cur_param in params:
+            # Batching the previous parameters before setting new ones
+            if (pending > 0):
+                rc_value = mimerapi.mimerAddBatch(self.__statement)
+                self.__check_mimerapi_error(rc_value, self.__statement)
+            self.__bind_parameters(plan, cur_param)
+            pending += 1
+
+            if (pending == batch_size):
+                self.__execute_batch()
+                if (sizer is not None):
+                    batch_size = sizer.update(pending,
+                                              perf_counter() - started)
+                    started = perf_counter()
+                pending = 0
+
+        if (pending > 0):
+            self.__execute_batch()
+
+    def __execute_batch(self):
+        # Private method executing the parameter sets batched by executemany
+        rc_value = mimerapi.mimerExecute(self.__statement)
+        self.__check_mimerapi_error(rc_value, self.__statement)
+        self.rowcount = self.rowcount + rc_value
+
     def fetchone(self):
         """
             Fetch next row of a query result set.
@@ -710,28 +1001,7 @@ class Cursor:
         if (not self.__mimcursor):
             self.__raise_exception(-25014)
 
-        rc_value = mimerapi.mimerFetch(self.__statement)
-        self.__check_mimerapi_error(rc_value, self.__statement)
-        return_tuple = ()
-
-        # Return value of mimerFetch == 100 implies end of result set
-        if (rc_value == 100):
-            return None
-
-        for cur_column in range(1, self._number_of_columns + 1):
-            func_tuple = get_funcs[self._column_type[cur_column - 1]
-                                   ](self.__statement, cur_column)
-            self.__check_mimerapi_error(func_tuple[0], self.__statement)
-
-            # Conversion from C int to Python boolean
-            if (rc_value == 42 and not func_tuple[1] == None):
-                if (func_tuple[1] == 0):
-                    return_tuple = return_tuple + (False,)
-                else:
-                    return_tuple = return_tuple + (True,)
-            else:
-                return_tuple = return_tuple + (func_tuple[1],)
-        return return_tuple
+        return self.__fetch_row()
 
     def fetchmany(self, *arg):
         """Fetch next row of a query result set.
@@ -748,7 +1018,6 @@ class Cursor:
 
         """
         values = []
-        return_tuple = ()
 
         self.__check_if_open()
         self.__check_for_transaction()
@@ -761,35 +1030,15 @@ class Cursor:
             self.arraysize = arg[0]
 
         fetch_length = self.arraysize
-        rc_value = mimerapi.mimerFetch(self.__statement)
-        fetch_value = rc_value
-
-        while (fetch_value != 100 and fetch_length > 0):
-            self.__check_mimerapi_error(fetch_value, self.__statement)
-            return_tuple = ()
-
-            # Column number starts a 1
-            for cur_column in range(1, self._number_of_columns + 1):
-                func_tuple = get_funcs[self._column_type[cur_column - 1]
-                                       ](self.__statement, cur_column)
-                self.__check_mimerapi_error(func_tuple[0], self.__statement)
-
-                # Conversion from C int to Python boolean
-                if (rc_value == 42 and not func_tuple[1] == None):
-                    if (func_tuple[1] == 0):
-                        return_tuple = return_tuple + (False,)
-                    else:
-                        return_tuple = return_tuple + (True,)
-                else:
-                    return_tuple = return_tuple + (func_tuple[1],)
-
-            values.append(return_tuple)
+        while (fetch_length > 0):
+            row = self.__fetch_row()
+            if (row is None):
+                break
+            values.append(row)
             fetch_length = fetch_length - 1
-            if(fetch_length > 0):
-                fetch_value = mimerapi.mimerFetch(self.__statement)
         return values
 
-    def fetchall(self):
+    def fetchall(self, columnar=False):
         """
             Fetch all (remaining) row of a query result set.
 
@@ -798,37 +1047,404 @@ class Cursor:
             the previous call to execute did not produce a result set,
             a ProgrammingError is raised.
 
+            If columnar is True, the rows are returned as a ResultSet,
+            which stores each column in a compact typed buffer and builds
+            the row tuples when they are read.
+
         """
         self.__check_if_open()
         self.__check_for_transaction()
         if (not self.__mimcursor):
             self.__raise_exception(-25014)
+        if (columnar):
+            return self._fetch_result_set()
         values = []
-        rc_value = mimerapi.mimerFetch(self.__statement)
-        fetch_value = rc_value
+        statement = self.__statement
+        decode = self._row_decoder
+        fetch = mimerapi.mimerFetch
 
+        fetch_value = fetch(statement)
         while (fetch_value != 100):
-            self.__check_mimerapi_error(fetch_value, self.__statement)
-            return_tuple = ()
-
-            # Column number starts a 1
-            for cur_column in range(1, self._number_of_columns + 1):
-                func_tuple = get_funcs[self._column_type[cur_column - 1]
-                                       ](self.__statement, cur_column)
-                self.__check_mimerapi_error(func_tuple[0], self.__statement)
-
-                # Conversion from C int to Python boolean
-                if (rc_value == 42 and not func_tuple[1] == None):
-                    if (func_tuple[1] == 0):
-                        return_tuple = return_tuple + (False,)
-                    else:
-                        return_tuple = return_tuple + (True,)
-                else:
-                    return_tuple = return_tuple + (func_tuple[1],)
-            values.append(return_tuple)
-            fetch_value = mimerapi.mimerFetch(self.__statement)
+            self.__check_mimerapi_error(fetch_value, statement)
+            rc_value, row = decode()
+            self.__check_mimerapi_error(rc_value, statement)
+            values.append(row)
+            fetch_value = fetch(statement)
         return values
 
+    def _fetch_result_set(self):
+        # Fetch the remaining rows into a columnar ResultSet.
+        columns = resultset.new_columns(self._column_type)
+        self._fill_columns(columns, None)
+        return resultset.ResultSet([d.name for d in self.description], columns)
+
+    def stream_json(self, fp, format='jsonl', row_format='object',
+                    ensure_ascii=True, chunk_rows=jsonstream.CHUNK_ROWS):
+        """
+            Write the remaining rows of a result set to fp as JSON.
+
+            fp
+                text or binary file-like object, binary streams receive UTF-8.
+            format
+                'jsonl' for one row per line or 'array' for a JSON array.
+            row_format
+                'object' for a JSON object per row keyed by column name or
+                'array' for a JSON array per row.
+            ensure_ascii
+                escape all non-ASCII characters, as json.dumps does.
+            chunk_rows
+                number of rows encoded and written at a time.
+
+            Values are encoded straight from the fetched column values with
+            an encoder chosen per column. DECIMAL values are written as JSON
+            numbers and DATE, TIME and TIMESTAMP values as strings, both
+            taken from their string form without building Decimal or
+            datetime objects. Binary values are written as base64 strings.
+            Returns the number of rows written.
+
+        """
+        self.__check_if_open()
+        self.__check_for_transaction()
+        if (not self.__mimcursor):
+            self.__raise_exception(-25014)
+        if (format not in jsonstream.FORMATS or
+                row_format not in jsonstream.ROW_FORMATS):
+            self.__raise_exception(-25013)
+        if (not isinstance(chunk_rows, int) or chunk_rows < 1):
+            self.__raise_exception(-25013)
+        names = columnar.unique_names([d.name for d in self.description])
+        writer = jsonstream.JSONWriter(fp, names, self._column_type, format,
+                                       row_format, ensure_ascii)
+        while True:
+            columns = writer.new_columns()
+            count = self._fill_columns(columns, chunk_rows)
+            writer.write(columns)
+            if (count < chunk_rows):
+                break
+            self.__check_if_open()
+            self.__check_for_transaction()
+        writer.close()
+        return writer.rows
+
+    def fetch_columns(self, size=None):
+        """
+            Fetch the remaining rows of a result set column by column.
+
+            size
+                maximum number of rows to fetch, defaults to all remaining rows.
+
+            Returns a dict mapping column names to NumPy masked arrays, masked
+            where the value is NULL. Native integer and floating point columns
+            are returned as int32, int64, float32 or float64 arrays, BOOLEAN as
+            bool, DATE and TIMESTAMP as datetime64 and all other columns as
+            object arrays. Empty and duplicate column names are made unique.
+            NumPy is required.
+
+        """
+        names, builders = self.__fetch_builders(size)
+        return dict(zip(names, [b.to_masked_array() for b in builders]))
+
+    def fetchnumpy(self, size=None):
+        """
+            Fetch the remaining rows of a result set as a NumPy array.
+
+            size
+                maximum number of rows to fetch, defaults to all remaining rows.
+
+            Returns a structured NumPy masked array with one field per
+            column, typed and named as by fetch_columns. NumPy is required.
+
+        """
+        names, builders = self.__fetch_builders(size)
+        return columnar.to_structured(names,
+                                      [b.to_masked_array() for b in builders])
+
+    def fetch_arrow_batches(self, rows_per_batch=columnar.ARROW_BATCH_ROWS):
+        """
+            Iterate over the remaining rows of a result set as Arrow batches.
+
+            rows_per_batch
+                number of rows per batch, defaults to 65536.
+
+            Returns an iterator yielding pyarrow RecordBatches of at most
+            rows_per_batch rows, all with the same schema. Only one batch is
+            built at a time and native integer, floating point and boolean
+            columns are handed to Arrow without copying. DECIMAL columns are
+            typed decimal128 with the declared scale of the column, which is
+            learnt from the first value that is not NULL, so batches are
+            held back while a DECIMAL column has only had NULLs. FLOAT
+            columns are typed float64. pyarrow is required.
+
+        """
+        builder = self.__arrow_builder(rows_per_batch)
+        return self.__arrow_batches(builder, rows_per_batch)
+
+    def fetch_arrow_table(self, rows_per_batch=columnar.ARROW_BATCH_ROWS):
+        """
+            Fetch the remaining rows of a result set as an Arrow table.
+
+            rows_per_batch
+                number of rows per record batch, defaults to 65536.
+
+            Returns a pyarrow Table made of the batches yielded by
+            fetch_arrow_batches. pyarrow is required.
+
+        """
+        builder = self.__arrow_builder(rows_per_batch)
+        batches = list(self.__arrow_batches(builder, rows_per_batch))
+        return builder._pa.Table.from_batches(batches,
+                                              schema=builder.empty_schema())
+
+    def export_parquet(self, path,
+                       row_group_size=columnar.PARQUET_ROW_GROUP_ROWS,
+                       max_file_size=None, partition_by=None,
+                       compression='snappy'):
+        """
+            Write the remaining rows of a result set to Parquet files.
+
+            path
+                directory the files are written to, created if missing.
+            row_group_size
+                number of rows per row group, defaults to 131072.
+            max_file_size
+                size in bytes after which a new file is started, defaults to
+                one file per directory.
+            partition_by
+                column name or list of column names. Rows are written to
+                Hive style column=value subdirectories of path.
+            compression
+                Parquet compression codec, for example 'snappy', 'zstd',
+                'gzip' or 'none'.
+
+            The rows are fetched with fetch_arrow_batches and written as
+            they arrive, so memory use is bounded by the row group size
+            whatever the size of the result set. Returns a list of the
+            files written. pyarrow is required.
+
+        """
+        if (not isinstance(row_group_size, int) or row_group_size < 1):
+            self.__raise_exception(-25013)
+        if (max_file_size is not None and
+                (not isinstance(max_file_size, int) or max_file_size < 1)):
+            self.__raise_exception(-25013)
+        rows_per_batch = min(row_group_size, columnar.ARROW_BATCH_ROWS)
+        builder = self.__arrow_builder(rows_per_batch)
+        if (isinstance(partition_by, str)):
+            partition_by = [partition_by]
+        if (partition_by is not None and
+                any(name not in builder.names for name in partition_by)):
+            self.__raise_exception(-25013)
+        exporter = columnar.ParquetExporter(path, row_group_size,
+                                            max_file_size, partition_by,
+                                            compression)
+        try:
+            for batch in self.__arrow_batches(builder, rows_per_batch):
+                exporter.write(batch)
+        finally:
+            files = exporter.close(builder.empty_schema())
+        return files
+
+    def fetch_dataframe(self, chunksize=None, dtype_backend=None,
+                        decimal='object'):
+        """
+            Fetch the remaining rows of a result set as a pandas DataFrame.
+
+            chunksize
+                if given, an iterator yielding DataFrames of at most
+                chunksize rows is returned instead of one DataFrame.
+            dtype_backend
+                None for NumPy dtypes, 'numpy_nullable' for the pandas
+                masked extension dtypes or 'pyarrow' for ArrowDtype columns.
+            decimal
+                'object' for Decimal objects, 'float' for float64 or 'scaled'
+                for Int64 holding the value times 10**scale.
+
+            Values are decoded straight into typed column buffers, and DATE
+            and TIMESTAMP columns are converted to datetime64 a column at a
+            time rather than parsed value by value. With decimal 'scaled',
+            the declared scale of each DECIMAL column is stored in
+            DataFrame.attrs['decimal_scale']. It is learnt from the first
+            value that is not NULL, so chunks are held back while a DECIMAL
+            column has only had NULLs. pandas is required.
+
+        """
+        self.__check_if_open()
+        self.__check_for_transaction()
+        if (not self.__mimcursor):
+            self.__raise_exception(-25014)
+        if (chunksize is not None and
+                (not isinstance(chunksize, int) or chunksize < 1)):
+            self.__raise_exception(-25013)
+        if (dtype_backend not in columnar.DTYPE_BACKENDS or
+                decimal not in columnar.DECIMAL_MODES):
+            self.__raise_exception(-25013)
+        names = columnar.unique_names([d.name for d in self.description])
+        builder = columnar.DataFrameBuilder(names, self._column_type,
+                                            dtype_backend, decimal)
+        if (chunksize is not None):
+            return self.__dataframe_chunks(builder, chunksize)
+        columns = builder.new_columns()
+        self._fill_columns(columns, None)
+        return self.__to_frame(builder, columns)
+
+    def __dataframe_chunks(self, builder, chunksize):
+        # Private generator behind fetch_dataframe with a chunksize.
+        while True:
+            self.__check_if_open()
+            self.__check_for_transaction()
+            columns = builder.new_columns()
+            count = self._fill_columns(columns, chunksize)
+            if (count > 0):
+                yield from self.__convert(builder.add, columns)
+            if (count < chunksize):
+                yield from self.__convert(builder.finish)
+                return
+
+    def __to_frame(self, builder, columns):
+        # Private method converting all rows to one DataFrame.
+        return self.__convert(builder.to_frame, columns)
+
+    def __convert(self, convert, *args):
+        # Private method calling a builder conversion, raising DataError for
+        # DECIMAL values that do not fit the requested representation.
+        try:
+            return convert(*args)
+        except (ValueError, OverflowError):
+            self.__raise_exception(-25020)
+
+    def __arrow_builder(self, rows_per_batch):
+        # Private method checking the cursor state and returning an
+        # ArrowBatchBuilder for the current result set.
+        self.__check_if_open()
+        self.__check_for_transaction()
+        if (not self.__mimcursor):
+            self.__raise_exception(-25014)
+        if (not isinstance(rows_per_batch, int) or rows_per_batch < 1):
+            self.__raise_exception(-25013)
+        names = columnar.unique_names([d.name for d in self.description])
+        return columnar.ArrowBatchBuilder(names, self._column_type)
+
+    def __arrow_batches(self, builder, rows_per_batch):
+        # Private generator behind fetch_arrow_batches.
+        while True:
+            self.__check_if_open()
+            self.__check_for_transaction()
+            columns = builder.new_columns()
+            count = self._fill_columns(columns, rows_per_batch)
+            if (count > 0):
+                yield from self.__convert(builder.add, columns)
+            if (count < rows_per_batch):
+                yield from self.__convert(builder.finish)
+                return
+
+    def __fetch_builders(self, size):
+        # Private method fetching up to size rows into one column builder
+        # per column. Returns the unique column names and the builders.
+        self.__check_if_open()
+        self.__check_for_transaction()
+        if (not self.__mimcursor):
+            self.__raise_exception(-25014)
+        if (size is not None and (not isinstance(size, int) or size < 0)):
+            self.__raise_exception(-25013)
+        columnar.import_numpy()
+        builders = [columnar.ColumnBuilder(t) for t in self._column_type]
+        self._fill_columns(builders, size)
+        names = columnar.unique_names([d.name for d in self.description])
+        return (names, builders)
+
+    def iter_batches(self, size=None):
+        """
+            Iterate over the remaining rows of a result set in batches.
+
+            size
+                number of rows per batch, defaults to arraysize.
+
+            Returns an iterator yielding lists of at most size rows. The
+            cursor state is checked once per batch instead of once per row
+            and only one batch is held in memory at a time. The same list
+            object is reused for every batch, copy it if the rows are needed
+            after the next batch has been requested.
+
+        """
+        self.__check_if_open()
+        self.__check_for_transaction()
+        if (not self.__mimcursor):
+            self.__raise_exception(-25014)
+        if (size is None):
+            size = self.arraysize
+        if (not isinstance(size, int) or size < 1):
+            self.__raise_exception(-25013)
+        return self.__batches(size)
+
+    def iter_rows(self, size=None):
+        """
+            Iterate over the remaining rows of a result set.
+
+            size
+                number of rows fetched per batch, defaults to arraysize.
+
+            Returns a generator yielding one row at a time. The rows are
+            fetched in batches using iter_batches, so up to size rows may be
+            read from the result set ahead of the row being processed.
+
+        """
+        batches = self.iter_batches(size)
+        return (row for batch in batches for row in batch)
+
+    def __batches(self, size):
+        # Private generator behind iter_batches.
+        batch = []
+        while True:
+            self.__check_if_open()
+            self.__check_for_transaction()
+            del batch[:]
+            self._fill_batch(batch, size)
+            count = len(batch)
+            if (count == 0):
+                return
+            yield batch
+            if (count < size):
+                return
+
+    def _fill_batch(self, batch, size):
+        # Append up to size rows from the result set to batch.
+        statement = self.__statement
+        decode = self._row_decoder
+        fetch = mimerapi.mimerFetch
+        append = batch.append
+        for _ in range(size):
+            rc_value = fetch(statement)
+            if (rc_value == 100):
+                break
+            self.__check_mimerapi_error(rc_value, statement)
+            rc_value, row = decode()
+            self.__check_mimerapi_error(rc_value, statement)
+            append(row)
+
+    def _fill_columns(self, columns, size):
+        # Append up to size rows, or all remaining rows if size is None, to
+        # the column builders in columns, one cell at a time. Returns the
+        # number of rows added.
+        statement = self.__statement
+        fetch = mimerapi.mimerFetch
+        plan = tuple((builder.getter or get_funcs[column_type], cur_column,
+                      builder.append)
+                     for cur_column, (column_type, builder) in enumerate(
+                         zip(self._column_type, columns), 1))
+        rows = 0
+        while (size is None or rows < size):
+            rc_value = fetch(statement)
+            if (rc_value == 100):
+                break
+            self.__check_mimerapi_error(rc_value, statement)
+            for getter, cur_column, append in plan:
+                rc_value, value = getter(statement, cur_column)
+                if (rc_value < 0):
+                    self.__check_mimerapi_error(rc_value, statement)
+                append(value)
+            rows += 1
+        return rows
+
     def setinputsizes(self, sizes):
         """Does nothing but required by the DB API."""
 
@@ -848,15 +1464,120 @@ class Cursor:
         else:
             raise StopIteration
 
+    def __fetch_row(self):
+        # Private method fetching and decoding the next row, None at end of set.
+        rc_value = mimerapi.mimerFetch(self.__statement)
+        self.__check_mimerapi_error(rc_value, self.__statement)
+
+        # Return value of mimerFetch == 100 implies end of result set
+        if (rc_value == 100):
+            return None
+        rc_value, row = self._row_decoder()
+        self.__check_mimerapi_error(rc_value, self.__statement)
+        return row
+
+    def __begin_statement(self, query, option):
+        # Private method preparing a statement, reusing an idle one from the
+        # connection's statement cache when possible. Returns the same
+        # (rc, statement) tuple as mimerBeginStatement8.
+        cache = self.connection.statement_cache
+        key = (query, option)
+        self.__statement_generation = cache.generation
+        entry = cache.checkout(key)
+        if (entry is not None):
+            self.__statement_key = key
+            statement, self.__bind_plan = entry
+            return (0, statement)
+        values = mimerapi.mimerBeginStatement8(self.__session, query, option)
+        self.__statement_key = key if (values[0] == 0 and values[1]) else None
+        return values
+
     def __close_statement(self):
-        # Private method for closing MimerStatement.
+        # Private method for closing MimerStatement. Statements prepared
+        # through the statement cache are returned to it instead of ended.
         if (self.__statement is not None and
                 self.connection._session is not None):
-            rc_value = mimerapi.mimerEndStatement(self.__statement)
-            self.__check_mimerapi_error(rc_value, self.__statement)
+            key = self.__statement_key
+            if (key is not None and self.__mimcursor):
+                if (mimerapi.mimerCloseCursor(self.__statement) < 0):
+                    key = None
+            if (key is not None):
+                self.connection.statement_cache.checkin(
+                    key, self.__statement, self.__bind_plan,
+                    self.__statement_generation)
+            else:
+                rc_value = mimerapi.mimerEndStatement(self.__statement)
+                self.__check_mimerapi_error(rc_value, self.__statement)
         self.__statement = None
+        self.__statement_key = None
+        self.__statement_generation = None
+        self.__bind_plan = None
         self.__mimcursor = False
 
+    def __get_bind_plan(self):
+        # Private method returning the bind plan of the current statement,
+        # reading the parameter types the first time it is used.
+        if (self.__bind_plan is None):
+            statement = self.__statement
+            rc_value = mimerapi.mimerParameterCount(statement)
+            self.__check_mimerapi_error(rc_value, statement)
+            types = []
+            setters = []
+            # Column number starts a 1
+            for cur_column in range(1, rc_value + 1):
+                parameter_type = mimerapi.mimerParameterType(statement,
+                                                             cur_column)
+                self.__check_mimerapi_error(parameter_type, statement)
+                types.append(parameter_type)
+                setters.append(set_funcs.get(parameter_type,
+                                             _pythonSetUnsupported))
+            self.__bind_plan = _BindPlan(types, setters)
+        return self.__bind_plan
+
+    def __parameter_names(self, plan):
+        # Private method returning (column, name, setter) for every
+        # parameter of the current statement.
+        if (plan.named is None):
+            named = []
+            for cur_column, setter in plan.setters:
+                rc_value, parameter_name = mimerapi.mimerParameterName8(
+                    self.__statement, cur_column)
+                self.__check_mimerapi_error(rc_value, self.__statement)
+                named.append((cur_column, parameter_name, setter))
+            plan.named = tuple(named)
+        return plan.named
+
+    def __bind_parameters(self, plan, parameters):
+        # Private method setting the parameters of the current statement
+        # from a sequence or a mapping. Returns the last return code.
+        statement = self.__statement
+        set_null = set_funcs[mimerapi.MIMER_TYPE_NULL]
+        rc_value = 0
+        if (isinstance(parameters, dict)):
+            for cur_column, parameter_name, setter in self.__parameter_names(plan):
+                # Skipping keys in dictionary that does not match with any column
+                if parameter_name in parameters:
+                    parameter = parameters[parameter_name]
+                    if (parameter is None):
+                        setter = set_null
+                    rc_value = setter(statement, cur_column, parameter)
+                    self.__check_mimerapi_error(rc_value, statement)
+            return rc_value
+
+        try:
+            if (len(parameters) < plan.count):
+                self.__raise_exception(-25013)
+        except TypeError:
+            # End up here when invalid parameters are used
+            self.__raise_exception(-25013)
+        for (cur_column, setter), parameter in zip(plan.setters, parameters):
+            # If the parameter marker is None, we use mimerSetNull
+            if (parameter is None):
+                setter = set_null
+            rc_value = setter(statement, cur_column, parameter)
+            self.__check_mimerapi_error(rc_value, statement)
+        return rc_value
+
     def __check_if_open(self):
         if (self.__session == None):
             self.__raise_exception(-25015)
@@ -881,6 +1602,10 @@ class Cursor:
 
     def __check_mimerapi_error(self, rc, handle):
         if rc < 0:
+            # A statement that reported an error is not given back to the
+            # statement cache.
+            if (handle == self.__statement):
+                self.__statement_key = None
             (ec, ev) = get_mimerapi_exception(rc, handle)
             self.errorhandler(None, self, ec, ev)
 
@@ -983,6 +1708,8 @@ class Cursor:
                 name = func_tuple[1]
                 rc_value = mimerapi.mimerColumnType(self.__statement, cur_column)
                 self.__check_mimerapi_error(rc_value, self.__statement)
+                if rc_value not in get_funcs:
+                    self.__raise_exception(-25017, rc_value)
                 self._column_type.append(rc_value)
                 type_code = rc_value
                 self.description = self.description + (description(name=name,
@@ -992,6 +1719,8 @@ class Cursor:
                                                                    precision=None,
                                                                    scale=None,
                                                                    null_ok=None),)
+            self._row_decoder = _make_row_decoder(self.__statement,
+                                                  self._column_type)
 
         return result_params
 
@@ -1002,14 +1731,42 @@ class ScrollCursor(Cursor):
         Subclass to the Cursor-class where the cursor can be scrolled to
         new positions in the result set.
 
+        By default the result set is kept in a scrollable cursor on the
+        server and rows are fetched when they are requested. rowcount is
+        counted on the server the first time it is read or a scroll needs
+        it. With client_side=True the whole result set is fetched to the client
+        when the statement is executed and kept in a ResultStore, which
+        moves it to a temporary file when it grows past memory_limit bytes.
+
     """
 
-    def __init__(self, connection, session):
+    # Number of rows read per batch when a client side result set is stored
+    _STORE_BATCH = 1000
+
+    def __init__(self, connection, session, client_side=False,
+                 memory_limit=MEMORY_LIMIT):
         super(ScrollCursor, self).__init__(connection, session)
+        self.__client_side = client_side
+        self.__memory_limit = memory_limit
+        if (not client_side):
+            self._statement_option = mimerapi.MIMER_SCROLLABLE
         self.__result_set = None
+        self.__scrollable = False
+        self.__position = 0
         self.rownumber = None
         self.lastrowid = None
 
+    @property
+    def rowcount(self):
+        # Counted on first use for a server side result set
+        if (self.__rowcount is None):
+            self.__rowcount = self.__count_rows()
+        return self.__rowcount
+
+    @rowcount.setter
+    def rowcount(self, value):
+        self.__rowcount = value
+
     def execute(self, *arg):
         """
             Executes a database operation.
@@ -1020,15 +1777,75 @@ class ScrollCursor(Cursor):
             Executes a database operation.
 
         """
+        self.__scrollable = False
+        self.__close_result_set()
+        self.rowcount = -1
         super(ScrollCursor, self).execute(*arg)
 
-        # If a resulet set is produced, it is fetched.
+        # If a result set is produced, it is fetched, or the server side
+        # cursor is left before the first row and counted when needed.
         if (self._Cursor__mimcursor):
-            self.__result_set = super(ScrollCursor, self).fetchall()
-            self.rowcount = len(self.__result_set)
+            if (self.__client_side):
+                self.__result_set = self.__store_result_set()
+                self.rowcount = len(self.__result_set)
+            else:
+                self.rowcount = None
+                self.__position = 0
+            self.__scrollable = True
             self.rownumber = 0
+
+    def __count_rows(self):
+        # Private method counting the rows of the server side result set
+        # by moving the cursor to the last row.
+        self._Cursor__check_if_open()
+        statement = self._Cursor__statement
+        rc_value = mimerapi.mimerFetchScroll(statement, mimerapi.MIMER_LAST)
+        self._Cursor__check_mimerapi_error(rc_value, statement)
+        if (rc_value == 100):
+            count = 0
         else:
-            self.__result_set = None
+            count = mimerapi.mimerCurrentRow(statement)
+            self._Cursor__check_mimerapi_error(count, statement)
+        self.__position = count
+        return count
+
+    def close(self):
+        """
+            Closes the cursor.
+
+            From this point onwards the cursor is unusable and a
+            ProgrammingError is raised if any operations are attempted
+            on the connection.
+
+        """
+        self.__close_result_set()
+        if (self.__rowcount is None):
+            self.rowcount = -1
+        super(ScrollCursor, self).close()
+
+    def __store_result_set(self):
+        # Private method reading the whole result set into a ResultStore.
+        store = ResultStore(self._column_type, self.__memory_limit)
+        batch = []
+        try:
+            while True:
+                del batch[:]
+                super(ScrollCursor, self)._fill_batch(batch, self._STORE_BATCH)
+                store.extend(batch)
+                if (len(batch) < self._STORE_BATCH):
+                    break
+            store.finish()
+        except BaseException:
+            store.close()
+            raise
+        return store
+
+    def __close_result_set(self):
+        # Private method releasing a stored client side result set.
+        result_set = getattr(self, '_ScrollCursor__result_set', None)
+        if (result_set is not None):
+            result_set.close()
+        self.__result_set = None
 
     def fetchone(self):
         """
@@ -1043,8 +1860,10 @@ class ScrollCursor(Cursor):
         self._Cursor__check_if_open()
         self._Cursor__check_for_transaction()
 
-        if (self.__result_set == None):
+        if (not self.__scrollable):
             self._Cursor__raise_exception(-25014)
+        if (not self.__client_side):
+            return self.__fetch_next_row()
         values = ()
         try:
             values = values + self.__result_set[self.rownumber]
@@ -1071,25 +1890,18 @@ class ScrollCursor(Cursor):
         self._Cursor__check_if_open()
         self._Cursor__check_for_transaction()
 
-        if (self.__result_set == None):
+        if (not self.__scrollable):
             self._Cursor__raise_exception(-25014)
 
         if (len(arg) > 0):
             self.arraysize = arg[0]
 
-        fetch_size = self.arraysize
         values = []
-
-        while (fetch_size):
-            try:
-                values.append(self.__result_set[self.rownumber])
-                fetch_size = fetch_size - 1
-                self.rownumber = self.rownumber + 1
-            except IndexError:
-                break
+        if (self.arraysize > 0):
+            self._fill_batch(values, self.arraysize)
         return values
 
-    def fetchall(self):
+    def fetchall(self, columnar=False):
         """
             Fetch all (remaining) row of a query result set.
 
@@ -1098,19 +1910,129 @@ class ScrollCursor(Cursor):
             the previous call to execute did not produce a result set,
             a ProgrammingError is raised.
 
+            If columnar is True, the rows are returned as a ResultSet,
+            which stores each column in a compact typed buffer and builds
+            the row tuples when they are read.
+
         """
         self._Cursor__check_if_open()
         self._Cursor__check_for_transaction()
         values = []
-        if (self.__result_set == None):
+        if (not self.__scrollable):
             self._Cursor__raise_exception(-25014)
-        if (not self.rownumber):
-            self.rownumber = len(self.__result_set)
-            return self.__result_set
-        else:
-            values = self.__result_set[self.rownumber:len(self.__result_set)]
-            self.rownumber = len(self.__result_set)
+        if (columnar):
+            return self._fetch_result_set()
+        if (not self.__client_side):
+            row = self.__fetch_next_row()
+            while (row is not None):
+                values.append(row)
+                row = self.__fetch_next_row()
             return values
+        values = self.__result_set[self.rownumber:len(self.__result_set)]
+        self.rownumber = len(self.__result_set)
+        return values
+
+    def iter_batches(self, size=None):
+        """
+            Iterate over the remaining rows of a result set in batches.
+
+            size
+                number of rows per batch, defaults to arraysize.
+
+            Same as Cursor.iter_batches, starting at rownumber.
+
+        """
+        if (not self.__scrollable):
+            self._Cursor__check_if_open()
+            self._Cursor__raise_exception(-25014)
+        return super(ScrollCursor, self).iter_batches(size)
+
+    def _fill_batch(self, batch, size):
+        # Append up to size rows from the result set to batch.
+        if (not self.__client_side):
+            for _ in range(size):
+                row = self.__fetch_next_row()
+                if (row is None):
+                    break
+                batch.append(row)
+            return
+        end = min(self.rownumber + size, len(self.__result_set))
+        batch.extend(self.__result_set[self.rownumber:end])
+        self.rownumber = end
+
+    def _fill_columns(self, columns, size):
+        # Append up to size rows, or all remaining rows if size is None, to
+        # the column builders in columns, one row at a time. Returns the
+        # number of rows added.
+        if (not self.__client_side):
+            return self.__fill_server_columns(columns, size)
+        # Stored rows are already decoded, so the values are appended as
+        # they are rather than as the getters of the builders return them.
+        appends = tuple(builder.append_value for builder in columns)
+        start = self.rownumber
+        end = len(self.__result_set)
+        if (size is not None):
+            end = min(start + size, end)
+        for index in range(start, end):
+            for append, value in zip(appends, self.__result_set[index]):
+                append(value)
+            self.rownumber = index + 1
+        return end - start
+
+    def __fill_server_columns(self, columns, size):
+        # Private method appending rows from the server side cursor to the
+        # column builders, reading each cell with the getter of its builder.
+        statement = self._Cursor__statement
+        plan = tuple((builder.getter or get_funcs[column_type], cur_column,
+                      builder.append)
+                     for cur_column, (column_type, builder) in enumerate(
+                         zip(self._column_type, columns), 1))
+        rows = 0
+        while ((size is None or rows < size) and self.__scroll_to_next()):
+            for getter, cur_column, append in plan:
+                rc_value, value = getter(statement, cur_column)
+                if (rc_value < 0):
+                    self._Cursor__check_mimerapi_error(rc_value, statement)
+                append(value)
+            self.rownumber = self.rownumber + 1
+            self.__position = self.rownumber
+            rows += 1
+        return rows
+
+    def __scroll_to_next(self):
+        # Private method positioning the server side cursor on the row at
+        # rownumber, returning False past the end of the result set. A plain
+        # next fetch is used when the cursor is already positioned just
+        # before it.
+        count = self.__rowcount
+        if (count is not None and self.rownumber >= count):
+            return False
+        if (self.__position == self.rownumber):
+            operation, value = mimerapi.MIMER_NEXT, 0
+        else:
+            operation, value = mimerapi.MIMER_ABSOLUTE, self.rownumber + 1
+        statement = self._Cursor__statement
+        rc_value = mimerapi.mimerFetchScroll(statement, operation, value)
+        self._Cursor__check_mimerapi_error(rc_value, statement)
+        if (rc_value == 100):
+            # Past the last row, which also gives the number of rows when
+            # the cursor was moved from just before this one.
+            if (operation == mimerapi.MIMER_NEXT):
+                self.__rowcount = self.rownumber
+            self.__position = None
+            return False
+        return True
+
+    def __fetch_next_row(self):
+        # Private method fetching the row at rownumber from the server side
+        # cursor.
+        if (not self.__scroll_to_next()):
+            return None
+        rc_value, row = self._row_decoder()
+        self._Cursor__check_mimerapi_error(rc_value, self._Cursor__statement)
+        self.rownumber = self.rownumber + 1
+        self.__position = self.rownumber
+        return row
 
     def next(self):
         """
@@ -1122,16 +2044,14 @@ class ScrollCursor(Cursor):
         self._Cursor__check_if_open()
         self._Cursor__check_for_transaction()
 
-        if (self.__result_set == None):
+        if (not self.__scrollable):
             self._Cursor__raise_exception(-25014)
-        if (self.__result_set == []):
-            return self.__result_set
 
-        values = ()
-        try:
-            values = values + self.__result_set[self.rownumber]
-            self.rownumber = self.rownumber + 1
-        except IndexError:
+        values = self.fetchone()
+        if (values is None):
+            if (self.rownumber == 0):
+                # Empty result set
+                return []
             raise StopIteration
         return values
 
@@ -1153,16 +2073,17 @@ class ScrollCursor(Cursor):
         self._Cursor__check_if_open()
         self._Cursor__check_for_transaction()
 
+        if (not self.__scrollable):
+            self._Cursor__raise_exception(-25014)
+            return
         if (mode == 'relative'):
             new_row = self.rownumber + value
-            if (new_row >= len(self.__result_set)):
-                raise IndexError
-            else:
-                self.rownumber = new_row
         elif (mode == 'absolute'):
-            if (value >= len(self.__result_set)):
-                raise IndexError
-            else:
-                self.rownumber = value
+            new_row = value
         else:
             self._Cursor__raise_exception(-25016)
+            return
+        if (new_row >= self.rowcount or
+                (new_row < 0 and not self.__client_side)):
+            raise IndexError
+        self.rownumber = new_row
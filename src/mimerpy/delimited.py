@@ -0,0 +1,194 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+"""
+Conversion between result sets and delimited text for copy_to and copy_from.
+
+The text is read and written with the csv module, using the excel dialect
+for CSV and the excel-tab dialect for TSV. A plan of per-column formatters
+or per-parameter parsers is chosen once from the Mimer type codes of the
+statement, so no type dispatch happens for each value.
+"""
+
+import csv
+import re
+
+from . import mimerapi
+
+DIALECTS = {
+    'csv': csv.excel,
+    'tsv': csv.excel_tab,
+}
+
+# Default number of rows fetched and written at a time by copy_to
+CHUNK_ROWS = 1000
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_$#]*$')
+
+_INT_TYPES = (
+    mimerapi.MIMER_TYPE_T_INTEGER,
+    mimerapi.MIMER_TYPE_NATIVE_SMALLINT_NULLABLE,
+    mimerapi.MIMER_TYPE_NATIVE_INTEGER_NULLABLE,
+    mimerapi.MIMER_TYPE_NATIVE_BIGINT_NULLABLE,
+    mimerapi.MIMER_TYPE_GOLDEN_INTEGER,
+    mimerapi.MIMER_TYPE_N_TINYINT_NULLABLE,
+    mimerapi.MIMER_TYPE_INTEGER,
+)
+
+_FLOAT_TYPES = (
+    mimerapi.MIMER_TYPE_T_DOUBLE,
+    mimerapi.MIMER_TYPE_DOUBLE,
+    mimerapi.MIMER_NATIVE_REAL_NULLABLE,
+    mimerapi.MIMER_TYPE_LATITUDE,
+    mimerapi.MIMER_TYPE_LONGITUDE,
+)
+
+_BINARY_TYPES = (
+    mimerapi.MIMER_TYPE_BINARY,
+    mimerapi.MIMER_TYPE_BINARY_VARYING,
+    mimerapi.MIMER_TYPE_BLOB,
+)
+
+# Column types fetched in their string form, which is also the text written
+_TEXT_TYPES = (
+    mimerapi.MIMER_TYPE_DECIMAL,
+    mimerapi.MIMER_TYPE_NUMERIC,
+    mimerapi.MIMER_TYPE_GOLDEN_DECIMAL,
+    mimerapi.MIMER_TYPE_DATE,
+    mimerapi.MIMER_TYPE_TIME,
+    mimerapi.MIMER_TYPE_TIMESTAMP,
+)
+
+_TRUE = frozenset(('true', 't', 'yes', 'y', '1'))
+_FALSE = frozenset(('false', 'f', 'no', 'n', '0'))
+
+
+def _parse_bool(text):
+    value = text.strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError("invalid boolean value %r" % text)
+
+def _parse_location(text):
+    latitude, longitude = text.strip().strip('()[]').split(',')
+    return (float(latitude), float(longitude))
+
+def _format_location(value):
+    return '%r,%r' % (value[0], value[1])
+
+def _format_binary(value):
+    return bytes(value).hex()
+
+
+def parser(parameter_type):
+    """Return a function converting a field to a value for a parameter type."""
+    if parameter_type in _INT_TYPES:
+        return int
+    if parameter_type in _FLOAT_TYPES:
+        return float
+    if parameter_type == mimerapi.MIMER_TYPE_BOOLEAN:
+        return _parse_bool
+    if parameter_type in _BINARY_TYPES:
+        return bytes.fromhex
+    if parameter_type == mimerapi.MIMER_TYPE_LOCATION:
+        return _parse_location
+    # Character, DECIMAL, date and time, interval and UUID parameters take
+    # the text as it is and the parameter setter validates it.
+    return None
+
+
+def parse_records(records, parsers, null, reader):
+    """
+    Generate parameter tuples from records read by a csv reader.
+
+    A field equal to null is NULL and blank lines are skipped. A ValueError
+    is raised for a record with the wrong number of fields or a field that
+    cannot be converted, with the line number of the record in the message.
+    """
+    plan = tuple(parsers)
+    count = len(plan)
+    for record in records:
+        if len(record) != count:
+            if not record:
+                continue
+            raise ValueError("line %d: expected %d fields, found %d"
+                             % (reader.line_num, count, len(record)))
+        try:
+            yield tuple([None if field == null else
+                         field if parse is None else parse(field)
+                         for parse, field in zip(plan, record)])
+        except ValueError as e:
+            raise ValueError("line %d: %s" % (reader.line_num, e)) from None
+
+
+class _TextColumn:
+    # Collects the text of the values of one column for a csv writer.
+    __slots__ = ('column_type', 'getter', 'values', 'append')
+
+    def __init__(self, column_type, format, getter, null):
+        self.column_type = column_type
+        self.getter = getter
+        self.values = []
+        add = self.values.append
+        if format is None and null == '':
+            # The csv module writes None as an empty field
+            self.append = add
+        elif format is None:
+            self.append = lambda value: add(null if value is None else value)
+        else:
+            self.append = lambda value: add(null if value is None else format(value))
+
+    def __len__(self):
+        return len(self.values)
+
+
+def new_columns(column_types, null=''):
+    """Return empty text columns for columns of the given type codes."""
+    columns = []
+    for column_type in column_types:
+        format = None
+        getter = None
+        if column_type in _TEXT_TYPES:
+            getter = mimerapi.mimerGetString8
+        elif column_type in _BINARY_TYPES:
+            format = _format_binary
+        elif column_type == mimerapi.MIMER_TYPE_LOCATION:
+            format = _format_location
+        columns.append(_TextColumn(column_type, format, getter, null))
+    return columns
+
+
+def quote_identifier(name):
+    """Return name as an SQL identifier, quoted unless it is a regular one."""
+    if _IDENTIFIER.match(name):
+        return name
+    return '"%s"' % name.replace('"', '""')
+
+
+def insert_statement(table, columns, count):
+    """Return an INSERT statement for count values into table."""
+    markers = ', '.join(['?'] * count)
+    if columns is None:
+        return 'INSERT INTO %s VALUES (%s)' % (table, markers)
+    names = ', '.join(quote_identifier(name) for name in columns)
+    return 'INSERT INTO %s (%s) VALUES (%s)' % (table, names, markers)
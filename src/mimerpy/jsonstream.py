@@ -0,0 +1,195 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+"""
+Serialization of result sets to JSON text.
+
+Each column is given an encoder chosen once from its Mimer type code,
+which turns a fetched value straight into its JSON text. DECIMAL, DATE,
+TIME and TIMESTAMP values are fetched in their string form and copied
+into the output without building Decimal or datetime objects.
+"""
+
+import base64
+import io
+from json.encoder import encode_basestring, encode_basestring_ascii
+
+from . import mimerapi
+
+FORMATS = ('jsonl', 'array')
+
+ROW_FORMATS = ('object', 'array')
+
+# Default number of rows encoded and written at a time
+CHUNK_ROWS = 1000
+
+
+def _encode_float(value):
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return 'Infinity'
+    if value == -float('inf'):
+        return '-Infinity'
+    return float.__repr__(value)
+
+def _encode_bool(value):
+    return 'true' if value else 'false'
+
+def _encode_binary(value):
+    return '"%s"' % base64.b64encode(value).decode('ascii')
+
+def _encode_location(value):
+    return '[%s,%s]' % (_encode_float(value[0]), _encode_float(value[1]))
+
+_INT_TYPES = (
+    mimerapi.MIMER_TYPE_T_INTEGER,
+    mimerapi.MIMER_TYPE_NATIVE_SMALLINT_NULLABLE,
+    mimerapi.MIMER_TYPE_NATIVE_INTEGER_NULLABLE,
+    mimerapi.MIMER_TYPE_NATIVE_BIGINT_NULLABLE,
+    mimerapi.MIMER_TYPE_GOLDEN_INTEGER,
+    mimerapi.MIMER_TYPE_N_TINYINT_NULLABLE,
+    mimerapi.MIMER_TYPE_INTEGER,
+)
+
+_FLOAT_TYPES = (
+    mimerapi.MIMER_TYPE_T_DOUBLE,
+    mimerapi.MIMER_TYPE_DOUBLE,
+    mimerapi.MIMER_NATIVE_REAL_NULLABLE,
+    mimerapi.MIMER_TYPE_LATITUDE,
+    mimerapi.MIMER_TYPE_LONGITUDE,
+)
+
+# Column types fetched as strings and written as JSON numbers
+_NUMBER_TEXT_TYPES = (
+    mimerapi.MIMER_TYPE_DECIMAL,
+    mimerapi.MIMER_TYPE_NUMERIC,
+    mimerapi.MIMER_TYPE_GOLDEN_DECIMAL,
+)
+
+# Column types fetched as strings and written as JSON strings
+_STRING_TEXT_TYPES = (
+    mimerapi.MIMER_TYPE_DATE,
+    mimerapi.MIMER_TYPE_TIME,
+    mimerapi.MIMER_TYPE_TIMESTAMP,
+)
+
+
+class _JSONColumn:
+    # Collects the JSON text of the values of one column.
+    __slots__ = ('column_type', 'getter', 'values', '_encode')
+
+    def __init__(self, column_type, encode, getter=None):
+        self.column_type = column_type
+        self.getter = getter
+        self.values = []
+        self._encode = encode
+
+    def __len__(self):
+        return len(self.values)
+
+    def append(self, value):
+        self.values.append('null' if value is None else self._encode(value))
+
+    # The encoders accept decoded values as well
+    append_value = append
+
+
+def _encoder(column_type, ensure_ascii):
+    # Return (encode, getter) for a column type.
+    encode_string = encode_basestring_ascii if ensure_ascii else encode_basestring
+    if column_type in _INT_TYPES:
+        return (int.__repr__, None)
+    if column_type in _FLOAT_TYPES:
+        return (_encode_float, None)
+    if column_type == mimerapi.MIMER_TYPE_BOOLEAN:
+        return (_encode_bool, None)
+    if column_type in _NUMBER_TEXT_TYPES:
+        return (str, mimerapi.mimerGetString8)
+    if column_type == mimerapi.MIMER_TYPE_FLOAT:
+        return (str, None)
+    if column_type in _STRING_TEXT_TYPES:
+        return ((lambda value: encode_string(str(value))), mimerapi.mimerGetString8)
+    if column_type in (mimerapi.MIMER_TYPE_BINARY,
+                       mimerapi.MIMER_TYPE_BINARY_VARYING,
+                       mimerapi.MIMER_TYPE_BLOB):
+        return (_encode_binary, None)
+    if column_type == mimerapi.MIMER_TYPE_LOCATION:
+        return (_encode_location, None)
+    return ((lambda value: encode_string(value if isinstance(value, str)
+                                         else str(value))), None)
+
+
+class JSONWriter:
+    """
+    Writes rows collected in JSON column buffers to a file-like object.
+
+    format is 'jsonl' for one JSON value per line or 'array' for a single
+    JSON array, and row_format is 'object' for a JSON object per row keyed
+    by column name or 'array' for a JSON array per row. Every chunk of
+    rows is joined into one string and written with a single write call,
+    encoded to UTF-8 if fp is a binary stream.
+    """
+
+    def __init__(self, fp, names, column_types, format='jsonl',
+                 row_format='object', ensure_ascii=True):
+        self._fp = fp
+        self._binary = isinstance(fp, (io.RawIOBase, io.BufferedIOBase))
+        self._format = format
+        self._column_types = list(column_types)
+        self._encoders = [_encoder(t, ensure_ascii) for t in self._column_types]
+        self.rows = 0
+        encode_string = encode_basestring_ascii if ensure_ascii else encode_basestring
+        if row_format == 'object':
+            template = ','.join('%s:%%s' % encode_string(name).replace('%', '%%')
+                                for name in names)
+            self._template = '{' + template + '}'
+        else:
+            self._template = '[' + ','.join(['%s'] * len(names)) + ']'
+
+    def new_columns(self):
+        """Return empty column buffers for the next chunk of rows."""
+        return [_JSONColumn(t, encode, getter)
+                for t, (encode, getter) in zip(self._column_types, self._encoders)]
+
+    def write(self, columns):
+        """Write the rows held by the column buffers."""
+        template = self._template
+        lines = [template % row
+                 for row in zip(*[column.values for column in columns])]
+        if not lines:
+            return
+        if self._format == 'jsonl':
+            text = '\n'.join(lines) + '\n'
+        elif self.rows == 0:
+            text = '[' + ',\n'.join(lines)
+        else:
+            text = ',\n' + ',\n'.join(lines)
+        self.rows += len(lines)
+        self.__write(text)
+
+    def close(self):
+        """Complete the output, closing the JSON array if there is one."""
+        if self._format == 'array':
+            self.__write('[]\n' if self.rows == 0 else ']\n')
+
+    def __write(self, text):
+        self._fp.write(text.encode('utf-8') if self._binary else text)
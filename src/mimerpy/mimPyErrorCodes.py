@@ -50,6 +50,7 @@ mimerpy_error = {
     -25014:"Previous execute did not produce a result set",
     -25015:"Cursor not open",
     -25016:"Illegal scroll mode",
+    -25017:"Unsupported column type: %s",
     -25020:"Data conversion error",
     -25030:"Out of memory",
     -25031:"Login failure",
@@ -28,10 +28,11 @@ module which provides a DB-API 2.0 compliant interface on top of mimerapi
 
 Notes:
 - Safe mimerGetError8 (null-guard) to avoid segfaults on ended/invalid handles.
-- Keep Python buffers alive until EndStatement, or upon explicit reuse in BeginStatement8.
+- Keep bind buffers alive until AddBatch/Execute, then recycle them per statement.
 - Idempotent/null-safe EndStatement / CloseCursor.
 - Range checks for int32/int64
-- Safe memory lifecycle for LOB and string data via _keep_buffer() to avoid premature garbage collection.
+- Safe memory lifecycle for LOB and string data via _BindArena to avoid premature garbage collection.
+- Output buffers, handle and ordinal objects used by the getters are reused per statement.
 """
 
 from __future__ import annotations
@@ -41,6 +42,7 @@ import os
 import struct
 import ctypes
 import math
+import threading
 from ctypes import (
     c_int16, c_int32, c_int64, c_size_t, c_char_p, c_void_p, c_double, c_float,
     POINTER, byref, create_string_buffer
@@ -104,10 +106,29 @@ MIMER_TYPE_LONGITUDE = 8004
 MIMER_TRANS_READWRITE = 0x0
 MIMER_TRANS_READONLY  = 0x4
 
+MIMER_FORWARD_ONLY = 0x0
+MIMER_SCROLLABLE   = 0x1
+
+# Fetch operations for MimerFetchScroll
+MIMER_NEXT = 0
+MIMER_PREVIOUS = 1
+MIMER_ABSOLUTE = 2
+MIMER_RELATIVE = 3
+MIMER_FIRST = 4
+MIMER_LAST = 5
+
 MIMER_PARAMETER_MODE_IN = 1
 MIMER_PARAMETER_MODE_OUT = 2
 MIMER_PARAMETER_MODE_INOUT = 3
 
+# Kinds of validated columns bound by mimerExecuteColumns
+MIMERPY_COLUMN_INT32 = 1
+MIMERPY_COLUMN_INT64 = 2
+MIMERPY_COLUMN_DOUBLE = 3
+MIMERPY_COLUMN_FLOAT = 4
+MIMERPY_COLUMN_BOOLEAN = 5
+MIMERPY_COLUMN_STRING = 6
+
 BUFLEN = 1024
 CHUNK_SIZE = 100000
 
@@ -268,6 +289,8 @@ _MimerColumnCount           = _bind('MimerColumnCount', c_int32, MimerStatement)
 _MimerColumnType            = _bind('MimerColumnType', c_int32, MimerStatement, c_int16)
 _MimerColumnName8           = _bind('MimerColumnName8', c_int32, MimerStatement, c_int16, c_char_p, c_size_t)
 _MimerFetch                 = _bind('MimerFetch', c_int32, MimerStatement)
+_MimerFetchScroll           = _bind('MimerFetchScroll', c_int32, MimerStatement, c_int32, c_int32)
+_MimerCurrentRow            = _bind('MimerCurrentRow', c_int32, MimerStatement)
 _MimerGetInt32              = _bind('MimerGetInt32', c_int32, MimerStatement, c_int16, POINTER(c_int32))
 _MimerGetInt64              = _bind('MimerGetInt64', c_int32, MimerStatement, c_int16, POINTER(c_int64))
 _MimerGetString8            = _bind('MimerGetString8', c_int32, MimerStatement, c_int16, c_char_p, c_size_t)
@@ -311,12 +334,126 @@ if _level >= 3:
 
 
 # ---------------------------------------------------------------------------
-# Minimal tracking (buffers + pending bind errors)
+# Per-statement buffers
 # ---------------------------------------------------------------------------
-# These helper maps keep Python-owned memory alive while Mimer SQL may still reference it.
-# Without this, Python’s garbage collector could free strings or LOB chunks still used by C code.
-_active_buffers: dict[int, list[object]] = {}
-_stmt_bind_error: dict[int, int] = {}  # surfaced by AddBatch/Execute
+# Every statement owns one _StatementBuffers object holding the wrapped
+# statement handle, column ordinals, the output buffers used by the getters
+# and the bind buffers used by the setters.
+#
+# The getters are called once per cell of every fetched row. Instead of
+# allocating new ctypes objects for each call, the text and binary output
+# buffers start at BUFLEN and grow geometrically when a larger value is seen.
+#
+# Bind buffers keep Python-owned memory alive while Mimer SQL may still
+# reference it. Without this, Python's garbage collector could free strings
+# or LOB chunks still used by C code. The C API is done with them once the
+# parameter set has been passed to MimerAddBatch or MimerExecute, so they are
+# recycled after each of those calls instead of piling up until the
+# statement is ended.
+
+# Bind buffers larger than this are not kept for reuse after an execution
+BIND_SLOT_LIMIT = 64 * 1024
+
+class _BindArena:
+    """Bind buffers of one statement, reused from one parameter set to the next."""
+
+    __slots__ = ('slots', 'transient')
+
+    def __init__(self):
+        # One reusable buffer per parameter number
+        self.slots = {}
+        # Buffers that are only kept until the next execution (LOB data)
+        self.transient = []
+
+    def fill(self, parameter_number: int, raw) -> ctypes.Array:
+        """
+        Copy raw into the buffer of a parameter and return the buffer.
+
+        The copy is NUL terminated, so the buffer can be passed both as a
+        string and, together with len(raw), as binary data.
+        """
+        n = len(raw)
+        buf = self.slots.get(parameter_number)
+        if buf is None or len(buf) <= n:
+            size = n + 1 if buf is None else max(n + 1, 2 * len(buf))
+            buf = self.slots[parameter_number] = create_string_buffer(size)
+        ctypes.memmove(buf, raw, n)
+        buf[n] = b'\x00'
+        return buf
+
+    def keep(self, buf: object) -> None:
+        self.transient.append(buf)
+
+    def reset(self) -> None:
+        """Release the buffers of the last parameter set."""
+        self.transient = []
+        for number in [k for k, v in self.slots.items() if len(v) > BIND_SLOT_LIMIT]:
+            del self.slots[number]
+
+class _StatementBuffers:
+    """Output and bind buffers reused by the getters and setters of one statement."""
+
+    __slots__ = ('handle', 'ordinals', 'text', 'text_len', 'binary', 'binary_len',
+                 'int32', 'int32_ref', 'int64', 'int64_ref', 'double', 'double_ref',
+                 'float', 'float_ref', 'uuid', 'binds', 'bind_error')
+
+    def __init__(self, statement_ptr: int):
+        self.handle = MimerStatement(statement_ptr)
+        self.ordinals = {}
+        self.text = create_string_buffer(BUFLEN)
+        self.text_len = BUFLEN
+        self.binary = (ctypes.c_ubyte * BUFLEN)()
+        self.binary_len = BUFLEN
+        self.int32 = c_int32()
+        self.int32_ref = byref(self.int32)
+        self.int64 = c_int64()
+        self.int64_ref = byref(self.int64)
+        self.double = c_double()
+        self.double_ref = byref(self.double)
+        self.float = c_float()
+        self.float_ref = byref(self.float)
+        self.uuid = (ctypes.c_ubyte * 16)()
+        self.binds = _BindArena()
+        # First bind error, surfaced by AddBatch/Execute
+        self.bind_error = None
+
+    def ordinal(self, number: int) -> c_int16:
+        o = self.ordinals.get(number)
+        if o is None:
+            o = self.ordinals[number] = c_int16(int(number))
+        return o
+
+    def grow_text(self, needed: int) -> None:
+        size = max(needed, 2 * self.text_len)
+        self.text = create_string_buffer(size)
+        self.text_len = size
+
+    def grow_binary(self, needed: int) -> None:
+        size = max(needed, 2 * self.binary_len)
+        self.binary = (ctypes.c_ubyte * size)()
+        self.binary_len = size
+
+    def end_parameter_set(self):
+        """Recycle the bind buffers and return the pending bind error, if any."""
+        err = self.bind_error
+        self.bind_error = None
+        self.binds.reset()
+        return err
+
+_stmt_buffers: dict[int, _StatementBuffers] = {}
+# Guards adding and removing entries of _stmt_buffers. Lookups of an existing
+# entry need no lock.
+_stmt_buffers_lock = threading.Lock()
+
+def _buffers_for(statement_ptr: int) -> _StatementBuffers:
+    sp = int(statement_ptr)
+    b = _stmt_buffers.get(sp)
+    if b is None:
+        with _stmt_buffers_lock:
+            b = _stmt_buffers.get(sp)
+            if b is None:
+                b = _stmt_buffers[sp] = _StatementBuffers(sp)
+    return b
 
 def _keep_buffer(statement_ptr: int, buf: object) -> None:
     """
@@ -324,33 +461,38 @@ def _keep_buffer(statement_ptr: int, buf: object) -> None:
     that has been passed to the Mimer C API for parameter binding.
 
     This prevents Python's garbage collector from freeing the memory
-    while the Mimer statement is still active, since the native library
-    may continue reading from that buffer until the statement is executed
-    or ended (MimerEndStatement or MimerClearBuffers).
-
-    Buffers are released explicitly in _release_buffers().
+    while the native library may still read from it, that is until the
+    parameter set is passed to MimerAddBatch or MimerExecute, or the
+    statement is ended.
     """
     if not statement_ptr:
         return
-    sp = int(statement_ptr)
-    _active_buffers.setdefault(sp, []).append(buf)
+    _buffers_for(statement_ptr).binds.keep(buf)
 
-def _release_buffers(statement_ptr: int) -> None:
-    """Release any Python-side buffers and pending errors for the given statement."""
-    sp = int(statement_ptr)
-    if sp in _active_buffers:
-        n = len(_active_buffers[sp])
-        had_err = _stmt_bind_error.pop(sp, None) is not None
-    _active_buffers.pop(sp, None)
-    _stmt_bind_error.pop(sp, None)
+def _release_bind_buffers(statement_ptr: int) -> None:
+    """Recycle the bind buffers and drop the pending bind error for the given statement."""
+    b = _stmt_buffers.get(int(statement_ptr))
+    if b is not None:
+        b.end_parameter_set()
+
+def _release_buffers(statement_ptr: int):
+    """Release all Python-side buffers and pending errors for the given statement.
+
+    Returns the released buffers, if any.
+    """
+    with _stmt_buffers_lock:
+        return _stmt_buffers.pop(int(statement_ptr), None)
 
 def mimerClearBuffers(statement_ptr: int) -> None:
-    _release_buffers(int(statement_ptr))
+    """Release the bind buffers of a statement that is not being executed."""
+    _release_bind_buffers(int(statement_ptr))
 
 def _set_stmt_error(statement_ptr: int, err: int) -> None:
     sp = int(statement_ptr)
-    if sp and err and err < 0 and sp not in _stmt_bind_error:
-        _stmt_bind_error[sp] = int(err)
+    if sp and err and err < 0:
+        b = _buffers_for(sp)
+        if b.bind_error is None:
+            b.bind_error = int(err)
 
 def _arg_i16(v: int) -> c_int16:
     return c_int16(int(v))
@@ -401,8 +543,8 @@ def mimerBeginStatement8(session_ptr: int, sql: str, opt: int):
     rc = _MimerBeginStatement8(MimerSession(session_ptr), sql.encode('utf-8'), int(opt), byref(st))
     sp = int(st.value or 0)
     if sp:
-        # If a previous buffers list exists for this handle (address reuse), release old buffers now.
-        if sp in _active_buffers:
+        # If buffers exist for this handle (address reuse), release the old ones now.
+        if sp in _stmt_buffers:
             _release_buffers(sp)
     return (int(rc), sp)
 
@@ -410,13 +552,16 @@ def mimerEndStatement(statement_ptr: int):
     sp = int(statement_ptr or 0)
     if sp == 0:
         return 0
+    # The buffers are removed before the handle is freed, as another thread
+    # may be given the same handle as soon as it is, but kept alive until
+    # the native library is done with them.
+    buffers = _release_buffers(sp)
     st = MimerStatement(sp)
     try:
         rc = int(_MimerEndStatement(byref(st)))
     except Exception as ex:
         rc = 0
-    # Release buffers on EndStatement (simple, matches original usage)
-    _release_buffers(sp)
+    del buffers
     return int(rc or 0)
 
 def mimerOpenCursor(statement_ptr: int):
@@ -433,44 +578,39 @@ def mimerCloseCursor(statement_ptr: int):
     return int(rc or 0)
 
 def mimerAddBatch(statement_ptr: int):
-    sp = int(statement_ptr)
-    perr = _stmt_bind_error.pop(sp, None)
-    if perr is not None:
-        return int(perr)
-    rc = _MimerAddBatch(MimerStatement(sp))
+    b = _buffers_for(statement_ptr)
+    perr = b.bind_error
+    rc = _MimerAddBatch(b.handle) if perr is None else perr
+    b.end_parameter_set()
     return int(rc)
 
 def mimerExecuteStatement8(session_ptr: int, sql: str):
     return int(_MimerExecuteStatement8(MimerSession(session_ptr), sql.encode('utf-8')))
 
 def mimerExecute(statement_ptr: int):
-    sp = int(statement_ptr)
-    perr = _stmt_bind_error.pop(sp, None)
-    if perr is not None:
-        return int(perr)
-    rc = _MimerExecute(MimerStatement(sp))
+    b = _buffers_for(statement_ptr)
+    perr = b.bind_error
+    rc = _MimerExecute(b.handle) if perr is None else perr
+    b.end_parameter_set()
     return int(rc)
 
 def mimerParameterCount(statement_ptr: int):
     return int(_MimerParameterCount(MimerStatement(statement_ptr)))
 
 def _get_text_varying(getter, handle_ptr: int, ordinal: int):
-    if _MimerIsNull(MimerStatement(handle_ptr), _arg_i16(ordinal)) == 1:
+    b = _buffers_for(handle_ptr)
+    o = b.ordinal(ordinal)
+    if _MimerIsNull(b.handle, o) == 1:
         return (0, None)
-    buf = create_string_buffer(BUFLEN)
-    rc = getter(MimerStatement(handle_ptr), _arg_i16(ordinal), buf, c_size_t(BUFLEN))
-    if rc >= BUFLEN:
-        needed = int(rc) + 1
+    rc = getter(b.handle, o, b.text, b.text_len)
+    if rc >= b.text_len:
         try:
-            big = create_string_buffer(needed)
+            b.grow_text(int(rc) + 1)
         except Exception:
             return (MIMERPY_NOMEM, '')
-        rc = getter(MimerStatement(handle_ptr), _arg_i16(ordinal), big, c_size_t(needed))
-        s = (big.raw[:max(0, int(rc))]).decode('utf-8', 'strict') if rc > 0 else ''
-        return (int(rc), s)
-    else:
-        s = (buf.raw[:max(0, int(rc))]).decode('utf-8', 'strict') if rc > 0 else ''
-        return (int(rc), s)
+        rc = getter(b.handle, o, b.text, b.text_len)
+    s = ctypes.string_at(b.text, int(rc)).decode('utf-8', 'strict') if rc > 0 else ''
+    return (int(rc), s)
 
 def mimerParameterName8(statement_ptr: int, parameter_number: int):
     rc, s = _get_text_varying(_MimerParameterName8, statement_ptr, parameter_number)
@@ -496,36 +636,47 @@ def mimerColumnName8(statement_ptr: int, column_number: int):
 def mimerFetch(statement_ptr: int):
     return int(_MimerFetch(MimerStatement(statement_ptr)))
 
+def mimerFetchScroll(statement_ptr: int, operation: int, value: int = 0):
+    return int(_MimerFetchScroll(MimerStatement(statement_ptr), int(operation), int(value)))
+
+def mimerCurrentRow(statement_ptr: int):
+    """Return the 1-based number of the current row of a scrollable cursor."""
+    return int(_MimerCurrentRow(MimerStatement(statement_ptr)))
+
 def mimerGetInt32(statement_ptr: int, column_number: int):
-    if _MimerIsNull(MimerStatement(statement_ptr), _arg_i16(column_number)) == 1:
+    b = _buffers_for(statement_ptr)
+    o = b.ordinal(column_number)
+    if _MimerIsNull(b.handle, o) == 1:
         return (0, None)
-    out = c_int32()
-    rc = _MimerGetInt32(MimerStatement(statement_ptr), _arg_i16(column_number), byref(out))
-    return (int(rc), int(out.value))
+    rc = _MimerGetInt32(b.handle, o, b.int32_ref)
+    return (int(rc), b.int32.value)
 
 def mimerGetInt64(statement_ptr: int, column_number: int):
-    if _MimerIsNull(MimerStatement(statement_ptr), _arg_i16(column_number)) == 1:
+    b = _buffers_for(statement_ptr)
+    o = b.ordinal(column_number)
+    if _MimerIsNull(b.handle, o) == 1:
         return (0, None)
-    out = c_int64()
-    rc = _MimerGetInt64(MimerStatement(statement_ptr), _arg_i16(column_number), byref(out))
-    return (int(rc), int(out.value))
+    rc = _MimerGetInt64(b.handle, o, b.int64_ref)
+    return (int(rc), b.int64.value)
 
 def mimerGetString8(statement_ptr: int, column_number: int):
     return _get_text_varying(_MimerGetString8, statement_ptr, column_number)
 
 def mimerGetDouble(statement_ptr: int, column_number: int):
-    if _MimerIsNull(MimerStatement(statement_ptr), _arg_i16(column_number)) == 1:
+    b = _buffers_for(statement_ptr)
+    o = b.ordinal(column_number)
+    if _MimerIsNull(b.handle, o) == 1:
         return (0, None)
-    out = c_double()
-    rc = _MimerGetDouble(MimerStatement(statement_ptr), _arg_i16(column_number), byref(out))
-    return (int(rc), float(out.value))
+    rc = _MimerGetDouble(b.handle, o, b.double_ref)
+    return (int(rc), b.double.value)
 
 def mimerGetFloat(statement_ptr: int, column_number: int):
-    if _MimerIsNull(MimerStatement(statement_ptr), _arg_i16(column_number)) == 1:
+    b = _buffers_for(statement_ptr)
+    o = b.ordinal(column_number)
+    if _MimerIsNull(b.handle, o) == 1:
         return (0, None)
-    out = c_float()
-    rc = _MimerGetFloat(MimerStatement(statement_ptr), _arg_i16(column_number), byref(out))
-    return (int(rc), float(out.value))
+    rc = _MimerGetFloat(b.handle, o, b.float_ref)
+    return (int(rc), b.float.value)
 
 def mimerGetSequenceInt64(statement_ptr: int):
     out = c_int64()
@@ -584,9 +735,9 @@ def mimerSetString8(statement_ptr: int, parameter_number: int, val: str):
     except Exception:
         _set_stmt_error(sp, MIMERPY_DATA_CONVERSION_ERROR)
         return int(MIMERPY_DATA_CONVERSION_ERROR)
-    buf = create_string_buffer(raw + b'\x00')
-    _keep_buffer(sp, buf)
-    return int(_MimerSetString8(MimerStatement(sp), _arg_i16(parameter_number),
+    b = _buffers_for(sp)
+    buf = b.binds.fill(parameter_number, raw)
+    return int(_MimerSetString8(b.handle, _arg_i16(parameter_number),
                                 ctypes.cast(buf, c_char_p)))
 
 
@@ -732,34 +883,27 @@ def mimerSetBinary(statement_ptr: int, parameter_number: int, value):
     if not isinstance(value, (bytes, bytearray, memoryview)):
         _set_stmt_error(sp, MIMERPY_DATA_CONVERSION_ERROR)
         return int(MIMERPY_DATA_CONVERSION_ERROR)
-    mv = memoryview(value)
-    buf = (ctypes.c_ubyte * len(mv)).from_buffer_copy(mv)
-    _keep_buffer(sp, buf)
-    return int(_MimerSetBinary(MimerStatement(sp), _arg_i16(parameter_number),
-                               ctypes.cast(buf, c_void_p), c_size_t(len(mv))))
+    raw = value if isinstance(value, bytes) else bytes(value)
+    b = _buffers_for(sp)
+    buf = b.binds.fill(parameter_number, raw)
+    return int(_MimerSetBinary(b.handle, _arg_i16(parameter_number),
+                               ctypes.cast(buf, c_void_p), c_size_t(len(raw))))
 
 def mimerGetBinary(statement_ptr: int, parameter_number: int):
-    sp = int(statement_ptr)
-    if _MimerIsNull(MimerStatement(sp), _arg_i16(parameter_number)) == 1:
+    b = _buffers_for(statement_ptr)
+    o = b.ordinal(parameter_number)
+    if _MimerIsNull(b.handle, o) == 1:
         return (0, None)
-    SmallArr = ctypes.c_ubyte * BUFLEN
-    small = SmallArr()
-    rc = _MimerGetBinary(MimerStatement(sp), _arg_i16(parameter_number), small, c_size_t(BUFLEN))
-    if rc > BUFLEN:
-        need = int(rc)
+    rc = _MimerGetBinary(b.handle, o, b.binary, b.binary_len)
+    if rc > b.binary_len:
         try:
-            BigArr = ctypes.c_ubyte * need
-            big = BigArr()
+            b.grow_binary(int(rc))
         except Exception:
             return (MIMERPY_NOMEM, None)
-        rc = _MimerGetBinary(MimerStatement(sp), _arg_i16(parameter_number), big, c_size_t(need))
-        if rc <= 0:
-            return (int(rc), None)
-        return (int(rc), bytes(bytearray(big))[:int(rc)])
-    else:
-        if rc <= 0:
-            return (int(rc), None)
-        return (int(rc), bytes(bytearray(small))[:int(rc)])
+        rc = _MimerGetBinary(b.handle, o, b.binary, b.binary_len)
+    if rc <= 0:
+        return (int(rc), None)
+    return (int(rc), ctypes.string_at(b.binary, int(rc)))
 
 def mimerSetBoolean(statement_ptr: int, parameter_number: int, value):
     sp = int(statement_ptr)
@@ -769,21 +913,22 @@ def mimerSetBoolean(statement_ptr: int, parameter_number: int, value):
     return int(_MimerSetBoolean(MimerStatement(sp), _arg_i16(parameter_number), c_int32(v)))
 
 def mimerGetBoolean(statement_ptr: int, parameter_number: int):
-    sp = int(statement_ptr)
-    if _MimerIsNull(MimerStatement(sp), _arg_i16(parameter_number)) == 1:
+    b = _buffers_for(statement_ptr)
+    o = b.ordinal(parameter_number)
+    if _MimerIsNull(b.handle, o) == 1:
         return (0, None)
-    rc = _MimerGetBoolean(MimerStatement(sp), _arg_i16(parameter_number))
+    rc = _MimerGetBoolean(b.handle, o)
     return (int(rc), int(rc))
 
 def mimerGetUUID(statement_ptr: int, parameter_number: int):
-    sp = int(statement_ptr)
-    if _MimerIsNull(MimerStatement(sp), _arg_i16(parameter_number)) == 1:
+    b = _buffers_for(statement_ptr)
+    o = b.ordinal(parameter_number)
+    if _MimerIsNull(b.handle, o) == 1:
         return (0, None)
-    buf = (ctypes.c_ubyte * 16)()
-    rc = _MimerGetUUID(MimerStatement(sp), _arg_i16(parameter_number), ctypes.cast(buf, c_void_p))
+    rc = _MimerGetUUID(b.handle, o, b.uuid)
     if rc < 0:
         return (int(rc), None)
-    return (int(rc), bytes(bytearray(buf)))
+    return (int(rc), bytes(b.uuid))
 
 def mimerSetUUID(statement_ptr: int, parameter_number: int, uuid_bytes: bytes):
     sp = int(statement_ptr)
@@ -792,10 +937,9 @@ def mimerSetUUID(statement_ptr: int, parameter_number: int, uuid_bytes: bytes):
     if not isinstance(uuid_bytes, (bytes, bytearray, memoryview)) or len(uuid_bytes) != 16:
         _set_stmt_error(sp, MIMERPY_DATA_CONVERSION_ERROR)
         return int(MIMERPY_DATA_CONVERSION_ERROR)
-    mv = memoryview(uuid_bytes)
-    buf = (ctypes.c_ubyte * 16).from_buffer_copy(mv[:16])
-    _keep_buffer(sp, buf)
-    return int(_MimerSetUUID(MimerStatement(sp), _arg_i16(parameter_number), ctypes.cast(buf, c_void_p)))
+    b = _buffers_for(sp)
+    buf = b.binds.fill(parameter_number, bytes(uuid_bytes))
+    return int(_MimerSetUUID(b.handle, _arg_i16(parameter_number), ctypes.cast(buf, c_void_p)))
 
 def mimerGetGisLocation(statement_ptr: int, parameter_number: int):
     if _level < 3:
@@ -860,6 +1004,54 @@ def mimerSetNull(statement_ptr: int, parameter_number: int, _ignored=None):
     sp = int(statement_ptr)
     return int(_MimerSetNull(MimerStatement(sp), _arg_i16(parameter_number)))
 
+def mimerExecuteColumns(statement_ptr: int, columns, start: int, stop: int):
+    """
+    Bind rows start to stop - 1 of a set of columns and execute them as one batch.
+
+    columns is a sequence of (parameter_number, kind, values, nulls) tuples.
+    For the MIMERPY_COLUMN_* kinds, values is a list of Python ints, floats
+    or NUL terminated bytes that have already been checked to fit the
+    parameter, and they are passed to the C API without further conversion.
+    Otherwise kind is a setter called as kind(statement_ptr, parameter_number,
+    value). nulls is a list of booleans marking NULL values, or None.
+
+    Returns the return code of the first failing call, or of MimerExecute.
+    """
+    sp = int(statement_ptr)
+    b = _buffers_for(sp)
+    handle = b.handle
+    raw = {
+        MIMERPY_COLUMN_INT32: _MimerSetInt32,
+        MIMERPY_COLUMN_INT64: _MimerSetInt64,
+        MIMERPY_COLUMN_DOUBLE: _MimerSetDouble,
+        MIMERPY_COLUMN_FLOAT: _MimerSetFloat,
+        MIMERPY_COLUMN_BOOLEAN: _MimerSetBoolean,
+        MIMERPY_COLUMN_STRING: _MimerSetString8,
+    }
+    plan = []
+    for number, kind, values, nulls in columns:
+        setter = raw.get(kind)
+        if setter is None:
+            plan.append((kind, sp, int(number), b.ordinal(number), values, nulls))
+        else:
+            o = b.ordinal(number)
+            plan.append((setter, handle, o, o, values, nulls))
+
+    for row in range(start, stop):
+        if row > start:
+            rc = mimerAddBatch(sp)
+            if rc < 0:
+                return int(rc)
+        for setter, target, number, o, values, nulls in plan:
+            if nulls is not None and nulls[row]:
+                rc = _MimerSetNull(handle, o)
+            else:
+                rc = setter(target, number, values[row])
+            if rc < 0:
+                _release_bind_buffers(sp)
+                return int(rc)
+    return mimerExecute(sp)
+
 def mimerTestMalloc(v: int):
     # No-op in ctypes version; kept for API parity.
     return 0
@@ -0,0 +1,377 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+
+"""Partitioned parallel scans over pooled MimerPy connections.
+
+Usage:
+
+    from mimerpy.parallel import scan
+    for batch in scan(pool, "select * from orders", "order_id", partitions=8):
+        process(batch)
+
+scan() splits a SELECT into key ranges of one column and runs every range
+on its own connection from a MimerPool, in a thread pool. The blocking
+fetch calls release the GIL, so the network and server work of the
+partitions overlap. The rows come back as a stream of batches, either in
+partition order or as soon as any partition has produced them.
+
+scatter() runs the same statement against several databases, one pool or
+connection for each, and streams back the combined rows:
+
+    from mimerpy.parallel import scatter
+    for row in scatter([pool_eu, pool_us], "select * from customers"
+                       " order by name", order_by=['name'], limit=100):
+        process(row)
+
+"""
+
+import contextlib
+import datetime
+import decimal
+import heapq
+import itertools
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Default number of rows per batch
+BATCH_SIZE = 1000
+
+# Default number of batches a partition may fetch ahead of the consumer
+QUEUE_DEPTH = 4
+
+_DONE = object()
+
+
+def split_range(low, high, partitions):
+    """Return the split points dividing [low, high] into equal ranges.
+
+    Args:
+        low: Smallest value, an int, float, Decimal, date or datetime.
+        high: Largest value, of the same type.
+        partitions(int): Number of ranges wanted.
+
+    Returns:
+        A sorted list of at most partitions - 1 distinct split points.
+
+    """
+    if isinstance(low, bool) or not isinstance(
+            low, (int, float, decimal.Decimal, datetime.date)):
+        raise TypeError("cannot split a range of %s values, give bounds instead"
+                        % type(low).__name__)
+    points = []
+    for i in range(1, partitions):
+        if isinstance(low, int):
+            point = low + (high - low + 1) * i // partitions
+        elif isinstance(low, datetime.datetime):
+            point = low + (high - low) * i / partitions
+        elif isinstance(low, datetime.date):
+            point = low + datetime.timedelta(days=(high - low).days * i // partitions)
+        else:
+            point = low + (high - low) * i / partitions
+        if low < point <= high and (not points or point > points[-1]):
+            points.append(point)
+    return points
+
+
+def partition_queries(query, partition_column, points):
+    """Return (sql, params) for every range given by the split points.
+
+    The ranges are [None, p1), [p1, p2), ... [pN, None] followed by a range
+    for NULL keys, each a SELECT from the original query as a derived table.
+
+    """
+    base = 'SELECT * FROM (%s) AS mimerpy_scan WHERE %s' % (query, partition_column)
+    if not points:
+        ranges = [(base + ' IS NOT NULL', ())]
+    else:
+        ranges = [(base + ' < ?', (points[0],))]
+        for low, high in zip(points, points[1:]):
+            ranges.append((base + ' >= ? AND %s < ?' % partition_column,
+                           (low, high)))
+        ranges.append((base + ' >= ?', (points[-1],)))
+    ranges.append((base + ' IS NULL', ()))
+    return ranges
+
+
+def scan(pool, query, partition_column, partitions=4, bounds=None, params=(),
+         ordered=False, batch_size=BATCH_SIZE, queue_depth=QUEUE_DEPTH,
+         max_workers=None):
+    """Run a SELECT as parallel key-range partitions.
+
+    Args:
+        pool(MimerPool): Pool the partition connections are taken from.
+        query(str): The SELECT statement to scan.
+        partition_column(str): Column of the result the ranges are taken on.
+        partitions(int): Number of ranges computed from MIN and MAX of the
+            column when bounds is not given. Default 4
+        bounds: Sorted split points to use instead of MIN and MAX.
+        params: Parameters of query, if it has parameter markers.
+        ordered(bool): If True, the batches of the first range come first,
+            then those of the second and so on. Otherwise batches are
+            returned as soon as they are fetched. Default False
+        batch_size(int): Rows per batch. Default 1000
+        queue_depth(int): Batches each range may fetch ahead. Default 4
+        max_workers(int): Number of ranges run at the same time, which
+            should not exceed the connections the pool allows.
+            Default all ranges.
+
+    Returns:
+        A generator of lists of row tuples. Rows with a NULL key are scanned
+        as a range of their own. Closing the generator early stops the
+        scan and returns the connections to the pool.
+
+    """
+    if partitions < 1 or batch_size < 1 or queue_depth < 1:
+        raise ValueError("partitions, batch_size and queue_depth must be positive")
+    params = tuple(params)
+    if bounds is None:
+        con = pool.get_connection()
+        try:
+            cur = con.cursor()
+            _execute(cur, 'SELECT MIN(%s), MAX(%s) FROM (%s) AS mimerpy_scan'
+                     % (partition_column, partition_column, query), params)
+            low, high = cur.fetchone()
+            cur.close()
+            con.rollback()
+        finally:
+            con.close()
+        bounds = [] if low is None else split_range(low, high, partitions)
+    ranges = partition_queries(query, partition_column, list(bounds))
+    return _scan(pool, [(sql, params + range_params) for sql, range_params in ranges],
+                 ordered, batch_size, queue_depth, max_workers or len(ranges))
+
+
+def scatter(sources, query, params=(), order_by=None, limit=None,
+            batch_size=BATCH_SIZE, queue_depth=QUEUE_DEPTH):
+    """Run a statement against several databases and combine the rows.
+
+    Args:
+        sources: The MimerPools or Connections to run the statement on,
+            typically one for each database.
+        query(str): The SELECT statement to run.
+        params: Parameters of query, if it has parameter markers.
+        order_by: If the query has an ORDER BY clause, the columns it sorts
+            on as column positions or names, each optionally given as a
+            (column, descending) pair. The sorted rows of the databases
+            are then merged so that the result is sorted as a whole.
+            Default None, the rows are returned as they are fetched.
+        limit(int): Maximum number of rows returned. Each database is
+            read at most limit rows at a time and the queries are stopped
+            as soon as limit rows have been returned. The query itself is
+            not changed. Default None, all rows.
+        batch_size(int): Rows fetched at a time from each database.
+            Default 1000
+        queue_depth(int): Batches each database may fetch ahead. Default 4
+
+    Returns:
+        A generator of row tuples. Connections taken from a pool are
+        returned to it when the generator is exhausted or closed.
+        Connections given directly are used as they are and not closed.
+
+    """
+    sources = list(sources)
+    if not sources:
+        raise ValueError("no sources to run the query on")
+    if batch_size < 1 or queue_depth < 1:
+        raise ValueError("batch_size and queue_depth must be positive")
+    if limit is not None:
+        if limit < 0:
+            raise ValueError("limit must not be negative")
+        if limit == 0:
+            return iter(())
+        batch_size = min(batch_size, limit)
+    return _scatter(sources, query, tuple(params), order_by, limit,
+                    batch_size, queue_depth)
+
+
+class _SortKey:
+    # Sort key for ORDER BY columns in mixed directions. As in Mimer SQL,
+    # NULL sorts higher than any other value.
+    __slots__ = ('values', 'descending')
+
+    def __init__(self, values, descending):
+        self.values = values
+        self.descending = descending
+
+    def __lt__(self, other):
+        for a, b, desc in zip(self.values, other.values, self.descending):
+            if a == b:
+                continue
+            if a is None:
+                return desc
+            if b is None:
+                return not desc
+            return b < a if desc else a < b
+        return False
+
+
+def _merge(streams, order_by, description):
+    # k-way merge of the sorted row streams on the order_by columns.
+    # description is a list that holds the column names once a stream
+    # has started.
+    columns = []
+    for item in order_by:
+        column, desc = item if isinstance(item, tuple) else (item, False)
+        columns.append((column, bool(desc)))
+    directions = {desc for _, desc in columns}
+    positions = []
+
+    def key(row):
+        if not positions:
+            names = [d[0].lower() for d in description[0]]
+            for column, _ in columns:
+                if isinstance(column, str):
+                    try:
+                        column = names.index(column.lower())
+                    except ValueError:
+                        raise ValueError("order_by column %r is not in the "
+                                         "result" % column) from None
+                positions.append(column)
+        if len(directions) == 1:
+            return tuple((row[i] is None, row[i]) for i in positions)
+        return _SortKey([row[i] for i in positions], [d for _, d in columns])
+
+    return heapq.merge(*streams, key=key, reverse=directions == {True})
+
+
+def _scatter(sources, query, params, order_by, limit, batch_size,
+             queue_depth):
+    # Generator running the query on every source in a thread pool.
+    stop = threading.Event()
+    description = []
+    if order_by:
+        queues = [queue.Queue(queue_depth) for _ in sources]
+    else:
+        shared = queue.Queue(queue_depth * len(sources))
+        queues = [shared] * len(sources)
+    executor = ThreadPoolExecutor(max_workers=len(sources),
+                                  thread_name_prefix='mimerpy-scatter')
+    try:
+        for source, out in zip(sources, queues):
+            executor.submit(_scan_range, source, query, params, batch_size,
+                            out, stop, description)
+        if order_by:
+            rows = _merge([_rows(out, 1) for out in queues], order_by,
+                          description)
+        else:
+            rows = _rows(shared, len(sources))
+        if limit is not None:
+            rows = itertools.islice(rows, limit)
+        yield from rows
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+
+
+@contextlib.contextmanager
+def _checkout(source):
+    # Take a connection from a pool, or use a connection as it is.
+    if not hasattr(source, 'get_connection'):
+        yield source
+        return
+    con = source.get_connection()
+    try:
+        yield con
+        con.rollback()
+    finally:
+        con.close()
+
+
+def _execute(cur, sql, params):
+    if params:
+        cur.execute(sql, params)
+    else:
+        cur.execute(sql)
+
+
+def _scan(pool, ranges, ordered, batch_size, queue_depth, max_workers):
+    # Generator running every range in a thread pool.
+    stop = threading.Event()
+    if ordered:
+        queues = [queue.Queue(queue_depth) for _ in ranges]
+    else:
+        shared = queue.Queue(queue_depth * len(ranges))
+        queues = [shared] * len(ranges)
+    executor = ThreadPoolExecutor(max_workers=max_workers,
+                                  thread_name_prefix='mimerpy-scan')
+    try:
+        for (sql, range_params), out in zip(ranges, queues):
+            executor.submit(_scan_range, pool, sql, range_params, batch_size,
+                            out, stop)
+        if ordered:
+            for out in queues:
+                yield from _drain(out, 1)
+        else:
+            yield from _drain(shared, len(ranges))
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+
+
+def _drain(out, running):
+    # Yield the batches put on out until running ranges have finished.
+    while running:
+        item = out.get()
+        if item is _DONE:
+            running -= 1
+        elif isinstance(item, BaseException):
+            raise item
+        else:
+            yield item
+
+
+def _rows(out, running):
+    for batch in _drain(out, running):
+        yield from batch
+
+
+def _put(out, item, stop):
+    # Put item on out unless the scan is stopped. Returns False if stopped.
+    while not stop.is_set():
+        try:
+            out.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _scan_range(source, sql, params, batch_size, out, stop, description=None):
+    # Thread running one query and putting its batches on out.
+    if stop.is_set():
+        return
+    try:
+        with _checkout(source) as con:
+            cur = con.cursor()
+            _execute(cur, sql, params)
+            if description is not None and not description:
+                description.append(cur.description)
+            while not stop.is_set():
+                batch = cur.fetchmany(batch_size)
+                if not batch or not _put(out, batch, stop):
+                    break
+            cur.close()
+    except BaseException as e:
+        _put(out, e, stop)
+        return
+    _put(out, _DONE, stop)
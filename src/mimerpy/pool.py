@@ -35,6 +35,10 @@ block: determines behavior when exceeding the maximum number of connections.
     (Default: False, will give error when maxconnections is exceeded)
 deep_health_check: Don't only check that the connection seems to be ok, try it before getting it from the pool.
     This is a bit slower but guarantees that the connection is healty. Default True
+min_idle: number of unused connections kept open by the maintenance thread (Default: 0)
+idle_timeout: seconds before an unused connection above min_idle is closed (Default: 0, never)
+max_lifetime: seconds before a connection is closed and replaced (Default: 0, never)
+maintenance_interval: seconds between runs of the maintenance thread (Default: 30)
 dsn: The database name. If empty, MIMER_DATABASE is used
 user: The database username
 password: The database password
@@ -57,11 +61,36 @@ will not actually close the connections but rather return them to the pool.
 
 """
 
+import collections
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from threading import Condition
 from .connectionPy import Connection
 from .mimPyExceptions import OperationalError
 
 
+# Default number of seconds between runs of the maintenance thread
+MAINTENANCE_INTERVAL = 30.0
+
+# Maximum number of connections opened at the same time by the pool
+OPEN_THREADS = 16
+
+# Largest fraction by which a connection's max_lifetime is randomly shortened
+LIFETIME_JITTER = 0.1
+
+# Ways of checking a connection before it is handed out
+VALIDATION_POLICIES = ('always', 'idle', 'sample', 'background')
+
+# Default number of seconds a connection is idle before the 'idle' policy checks it
+VALIDATION_IDLE = 1.0
+
+# Default fraction of checkouts checked by the 'sample' policy
+VALIDATION_SAMPLE = 0.1
+
+
 class MimerPoolError(Exception):
     """General MimerPool error."""
 
@@ -80,7 +109,10 @@ class MimerPool:
 
     def __init__(
             self, dsn:str = '', user:str = '', password:str ='', initialconnections:int = 0, maxunused:int = 0, maxconnections:int = 0, block:bool = False,
-            deep_health_check:bool = False, autocommit:bool = False, errorhandler=None, readonly:bool = False):
+            deep_health_check:bool = False, autocommit:bool = False, errorhandler=None, readonly:bool = False,
+            min_idle:int = 0, idle_timeout:float = 0, max_lifetime:float = 0, maintenance_interval:float = MAINTENANCE_INTERVAL,
+            validation:str = None, validation_idle:float = VALIDATION_IDLE, validation_sample:float = VALIDATION_SAMPLE,
+            is_broken_error=None):
         """Set up the MimerPy connection pool.
 
         Args:
@@ -98,6 +130,25 @@ class MimerPool:
             autocommit(bool): Autocommit mode
             errorhandler: Custom errorhandler
             readonly(bool): If True, all connections in the pool are opened in read-only mode. Default False
+            min_idle(int): number of unused connections the maintenance thread keeps open (Default: 0)
+            idle_timeout(float): seconds an unused connection is kept before it is closed,
+                as long as more than min_idle connections are unused (Default: 0, never closed)
+            max_lifetime(float): seconds a connection is used before it is closed and replaced.
+                Each connection's lifetime is shortened by a random amount of up to 10%,
+                so connections opened together are not all replaced together (Default: 0, no limit)
+            maintenance_interval(float): seconds between the runs of the maintenance thread, which
+                is started if min_idle, idle_timeout or max_lifetime is set. Each run also checks
+                the unused connections that have been idle since the last run. Default 30
+            validation(str): how a connection is checked with a query before it is handed out.
+                'always' checks every connection, 'idle' only those idle longer than validation_idle
+                seconds, 'sample' a random validation_sample fraction of them, and 'background'
+                none, leaving the checks to the maintenance thread.
+                (Default: None, 'always' if deep_health_check is True, otherwise no check)
+            validation_idle(float): seconds of idle time before the 'idle' policy checks a connection. Default 1
+            validation_sample(float): fraction of checkouts checked by the 'sample' policy. Default 0.1
+            is_broken_error: function called as is_broken_error(errorclass, errorvalue) for every error
+                raised on a pooled connection. If it returns True the connection is closed instead of
+                returned to the pool. (Default: None, communication errors -18000 to -18999)
 
         Returns:
             An initialized MimerPool
@@ -112,21 +163,44 @@ class MimerPool:
         self._block = block
         self._initialconnections = initialconnections
         self._deep_health_check = deep_health_check
-        if maxunused > 0 and maxunused < initialconnections:
-            self._maxunused = initialconnections
+        if validation is None and deep_health_check:
+            validation = 'always'
+        if validation is not None and validation not in VALIDATION_POLICIES:
+            raise ValueError("validation must be one of %s" % (VALIDATION_POLICIES,))
+        self._validation = validation
+        self._validation_idle = validation_idle
+        self._validation_sample = validation_sample
+        self._is_broken_error = is_broken_error or _communication_error
+        self._min_idle = min_idle
+        self._idle_timeout = idle_timeout
+        self._max_lifetime = max_lifetime
+        self._maintenance_interval = maintenance_interval
+        if maxunused > 0 and maxunused < max(initialconnections, min_idle):
+            self._maxunused = max(initialconnections, min_idle)
         else:
             self._maxunused = maxunused
         if maxconnections > 0 and maxconnections < self._maxunused:
             self._maxconnections = self._maxunused
         else:
             self._maxconnections = maxconnections
-        self.__cached_connections = []  # The connection pool
-        self.__used_connections = [] # Used connections
+        self.__cached_connections = collections.deque()  # The connection pool, most recently used last
+        self.__used_connections = set() # Used connections
+        self.__opening = 0  # Slots reserved for connections being opened
+        self.__checking = 0  # Unused connections being checked by maintenance
         self.__pool_lock = Condition()
+        self.__stop = threading.Event()
+        self.__maintenance = None
         # Start initial connections if any
-        initial_cons = [self.get_connection() for cnt in range(initialconnections)]
-        while initial_cons:
-            self.store_or_close(initial_cons.pop())
+        if initialconnections > 0:
+            self.__pool_lock.acquire()
+            self.__opening += initialconnections
+            self.__pool_lock.release()
+            self.__open_unused(initialconnections, raise_errors=True)
+        if (min_idle > 0 or idle_timeout > 0 or max_lifetime > 0 or validation == 'background') and maintenance_interval > 0:
+            self.__maintenance = threading.Thread(
+                target=_maintenance_loop, name='mimerpy-pool-maintenance', daemon=True,
+                args=(weakref.ref(self), self.__stop, maintenance_interval))
+            self.__maintenance.start()
 
     @property
     def cached_connections(self):
@@ -141,40 +215,123 @@ class MimerPool:
     @property
     def connections(self):
         """Total number of active connections."""
-        return len(self.__used_connections) + len(self.__cached_connections)
+        return len(self.__used_connections) + len(self.__cached_connections) + self.__checking
 
     def get_connection(self):
         """Get a pooled MimerPy connection.
 
+        The pool lock is only held while a slot is reserved. Opening and
+        checking the connection is done after the lock is released, so a
+        slow login does not hold up other threads. The most recently
+        returned connection is handed out first.
+
         Returns:
             A PooledConnection that can be used as a standard MimerPy Connection
 
         """
+        expired = []
         self.__pool_lock.acquire()
         try:
             if self._block and self._maxconnections > 0:
-                while self.used_connections >= self._maxconnections:
+                while self.used_connections + self.__opening + self.__checking >= self._maxconnections:
                     self.__pool_lock.wait()
-            elif self._maxconnections > 0 and self.used_connections >= self._maxconnections:
+            elif self._maxconnections > 0 and self.used_connections + self.__opening + self.__checking >= self._maxconnections:
                 raise MimerPoolExhausted
             # Connection limit not reached, get a connection
             # Try to get it from the connection pool
-            if len(self.__cached_connections) > 0:
-                con = self.__cached_connections.pop(0)
-                if not con.is_open():
-                    #The connection is not healthy, throw it away and create a new one
-                    con = PooledConnection(self)
-                elif con._transaction:
-                    con.rollback()
-                self.__used_connections.append(con)
-            else:  # No more connections in the pool, create a new one
-                con = PooledConnection(self)
-                self.__used_connections.append(con)
+            now = time.monotonic()
+            con = None
+            while self.__cached_connections:
+                con = self.__cached_connections.pop()
+                if not con._expired(now):
+                    break
+                expired.append(con)
+                con = None
+            if con is not None:
+                self.__used_connections.add(con)
+            else:  # No more connections in the pool, reserve a slot for a new one
+                self.__opening += 1
         finally:
             self.__pool_lock.release()
 
+        for old in expired:
+            _close_quietly(old)
+        if con is not None:
+            try:
+                if self.__validate(con):
+                    if con._transaction:
+                        con.rollback()
+                    return con
+            except Exception:
+                pass
+            # The connection is not healthy, throw it away and create a new one
+            self.__pool_lock.acquire()
+            try:
+                self.__used_connections.discard(con)
+                self.__opening += 1
+            finally:
+                self.__pool_lock.release()
+            _close_quietly(con)
+        return self.__open_reserved()
+
+    def __validate(self, con):
+        # Check a connection taken from the pool according to the
+        # validation policy. Returns False if it is broken.
+        if con._session is None or con._broken:
+            return False
+        policy = self._validation
+        if (policy == 'always' or
+                (policy == 'idle' and time.monotonic() - max(con._idle_since, con._checked) >= self._validation_idle) or
+                (policy == 'sample' and random.random() < self._validation_sample)):
+            if not con._ping():
+                return False
+            con._checked = time.monotonic()
+        return True
+
+    def __open_reserved(self):
+        # Open a new connection in a slot reserved by get_connection.
+        try:
+            con = PooledConnection(self)
+        except BaseException:
+            self.__pool_lock.acquire()
+            try:
+                self.__opening -= 1
+                self.__pool_lock.notify()
+            finally:
+                self.__pool_lock.release()
+            raise
+        self.__pool_lock.acquire()
+        try:
+            self.__opening -= 1
+            self.__used_connections.add(con)
+        finally:
+            self.__pool_lock.release()
         return con
 
+    def __open_unused(self, count, raise_errors=False):
+        # Open count connections in reserved slots at the same time and add
+        # them to the pool.
+        with ThreadPoolExecutor(max_workers=min(count, OPEN_THREADS),
+                                thread_name_prefix='mimerpy-pool-open') as executor:
+            futures = [executor.submit(PooledConnection, self) for _ in range(count)]
+        cons = [f.result() for f in futures if f.exception() is None]
+        errors = [f.exception() for f in futures if f.exception() is not None]
+        self.__pool_lock.acquire()
+        try:
+            self.__opening -= count
+            if self.__stop.is_set() or (errors and raise_errors):
+                discard = cons
+            else:
+                self.__cached_connections.extendleft(cons)
+                discard = []
+            self.__pool_lock.notify_all()
+        finally:
+            self.__pool_lock.release()
+        for con in discard:
+            _close_quietly(con)
+        if errors and raise_errors:
+            raise errors[0]
+
     def store_or_close(self, con):
         """Put a connection back into the pool or close it if the cache is full/big enough.
 
@@ -184,42 +341,126 @@ class MimerPool:
         """
         self.__pool_lock.acquire()
         try:
-            #Only cache connections that are ok
-            if con.is_open() and (
-                not self._maxunused or (
-                    len(self.__cached_connections) < self._maxunused and self.connections <= self._maxconnections)
-            ):
+            if con not in self.__used_connections:
+                return  # Already returned
+        finally:
+            self.__pool_lock.release()
+
+        #Only cache connections that are ok
+        healthy = False
+        try:
+            if con._session is not None and not con._broken and not con._expired(time.monotonic()):
                 con.reset()
                 con.autocommit(self._autocommit) # Set autocommit back to how the pool was at setup
+                healthy = True
+        except Exception:
+            pass
+
+        self.__pool_lock.acquire()
+        try:
+            keep = healthy and (
+                not self._maxunused or (
+                    len(self.__cached_connections) + self.__checking < self._maxunused and
+                    self.connections <= self._maxconnections))
+            self.__used_connections.discard(con)
+            if keep:
                 # The connection pool is not full, so append it to the pool and keep it alive
+                con._idle_since = time.monotonic()
                 self.__cached_connections.append(con)
-            else:  # The connection pool is full, close the connection and discard it.
-                con._close()
-            self.__used_connections.remove(con)
             self.__pool_lock.notify()
         finally:
             self.__pool_lock.release()
+        if not keep:  # The connection pool is full, close the connection and discard it.
+            _close_quietly(con)
+
+    def _maintain(self):
+        """Run one round of pool maintenance.
+
+        Closes unused connections that have passed max_lifetime or, above
+        min_idle, idle_timeout. Checks the remaining ones that have been
+        idle since the last round, and opens new connections, all at the
+        same time, until min_idle are unused. Called by the maintenance
+        thread.
+
+        """
+        now = time.monotonic()
+        retire = []
+        check = []
+        self.__pool_lock.acquire()
+        try:
+            keep = collections.deque()
+            unused = len(self.__cached_connections)
+            # Oldest idle connections first
+            for con in self.__cached_connections:
+                if con._expired(now):
+                    retire.append(con)
+                    unused -= 1
+                elif (self._idle_timeout > 0 and unused > self._min_idle and
+                      now - con._idle_since >= self._idle_timeout):
+                    retire.append(con)
+                    unused -= 1
+                elif now - max(con._idle_since, con._checked) >= self._maintenance_interval:
+                    check.append(con)
+                else:
+                    keep.append(con)
+            self.__cached_connections = keep
+            # Connections being checked still count towards the limits
+            self.__checking += len(check)
+        finally:
+            self.__pool_lock.release()
+
+        for con in retire:
+            _close_quietly(con)
+        healthy = []
+        for con in check:
+            if con._ping():
+                con._checked = time.monotonic()
+                healthy.append(con)
+            else:
+                _close_quietly(con)
 
-    def close(self):
-        """Close all connections in the pool."""
         self.__pool_lock.acquire()
         try:
-            while self.__cached_connections:  # Close all connections in the pool
-                con = self.__cached_connections.pop(0)
-                try:
-                    con._close()
-                except Exception:
-                    pass
-            while self.__used_connections:  # Close all connections that haven't been returned
-                con = self.__used_connections.pop(0)
-                try:
-                    con._close()
-                except Exception:
-                    pass
+            self.__checking -= len(check)
+            if self.__stop.is_set():
+                retire = healthy
+            else:
+                self.__cached_connections.extendleft(reversed(healthy))
+                retire = []
+            unused = len(self.__cached_connections) + self.__checking
+            missing = self._min_idle - unused - self.__opening
+            if self._maxunused:
+                missing = min(missing, self._maxunused - unused)
+            if self._maxconnections:
+                missing = min(missing, self._maxconnections - self.connections - self.__opening)
+            missing = 0 if self.__stop.is_set() else max(missing, 0)
+            self.__opening += missing
             self.__pool_lock.notify_all()
         finally:
             self.__pool_lock.release()
+        for con in retire:
+            _close_quietly(con)
+        if missing:
+            self.__open_unused(missing)
 
+    def close(self):
+        """Close all connections in the pool and stop the maintenance thread."""
+        self.__stop.set()
+        self.__pool_lock.acquire()
+        try:
+            # Close all connections in the pool and those that haven't been returned
+            cons = list(self.__cached_connections) + list(self.__used_connections)
+            self.__cached_connections.clear()
+            self.__used_connections.clear()
+            self.__pool_lock.notify_all()
+        finally:
+            self.__pool_lock.release()
+        for con in cons:
+            _close_quietly(con)
+        maintenance = self.__maintenance
+        if maintenance is not None and maintenance is not threading.current_thread():
+            maintenance.join()
+        self.__maintenance = None
 
     def __enter__(self):
         """Support for the with statement
@@ -252,6 +493,14 @@ class PooledConnection(Connection):
 
         #Keep track of the pool so we can put the connection back
         self._pool = pool
+        #Errors that show the connection is lost mark it as broken
+        self._broken = False
+        self.errorhandler = _BrokenConnectionHook(self.errorhandler, pool._is_broken_error)
+        self._idle_since = self._checked = time.monotonic()
+        if pool._max_lifetime > 0:
+            self._expires = self._idle_since + pool._max_lifetime * (1 - LIFETIME_JITTER * random.random())
+        else:
+            self._expires = None
 
     def close(self):
         """Close the pooled connection.
@@ -270,21 +519,31 @@ class PooledConnection(Connection):
             return False
         else:
             if self._pool._deep_health_check:
-                try:
-                    cur = self.execute("select m from system.onerow")
-                    r = cur.fetchone()
-                    cur.close()
-                    if self.autocommitmode != True:
-                        self.rollback()
-                    if r:
-                        return True
-                    else:
-                        return False
-                except(Exception):
-                    return False
+                return self._ping()
             else:
                 return True
 
+    def _ping(self):
+        """Run a query to check that the connection works"""
+        if self._session is None:
+            return False
+        try:
+            cur = self.execute("select m from system.onerow")
+            r = cur.fetchone()
+            cur.close()
+            if self.autocommitmode != True:
+                self.rollback()
+            if r:
+                return True
+            else:
+                return False
+        except(Exception):
+            return False
+
+    def _expired(self, now):
+        """True if the connection has passed its max_lifetime"""
+        return self._expires is not None and now >= self._expires
+
     def __del__(self):
         """Ensure leaked connections do not break pool state."""
         try:
@@ -306,3 +565,52 @@ class PooledConnection(Connection):
         """Support for the with statement
         """
         self.close()
+
+
+def _close_quietly(con):
+    # Truly close a pooled connection, ignoring errors from a broken one.
+    try:
+        con._close()
+    except Exception:
+        pass
+
+
+class _BrokenConnectionHook:
+    """Errorhandler of a pooled connection, marking it as broken when
+    is_broken_error says so before calling the original errorhandler."""
+
+    def __init__(self, errorhandler, is_broken_error):
+        self.errorhandler = errorhandler
+        self.is_broken_error = is_broken_error
+
+    def __call__(self, connection, cursor, errorclass, errorvalue):
+        con = connection if connection is not None else getattr(cursor, 'connection', None)
+        if con is not None:
+            try:
+                if self.is_broken_error(errorclass, errorvalue):
+                    con._broken = True
+            except Exception:
+                pass
+        return self.errorhandler(connection, cursor, errorclass, errorvalue)
+
+
+def _communication_error(errorclass, errorvalue):
+    # Mimer SQL communication errors, the connection to the server is lost.
+    try:
+        return -18999 <= errorvalue[0] <= -18000
+    except (TypeError, IndexError):
+        return False
+
+
+def _maintenance_loop(pool_ref, stop, interval):
+    # Body of the maintenance thread. Only a weak reference to the pool is
+    # kept, so an unreferenced pool can still be garbage collected.
+    while not stop.wait(interval):
+        pool = pool_ref()
+        if pool is None:
+            return
+        try:
+            pool._maintain()
+        except Exception:
+            pass
+        del pool
@@ -0,0 +1,285 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+"""
+Column-oriented result sets built on the array module.
+
+Every column is stored in its own typed buffer: native integer, floating
+point and boolean values in an array.array, and all other values encoded
+into one byte string per column with an offset index, UTF-8 for character
+data. NULLs are recorded in a bitmap per column. Values are decoded only
+when they are read, so a result set takes a fraction of the memory of a
+list of tuples and needs no packages outside the standard library.
+"""
+
+import pickle
+from array import array
+
+from . import mimerapi
+from .resultstore import (_decode_text, _decode_int, _decode_decimal,
+                          _decode_date, _decode_time, _decode_datetime,
+                          _encode_uuid, _decode_uuid)
+
+
+def _encode_str(value):
+    return str(value).encode('utf-8')
+
+
+_BITS = bytes.maketrans(b'\x00\x01', b'01')
+
+def _pack_bits(mask):
+    # Pack a byte per value mask into a bitmap, or None if nothing is set.
+    if 1 not in mask:
+        return None
+    bits = int(mask.translate(_BITS)[::-1], 2)
+    return bits.to_bytes((len(mask) + 7) // 8, 'little')
+
+
+class _Column:
+    # Values of one column. While rows are appended NULLs are recorded in
+    # a byte mask, which finish() packs into a bitmap. append() takes the
+    # value returned by getter, append_value() a decoded Python value.
+    __slots__ = ('column_type', 'getter', 'mask', 'nulls', 'count')
+
+    def __init__(self, column_type, getter=None):
+        self.column_type = column_type
+        self.getter = getter
+        self.mask = bytearray()
+        self.nulls = None
+        self.count = 0
+
+    def __len__(self):
+        return self.count if self.mask is None else len(self.mask)
+
+    def finish(self):
+        if self.mask is not None:
+            self.count = len(self.mask)
+            self.nulls = _pack_bits(self.mask)
+            self.mask = None
+
+    def is_null(self, index):
+        nulls = self.nulls
+        return nulls is not None and nulls[index >> 3] >> (index & 7) & 1
+
+    def _nbytes(self):
+        return len(self.nulls) if self.nulls is not None else 0
+
+
+class _ArrayColumn(_Column):
+    __slots__ = ('values', '_convert')
+
+    def __init__(self, column_type, typecode, convert=None):
+        super().__init__(column_type)
+        self.values = array(typecode)
+        self._convert = convert
+
+    def append(self, value):
+        if value is None:
+            self.values.append(0)
+            self.mask.append(1)
+        else:
+            self.values.append(value)
+            self.mask.append(0)
+
+    append_value = append
+
+    def get(self, index):
+        if self.is_null(index):
+            return None
+        if self._convert is None:
+            return self.values[index]
+        return self._convert(self.values[index])
+
+    @property
+    def nbytes(self):
+        return len(self.values) * self.values.itemsize + self._nbytes()
+
+
+class _VarColumn(_Column):
+    __slots__ = ('data', 'offsets', '_encode', '_decode')
+
+    def __init__(self, column_type, encode, decode, getter=None):
+        super().__init__(column_type, getter)
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+        self._encode = encode
+        self._decode = decode
+
+    def append(self, value):
+        if value is None:
+            self.mask.append(1)
+        else:
+            self.data += self._encode(value)
+            self.mask.append(0)
+        try:
+            self.offsets.append(len(self.data))
+        except OverflowError:
+            # More than 4 GB of data, switch to 64 bit offsets
+            self.offsets = array('Q', self.offsets)
+            self.offsets.append(len(self.data))
+
+    # Encoding takes the string form, which decoded values give as well
+    append_value = append
+
+    def get(self, index):
+        if self.is_null(index):
+            return None
+        return self._decode(bytes(self.data[self.offsets[index]:
+                                            self.offsets[index + 1]]))
+
+    @property
+    def nbytes(self):
+        return (len(self.data) + len(self.offsets) * self.offsets.itemsize
+                + self._nbytes())
+
+
+def _decode_location(raw):
+    values = array('d')
+    values.frombytes(raw)
+    return tuple(values)
+
+def _encode_location(value):
+    return array('d', value).tobytes()
+
+# (typecode, convert) of the columns stored in an array.array
+_ARRAY_COLUMNS = {
+    mimerapi.MIMER_TYPE_T_INTEGER: ('i', None),
+    mimerapi.MIMER_TYPE_NATIVE_SMALLINT_NULLABLE: ('i', None),
+    mimerapi.MIMER_TYPE_NATIVE_INTEGER_NULLABLE: ('i', None),
+    mimerapi.MIMER_TYPE_N_TINYINT_NULLABLE: ('i', None),
+    mimerapi.MIMER_TYPE_NATIVE_BIGINT_NULLABLE: ('q', None),
+    mimerapi.MIMER_TYPE_GOLDEN_INTEGER: ('q', None),
+    mimerapi.MIMER_TYPE_T_DOUBLE: ('d', None),
+    mimerapi.MIMER_TYPE_DOUBLE: ('d', None),
+    mimerapi.MIMER_NATIVE_REAL_NULLABLE: ('f', None),
+    mimerapi.MIMER_TYPE_LATITUDE: ('d', None),
+    mimerapi.MIMER_TYPE_LONGITUDE: ('d', None),
+    mimerapi.MIMER_TYPE_BOOLEAN: ('b', bool),
+}
+
+# (encode, decode, raw) of the columns stored as byte strings. Columns with
+# raw set are fetched as strings by forward cursors, so the value object is
+# only built when it is read.
+_VAR_COLUMNS = {
+    mimerapi.MIMER_TYPE_INTEGER: (_encode_str, _decode_int, False),
+    mimerapi.MIMER_TYPE_DECIMAL: (_encode_str, _decode_decimal, True),
+    mimerapi.MIMER_TYPE_NUMERIC: (_encode_str, _decode_decimal, True),
+    mimerapi.MIMER_TYPE_GOLDEN_DECIMAL: (_encode_str, _decode_decimal, True),
+    mimerapi.MIMER_TYPE_FLOAT: (_encode_str, _decode_decimal, False),
+    mimerapi.MIMER_TYPE_DATE: (_encode_str, _decode_date, True),
+    mimerapi.MIMER_TYPE_TIME: (_encode_str, _decode_time, True),
+    mimerapi.MIMER_TYPE_TIMESTAMP: (_encode_str, _decode_datetime, True),
+    mimerapi.MIMER_TYPE_UUID: (_encode_uuid, _decode_uuid, False),
+    mimerapi.MIMER_TYPE_BINARY: (bytes, bytes, False),
+    mimerapi.MIMER_TYPE_BINARY_VARYING: (bytes, bytes, False),
+    mimerapi.MIMER_TYPE_BLOB: (bytes, bytes, False),
+    mimerapi.MIMER_TYPE_LOCATION: (_encode_location, _decode_location, False),
+}
+for _code in (mimerapi.MIMER_TYPE_CHARACTER,
+              mimerapi.MIMER_TYPE_CHARACTER_VARYING,
+              mimerapi.MIMER_TYPE_NCHAR,
+              mimerapi.MIMER_TYPE_NCHAR_VARYING,
+              mimerapi.MIMER_TYPE_UTF8,
+              mimerapi.MIMER_TYPE_CLOB,
+              mimerapi.MIMER_TYPE_NCLOB,
+              *range(mimerapi.MIMER_TYPE_INTERVAL_YEAR,
+                     mimerapi.MIMER_TYPE_INTERVAL_MINUTE_TO_SECOND + 1)):
+    _VAR_COLUMNS[_code] = (_encode_str, _decode_text, False)
+
+_PICKLE_COLUMN = (pickle.dumps, pickle.loads, False)
+
+
+def new_columns(column_types):
+    """Return empty column buffers for columns of the given type codes."""
+    columns = []
+    for column_type in column_types:
+        spec = _ARRAY_COLUMNS.get(column_type)
+        if spec is not None:
+            columns.append(_ArrayColumn(column_type, *spec))
+            continue
+        encode, decode, raw = _VAR_COLUMNS.get(column_type, _PICKLE_COLUMN)
+        getter = mimerapi.mimerGetString8 if raw else None
+        columns.append(_VarColumn(column_type, encode, decode, getter))
+    return columns
+
+
+class ResultSet:
+    """
+        Read-only, column-oriented result set.
+
+        Rows are read by index, as tuples, or by iteration, and a slice
+        returns a new ResultSet sharing the column buffers. column()
+        returns the values of one column, by name or position. Negative
+        indexes count from the end, as for a list.
+
+    """
+
+    def __init__(self, names, columns, rows=None):
+        self.names = tuple(names)
+        self._columns = tuple(columns)
+        if rows is None:
+            for column in self._columns:
+                column.finish()
+            rows = range(len(self._columns[0]) if self._columns else 0)
+        self._rows = rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __repr__(self):
+        return '<ResultSet %d rows x %d columns>' % (len(self), len(self.names))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ResultSet(self.names, self._columns, self._rows[index])
+        try:
+            row = self._rows[index]
+        except IndexError:
+            raise IndexError('result set index out of range') from None
+        return tuple(column.get(row) for column in self._columns)
+
+    def __iter__(self):
+        getters = [column.get for column in self._columns]
+        for row in self._rows:
+            yield tuple([get(row) for get in getters])
+
+    def __eq__(self, other):
+        if isinstance(other, (ResultSet, list, tuple)):
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def column(self, key):
+        """Return the values of a column, given by name or position, as a list."""
+        if isinstance(key, str):
+            try:
+                key = self.names.index(key)
+            except ValueError:
+                raise KeyError(key) from None
+        get = self._columns[key].get
+        return [get(row) for row in self._rows]
+
+    @property
+    def nbytes(self):
+        """Number of bytes used by the column buffers."""
+        return sum(column.nbytes for column in self._columns)
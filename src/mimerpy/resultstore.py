@@ -0,0 +1,383 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+"""
+Compact storage of result sets for client side scroll cursors.
+
+Rows are stored in blocks of a fixed number of rows. Within a block every
+column has its own typed buffer, chosen from its Mimer type code: an array
+of fixed size values for the native numeric types, or the encoded values
+with an offset index for the others, each preceded by a null bitmap. Once
+the blocks grow past the memory limit they are moved to a temporary file,
+which is memory mapped for reading when the result set is complete. As
+every block holds the same number of rows, any row is found in O(1), and
+rows are decoded only when they are read.
+"""
+
+import decimal
+import mmap
+import struct
+import tempfile
+import uuid
+from array import array
+from datetime import date
+
+from . import mimerapi
+from .mimPyErrorCodes import mimerpy_error
+from .mimPyExceptions import NotSupportedError
+from .utils import tolerant_fromiso_datetime, tolerant_fromiso_time
+
+# Default number of bytes kept in memory before the store spills to disk
+MEMORY_LIMIT = 64 * 1024 * 1024
+
+# Size of the write buffer used once the store has spilled to disk
+_SPILL_CHUNK = 1024 * 1024
+
+# Number of rows in a block
+_BLOCK_ROWS = 1024
+
+_BITS = bytes.maketrans(b'\x00\x01', b'01')
+
+_OFFSETS = {4: struct.Struct('=II'), 8: struct.Struct('=QQ')}
+
+
+def _pack_bits(mask):
+    # Pack a byte per value mask into a bitmap.
+    if 1 not in mask:
+        return bytes((len(mask) + 7) // 8)
+    bits = int(mask.translate(_BITS)[::-1], 2)
+    return bits.to_bytes((len(mask) + 7) // 8, 'little')
+
+
+class _FixedCodec:
+    # Values of a fixed size, built up in an array.array. A value made of
+    # several numbers, as a location, has them stored one after the other.
+    __slots__ = ('typecode', 'null', 'size', '_unpack_from', '_single')
+
+    def __init__(self, typecode, count=1):
+        s = struct.Struct('=' + typecode * count)
+        self.typecode = typecode
+        self.null = (0,) * count
+        self.size = s.size
+        self._unpack_from = s.unpack_from
+        self._single = count == 1
+
+    def new_buffer(self):
+        return array(self.typecode)
+
+    def append(self, buffer, value):
+        if self._single:
+            buffer.append(value)
+        else:
+            buffer.extend(value)
+
+    def append_null(self, buffer):
+        buffer.extend(self.null)
+
+    def encode(self, buffer):
+        return buffer.tobytes()
+
+    def get(self, data, pos, count, index):
+        values = self._unpack_from(data, pos + index * self.size)
+        return values[0] if self._single else values
+
+
+class _VarBuffer:
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self):
+        self.data = bytearray()
+        self.offsets = array('I', [0])
+
+
+class _VarCodec:
+    # Values encoded as byte strings, stored one after the other with an
+    # index of their end offsets. The offsets are 32 bits wide unless the
+    # values of a block take more than 4 GB.
+    __slots__ = ('_to_bytes', '_from_bytes')
+
+    def __init__(self, to_bytes, from_bytes):
+        self._to_bytes = to_bytes
+        self._from_bytes = from_bytes
+
+    def new_buffer(self):
+        return _VarBuffer()
+
+    def append(self, buffer, value):
+        buffer.data += self._to_bytes(value)
+        try:
+            buffer.offsets.append(len(buffer.data))
+        except OverflowError:
+            buffer.offsets = array('Q', buffer.offsets)
+            buffer.offsets.append(len(buffer.data))
+
+    def append_null(self, buffer):
+        buffer.offsets.append(buffer.offsets[-1])
+
+    def encode(self, buffer):
+        offsets = buffer.offsets
+        return (bytes((offsets.itemsize,)) + offsets.tobytes()
+                + bytes(buffer.data))
+
+    def get(self, data, pos, count, index):
+        width = data[pos]
+        pos += 1
+        start, end = _OFFSETS[width].unpack_from(data, pos + index * width)
+        pos += (count + 1) * width
+        return self._from_bytes(bytes(data[pos + start:pos + end]))
+
+
+def _encode_text(value):
+    return value.encode('utf-8')
+
+def _decode_text(raw):
+    return raw.decode('utf-8')
+
+def _encode_str(value):
+    return str(value).encode('ascii')
+
+def _decode_int(raw):
+    return int(raw)
+
+def _decode_decimal(raw):
+    return decimal.Decimal(raw.decode('ascii'))
+
+def _decode_date(raw):
+    return date.fromisoformat(raw.decode('ascii'))
+
+def _encode_isoformat(value):
+    return value.isoformat().encode('ascii')
+
+def _decode_time(raw):
+    return tolerant_fromiso_time(raw.decode('ascii'))
+
+def _decode_datetime(raw):
+    return tolerant_fromiso_datetime(raw.decode('ascii'))
+
+def _encode_uuid(value):
+    return value.bytes
+
+def _decode_uuid(raw):
+    return uuid.UUID(bytes=raw)
+
+_INT32_CODEC = _FixedCodec('i')
+_INT64_CODEC = _FixedCodec('q')
+_BOOLEAN_CODEC = _FixedCodec('b')
+_DOUBLE_CODEC = _FixedCodec('d')
+_REAL_CODEC = _FixedCodec('f')
+_LOCATION_CODEC = _FixedCodec('d', 2)
+_TEXT_CODEC = _VarCodec(_encode_text, _decode_text)
+_BYTES_CODEC = _VarCodec(bytes, bytes)
+_BIGINT_CODEC = _VarCodec(_encode_str, _decode_int)
+_DECIMAL_CODEC = _VarCodec(_encode_str, _decode_decimal)
+_DATE_CODEC = _VarCodec(_encode_isoformat, _decode_date)
+_TIME_CODEC = _VarCodec(_encode_isoformat, _decode_time)
+_DATETIME_CODEC = _VarCodec(_encode_isoformat, _decode_datetime)
+_UUID_CODEC = _VarCodec(_encode_uuid, _decode_uuid)
+
+_CODECS = {
+    mimerapi.MIMER_TYPE_T_INTEGER: _INT32_CODEC,
+    mimerapi.MIMER_TYPE_NATIVE_SMALLINT_NULLABLE: _INT32_CODEC,
+    mimerapi.MIMER_TYPE_NATIVE_INTEGER_NULLABLE: _INT32_CODEC,
+    mimerapi.MIMER_TYPE_N_TINYINT_NULLABLE: _INT32_CODEC,
+    mimerapi.MIMER_TYPE_NATIVE_BIGINT_NULLABLE: _INT64_CODEC,
+    mimerapi.MIMER_TYPE_GOLDEN_INTEGER: _INT64_CODEC,
+    mimerapi.MIMER_TYPE_BOOLEAN: _BOOLEAN_CODEC,
+    mimerapi.MIMER_TYPE_INTEGER: _BIGINT_CODEC,
+    mimerapi.MIMER_TYPE_T_DOUBLE: _DOUBLE_CODEC,
+    mimerapi.MIMER_TYPE_DOUBLE: _DOUBLE_CODEC,
+    mimerapi.MIMER_NATIVE_REAL_NULLABLE: _REAL_CODEC,
+    mimerapi.MIMER_TYPE_LATITUDE: _DOUBLE_CODEC,
+    mimerapi.MIMER_TYPE_LONGITUDE: _DOUBLE_CODEC,
+    mimerapi.MIMER_TYPE_LOCATION: _LOCATION_CODEC,
+    mimerapi.MIMER_TYPE_DECIMAL: _DECIMAL_CODEC,
+    mimerapi.MIMER_TYPE_NUMERIC: _DECIMAL_CODEC,
+    mimerapi.MIMER_TYPE_FLOAT: _DECIMAL_CODEC,
+    mimerapi.MIMER_TYPE_GOLDEN_DECIMAL: _DECIMAL_CODEC,
+    mimerapi.MIMER_TYPE_DATE: _DATE_CODEC,
+    mimerapi.MIMER_TYPE_TIME: _TIME_CODEC,
+    mimerapi.MIMER_TYPE_TIMESTAMP: _DATETIME_CODEC,
+    mimerapi.MIMER_TYPE_UUID: _UUID_CODEC,
+    mimerapi.MIMER_TYPE_BINARY: _BYTES_CODEC,
+    mimerapi.MIMER_TYPE_BINARY_VARYING: _BYTES_CODEC,
+    mimerapi.MIMER_TYPE_BLOB: _BYTES_CODEC,
+}
+for _code in (mimerapi.MIMER_TYPE_CHARACTER,
+              mimerapi.MIMER_TYPE_CHARACTER_VARYING,
+              mimerapi.MIMER_TYPE_NCHAR,
+              mimerapi.MIMER_TYPE_NCHAR_VARYING,
+              mimerapi.MIMER_TYPE_UTF8,
+              mimerapi.MIMER_TYPE_CLOB,
+              mimerapi.MIMER_TYPE_NCLOB,
+              *range(mimerapi.MIMER_TYPE_INTERVAL_YEAR,
+                     mimerapi.MIMER_TYPE_INTERVAL_MINUTE_TO_SECOND + 1)):
+    _CODECS[_code] = _TEXT_CODEC
+
+
+def _codec(column_type):
+    try:
+        return _CODECS[column_type]
+    except KeyError:
+        raise NotSupportedError((-25000, "%s: column type %d" % (
+            mimerpy_error[-25000], column_type))) from None
+
+
+class ResultStore:
+    """
+        Append-only store of encoded rows with random access.
+
+        Rows are added with append() while the result set is read and
+        finish() must be called before rows are read back by index or
+        slice. Negative indexes count from the end, as for a list.
+        NotSupportedError is raised for a column type without a typed
+        encoding.
+
+    """
+
+    def __init__(self, column_types, memory_limit=MEMORY_LIMIT):
+        self._codecs = tuple(_codec(t) for t in column_types)
+        self._memory_limit = memory_limit
+        self._count = 0
+        self._blocks = array('Q')
+        self._size = 0
+        self._buffer = bytearray()
+        self._file = None
+        self._map = None
+        self._data = self._buffer
+        self._cached = None
+        self.__new_block()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def spilled(self):
+        """True if the rows are stored in a temporary file."""
+        return self._file is not None
+
+    def append(self, row):
+        for codec, buffer, mask, value in zip(self._codecs, self._buffers,
+                                              self._masks, row):
+            if value is None:
+                codec.append_null(buffer)
+                mask.append(1)
+            else:
+                codec.append(buffer, value)
+                mask.append(0)
+        self._count += 1
+        if self._count % _BLOCK_ROWS == 0:
+            self.__seal()
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def finish(self):
+        """Complete the store and make the rows readable."""
+        if len(self._blocks) * _BLOCK_ROWS < self._count:
+            self.__seal()
+        if self._file is not None and self._map is None:
+            self.__flush()
+            self._file.flush()
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data = self._map
+
+    def __new_block(self):
+        self._buffers = [codec.new_buffer() for codec in self._codecs]
+        self._masks = [bytearray() for _ in self._codecs]
+
+    def __seal(self):
+        # Encode the rows built up into a block: the start of the section
+        # of every column followed by the sections, each a null bitmap and
+        # the typed values.
+        sections = []
+        starts = array('Q')
+        pos = len(self._codecs) * starts.itemsize
+        for codec, buffer, mask in zip(self._codecs, self._buffers, self._masks):
+            section = _pack_bits(mask) + codec.encode(buffer)
+            starts.append(pos)
+            pos += len(section)
+            sections.append(section)
+        self.__new_block()
+        self._blocks.append(self._size)
+        self._size += pos
+        self._buffer += starts.tobytes()
+        for section in sections:
+            self._buffer += section
+        if self._file is None:
+            if len(self._buffer) > self._memory_limit:
+                self._file = tempfile.TemporaryFile(prefix='mimerpy')
+                self.__flush()
+        elif len(self._buffer) >= _SPILL_CHUNK:
+            self.__flush()
+
+    def __flush(self):
+        self._file.write(self._buffer)
+        del self._buffer[:]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.__row(i) for i in range(*index.indices(len(self)))]
+        n = len(self)
+        if index < 0:
+            index += n
+        if index < 0 or index >= n:
+            raise IndexError('result set index out of range')
+        return self.__row(index)
+
+    def __row(self, index):
+        block, index = divmod(index, _BLOCK_ROWS)
+        data = self._data
+        if block != self._cached:
+            # Locate the sections of the block, kept for the next row
+            start = self._blocks[block]
+            starts = array('Q')
+            starts.frombytes(data[start:start + len(self._codecs) * starts.itemsize])
+            self._rows = min(self._count - block * _BLOCK_ROWS, _BLOCK_ROWS)
+            values = (self._rows + 7) // 8
+            self._sections = tuple(start + pos for pos in starts)
+            self._values = tuple(start + pos + values for pos in starts)
+            self._cached = block
+        count = self._rows
+        byte, bit = index >> 3, index & 7
+        row = []
+        for codec, nulls, pos in zip(self._codecs, self._sections, self._values):
+            if data[nulls + byte] >> bit & 1:
+                row.append(None)
+            else:
+                row.append(codec.get(data, pos, count, index))
+        return tuple(row)
+
+    def close(self):
+        """Release the memory and the temporary file used by the store."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._buffer = bytearray()
+        self._data = self._buffer
+        self._blocks = array('Q')
+        self._size = 0
+        self._count = 0
+        self._cached = None
+        self.__new_block()
@@ -0,0 +1,93 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+"""
+Cache of prepared statements shared by the cursors of a connection.
+"""
+
+import collections
+from . import mimerapi
+
+# Default number of idle prepared statements kept per connection
+DEFAULT_SIZE = 32
+
+
+class StatementCache:
+    """
+        LRU cache of prepared statements.
+
+        Statements are keyed by their SQL text and the option they were
+        prepared with. A cursor takes a statement out of the cache with
+        checkout() and gives it back with checkin() when it is done with
+        it, so a statement is never used by two cursors at the same time.
+        The cursor's bind plan for the statement is kept together with it.
+        When more than maxsize statements are idle, the least recently used
+        one is ended. A maxsize of 0 disables the cache.
+
+        clear() starts a new generation. A statement checked out before
+        that is ended when it is checked in, since it may refer to objects
+        that have changed since it was prepared.
+
+    """
+
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+        self.__statements = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.__statements)
+
+    def checkout(self, key):
+        """Return (statement, bind_plan) for an idle statement, or None."""
+        entry = self.__statements.pop(key, None)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def checkin(self, key, statement, bind_plan=None, generation=None):
+        """Return a statement to the cache, ending it if it is not kept.
+
+        generation is the cache generation when the statement was checked
+        out or prepared. Statements from an earlier generation are ended.
+        """
+        if (self.maxsize <= 0 or key in self.__statements or
+                (generation is not None and generation != self.generation)):
+            mimerapi.mimerEndStatement(statement)
+            return
+        mimerapi.mimerClearBuffers(statement)
+        self.__statements[key] = (statement, bind_plan)
+        while len(self.__statements) > self.maxsize:
+            _, (evicted, _) = self.__statements.popitem(last=False)
+            mimerapi.mimerEndStatement(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        """End all idle statements and start a new generation."""
+        self.generation += 1
+        while self.__statements:
+            _, (statement, _) = self.__statements.popitem(last=False)
+            mimerapi.mimerEndStatement(statement)
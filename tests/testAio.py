@@ -0,0 +1,191 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+
+import asyncio
+import unittest
+import mimerpy
+import db_config
+
+from mimerpy import aio
+from mimerpy.pool import MimerPoolError, MimerPoolExhausted
+
+class TestAsyncConnection(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        (self.syscon, self.tstcon) = db_config.setup()
+        with self.tstcon.cursor() as c:
+            c.execute("create table aiotab (c1 INTEGER, c2 NVARCHAR(20))"
+                      " in pybank")
+        self.tstcon.commit()
+
+    @classmethod
+    def tearDownClass(self):
+        db_config.teardown(tstcon=self.tstcon, syscon=self.syscon)
+
+    def tearDown(self):
+        with self.tstcon.cursor() as c:
+            c.execute("delete from aiotab")
+        self.tstcon.commit()
+
+    def test_execute_fetch(self):
+        async def run():
+            async with await aio.connect(**db_config.TSTUSR) as con:
+                await con.executemany("insert into aiotab values (?, ?)",
+                                      [(i, str(i)) for i in range(100)])
+                await con.commit()
+                cur = await con.execute("select c1 from aiotab order by c1")
+                first = await cur.fetchone()
+                some = await cur.fetchmany(4)
+                rest = await cur.fetchall()
+                await cur.close()
+                return first, some, rest
+        first, some, rest = asyncio.run(run())
+        self.assertEqual(first, (0,))
+        self.assertEqual(some, [(1,), (2,), (3,), (4,)])
+        self.assertEqual(rest, [(i,) for i in range(5, 100)])
+
+    def test_async_for(self):
+        async def run():
+            async with await aio.connect(**db_config.TSTUSR) as con:
+                cur = await con.cursor(prefetch=7)
+                await cur.executemany("insert into aiotab values (?, ?)",
+                                      [(i, str(i)) for i in range(50)])
+                await cur.execute("select c1, c2 from aiotab order by c1")
+                rows = [row async for row in cur]
+                await cur.execute("select count(*) from aiotab")
+                count = await cur.fetchone()
+                await con.rollback()
+                return rows, count
+        rows, count = asyncio.run(run())
+        self.assertEqual(rows, [(i, str(i)) for i in range(50)])
+        self.assertEqual(count, (50,))
+
+    def test_cancel(self):
+        async def run():
+            async with await aio.connect(**db_config.TSTUSR) as con:
+                cur = await con.cursor()
+                await cur.execute("select * from system.manyrows, system.manyrows")
+                async def consume():
+                    async for row in cur:
+                        pass
+                task = asyncio.ensure_future(consume())
+                await asyncio.sleep(0.01)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                with self.assertRaises(mimerpy.ProgrammingError):
+                    await cur.fetchone()
+                cur = await con.execute("select count(*) from aiotab")
+                return await cur.fetchone()
+        self.assertEqual(asyncio.run(run()), (0,))
+
+    def test_closed(self):
+        async def run():
+            con = await aio.connect(**db_config.TSTUSR)
+            await con.close()
+            with self.assertRaises(mimerpy.ProgrammingError):
+                await con.cursor()
+        asyncio.run(run())
+
+class TestAsyncMimerPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        (self.syscon, self.tstcon) = db_config.setup()
+
+    @classmethod
+    def tearDownClass(self):
+        db_config.teardown(tstcon=self.tstcon, syscon=self.syscon)
+
+    def test_acquire(self):
+        async def run():
+            pool = aio.AsyncMimerPool(initialconnections=2, **db_config.TSTUSR)
+            async with pool:
+                self.assertEqual(pool.cached_connections, 2)
+                async with pool.acquire() as con:
+                    self.assertEqual(pool.used_connections, 1)
+                    cur = await con.execute("select m from system.onerow")
+                    self.assertEqual(await cur.fetchone(), ('x',))
+                self.assertEqual(pool.used_connections, 0)
+                self.assertEqual(pool.cached_connections, 2)
+                con = await pool.acquire()
+                await con.close()
+                await con.close()
+                self.assertEqual(pool.connections, 2)
+            self.assertEqual(pool.connections, 0)
+        asyncio.run(run())
+
+    def test_maxunused_unlimited(self):
+        async def run():
+            async with aio.AsyncMimerPool(maxunused=1,
+                                          **db_config.TSTUSR) as pool:
+                con = await pool.acquire()
+                await con.close()
+                self.assertEqual(pool.cached_connections, 1)
+                self.assertIs(await pool.acquire(), con)
+                await con.close()
+        asyncio.run(run())
+
+    def test_fifo_waiters(self):
+        async def run():
+            pool = aio.AsyncMimerPool(initialconnections=2, maxconnections=2,
+                                      block=True, **db_config.TSTUSR)
+            order = []
+            async def job(i):
+                async with pool.acquire() as con:
+                    order.append(i)
+                    await asyncio.sleep(0.01)
+            async with pool:
+                await asyncio.gather(*(job(i) for i in range(8)))
+                self.assertLessEqual(pool.connections, 2)
+            return order
+        # The first two jobs get a connection at once, the rest wait in turn
+        order = asyncio.run(run())
+        self.assertEqual(sorted(order[:2]), [0, 1])
+        self.assertEqual(order[2:], list(range(2, 8)))
+
+    def test_exhausted(self):
+        async def run():
+            async with aio.AsyncMimerPool(maxconnections=1,
+                                          **db_config.TSTUSR) as pool:
+                con = await pool.acquire()
+                with self.assertRaises(MimerPoolExhausted):
+                    await pool.acquire()
+                await con.close()
+            async with aio.AsyncMimerPool(maxconnections=1, block=True,
+                                          **db_config.TSTUSR) as pool:
+                con = await pool.acquire()
+                with self.assertRaises(MimerPoolExhausted):
+                    await pool.acquire(timeout=0.05)
+                waiter = asyncio.ensure_future(pool.acquire())
+                await asyncio.sleep(0.01)
+                await con.close()
+                self.assertIs(await waiter, con)
+                waiter = asyncio.ensure_future(pool.acquire())
+                await asyncio.sleep(0.01)
+            with self.assertRaises(MimerPoolError):
+                await waiter
+        asyncio.run(run())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+
+import unittest
+import mimerpy
+import db_config
+
+from mimerpy.bulk import ParallelLoader
+from mimerpy.pool import MimerPool
+
+class TestParallelLoader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        (self.syscon, self.tstcon) = db_config.setup()
+        with self.tstcon.cursor() as c:
+            c.execute("create table bulkload (c1 INTEGER, c2 NVARCHAR(20))"
+                      " in pybank")
+        self.tstcon.commit()
+
+    @classmethod
+    def tearDownClass(self):
+        db_config.teardown(tstcon=self.tstcon, syscon=self.syscon)
+
+    def tearDown(self):
+        with self.tstcon.cursor() as c:
+            c.execute("delete from bulkload")
+        self.tstcon.commit()
+
+    def test_load_direct(self):
+        progress = []
+        loader = ParallelLoader("insert into bulkload values (?, ?)",
+                                workers=3, batch_size=100, commit_every=250,
+                                progress=progress.append, **db_config.TSTUSR)
+        result = loader.load((i, str(i)) for i in range(2000))
+        self.assertEqual(result.rows_read, 2000)
+        self.assertEqual(result.rows_loaded, 2000)
+        self.assertEqual(result.failed, [])
+        self.assertIs(progress[-1], result)
+        with self.tstcon.cursor() as c:
+            c.execute("select count(*), sum(c1) from bulkload")
+            self.assertEqual(c.fetchone(), (2000, sum(range(2000))))
+
+    def test_load_rejects_failed_batch(self):
+        rows = [(i, str(i)) for i in range(1000)]
+        rows[555] = (555, 'x' * 100)
+        with MimerPool(**db_config.TSTUSR) as pool:
+            loader = ParallelLoader("insert into bulkload values (?, ?)",
+                                    pool=pool, workers=2, batch_size=100)
+            result = loader.load(rows)
+        self.assertEqual(result.rows_loaded, 900)
+        self.assertEqual(len(result.failed), 1)
+        self.assertEqual(result.failed[0].rows, rows[500:600])
+        with self.tstcon.cursor() as c:
+            c.execute("select count(*) from bulkload")
+            self.assertEqual(c.fetchone(), (900,))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,335 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+
+import decimal
+import os
+import tempfile
+import unittest
+import mimerpy
+
+from mimerpy.mimPyExceptions import *
+import db_config
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+@unittest.skipIf(numpy is None, "Requires numpy")
+class TestColumnarMethods(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        (self.syscon, self.tstcon) = db_config.setup()
+
+    @classmethod
+    def tearDownClass(self):
+        db_config.teardown(tstcon=self.tstcon, syscon=self.syscon)
+
+    def tearDown(self):
+        self.tstcon.rollback()
+
+########################################################################
+## Tests below
+########################################################################
+
+    def test_executemany_columns(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table colins (c1 INTEGER, c2 NVARCHAR(20),"
+                      " c3 DOUBLE PRECISION) in pybank")
+            ints = numpy.ma.masked_array(numpy.arange(10),
+                                         mask=[i == 3 for i in range(10)])
+            strs = numpy.array([str(i) for i in range(10)])
+            doubles = numpy.linspace(0.0, 4.5, 10)
+            c.executemany_columns("insert into colins values (?, ?, ?)",
+                                  [ints, strs, doubles], batch_size=4)
+            self.assertEqual(c.rowcount, 10)
+            self.tstcon.commit()
+            c.execute("select * from colins order by c3")
+            self.assertEqual(c.fetchall(),
+                             [(None if i == 3 else i, str(i), i * 0.5)
+                              for i in range(10)])
+
+    def test_executemany_columns_by_name(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table colname (c1 INTEGER, c2 NVARCHAR(20))"
+                      " in pybank")
+            c.executemany_columns("insert into colname values (:a, :b)",
+                                  {'b': ['x', None], 'a': numpy.array([1, 2])})
+            self.tstcon.commit()
+            c.execute("select * from colname order by c1")
+            self.assertEqual(c.fetchall(), [(1, 'x'), (2, None)])
+
+    def test_executemany_columns_invalid(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table colbad (c1 INTEGER, c2 DOUBLE PRECISION)"
+                      " in pybank")
+            query = "insert into colbad values (?, ?)"
+            with self.assertRaises(DataError):
+                c.executemany_columns(query, [numpy.array([1, 2**40]),
+                                              numpy.array([1.0, 2.0])])
+            with self.assertRaises(DataError):
+                c.executemany_columns(query, [numpy.array([1, 2]),
+                                              numpy.array([1.0, numpy.nan])])
+            with self.assertRaises(ProgrammingError):
+                c.executemany_columns(query, [numpy.array([1, 2]),
+                                              numpy.array([1.0])])
+            with self.assertRaises(ProgrammingError):
+                c.executemany_columns(query, [numpy.array([1, 2])])
+            c.execute("select count(*) from colbad")
+            self.assertEqual(c.fetchone(), (0,))
+
+    def test_fetch_columns(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table colfetch (c1 INTEGER, c2 BIGINT,"
+                      " c3 DOUBLE PRECISION, c4 NVARCHAR(20), c5 DATE)"
+                      " in pybank")
+            c.executemany("insert into colfetch values (?, ?, ?, ?, ?)",
+                          [(1, 10, 0.5, 'a', '2020-01-01'),
+                           (None, 20, None, 'b', None),
+                           (3, 30, 1.5, None, '2020-01-03')])
+            self.tstcon.commit()
+            c.execute("select * from colfetch order by c2")
+            cols = c.fetch_columns()
+            self.assertEqual(list(cols), ['c1', 'c2', 'c3', 'c4', 'c5'])
+            self.assertEqual(cols['c1'].dtype, numpy.int32)
+            self.assertEqual(cols['c2'].dtype, numpy.int64)
+            self.assertEqual(cols['c3'].dtype, numpy.float64)
+            self.assertEqual(cols['c5'].dtype, numpy.dtype('datetime64[D]'))
+            self.assertEqual(cols['c1'].tolist(), [1, None, 3])
+            self.assertEqual(cols['c3'].tolist(), [0.5, None, 1.5])
+            self.assertEqual(cols['c4'].tolist(), ['a', 'b', None])
+            self.assertEqual(cols['c2'].tolist(), [10, 20, 30])
+
+    def test_fetchnumpy(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table colnumpy (c1 INTEGER, c2 NVARCHAR(20))"
+                      " in pybank")
+            c.executemany("insert into colnumpy values (?, ?)",
+                          [(i, str(i)) for i in range(10)])
+            self.tstcon.commit()
+            c.execute("select * from colnumpy order by c1")
+            first = c.fetchnumpy(4)
+            rest = c.fetchnumpy()
+            self.assertEqual(first.dtype.names, ('c1', 'c2'))
+            self.assertEqual(first['c1'].tolist(), [0, 1, 2, 3])
+            self.assertEqual(rest['c2'].tolist(), [str(i) for i in range(4, 10)])
+            self.assertEqual(len(c.fetchnumpy()), 0)
+            c.execute("insert into colnumpy values (10, '10')")
+            with self.assertRaises(ProgrammingError):
+                c.fetchnumpy()
+
+@unittest.skipIf(pyarrow is None, "Requires pyarrow")
+class TestArrowMethods(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        (self.syscon, self.tstcon) = db_config.setup()
+
+    @classmethod
+    def tearDownClass(self):
+        db_config.teardown(tstcon=self.tstcon, syscon=self.syscon)
+
+    def tearDown(self):
+        self.tstcon.rollback()
+
+########################################################################
+## Tests below
+########################################################################
+
+    def test_fetch_arrow_batches(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table arrowbatch (c1 INTEGER, c2 BIGINT,"
+                      " c3 DOUBLE PRECISION, c4 NVARCHAR(20), c5 BOOLEAN)"
+                      " in pybank")
+            c.executemany("insert into arrowbatch values (?, ?, ?, ?, ?)",
+                          [(None if i == 2 else i, i * 10, i * 0.5, str(i),
+                            i % 2 == 0) for i in range(5)])
+            self.tstcon.commit()
+            c.execute("select * from arrowbatch order by c2")
+            batches = list(c.fetch_arrow_batches(2))
+            self.assertEqual([b.num_rows for b in batches], [2, 2, 1])
+            schema = batches[0].schema
+            self.assertEqual(schema.names, ['c1', 'c2', 'c3', 'c4', 'c5'])
+            self.assertEqual(schema.types, [pyarrow.int32(), pyarrow.int64(),
+                                            pyarrow.float64(), pyarrow.string(),
+                                            pyarrow.bool_()])
+            table = pyarrow.Table.from_batches(batches)
+            self.assertEqual(table.column('c1').to_pylist(),
+                             [0, 1, None, 3, 4])
+            self.assertEqual(table.column('c5').to_pylist(),
+                             [True, False, True, False, True])
+
+    def test_fetch_arrow_batches_decimal_scale(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table arrowscale (c0 INTEGER, c1 DECIMAL(10,3),"
+                      " c2 FLOAT(10)) in pybank")
+            c.executemany("insert into arrowscale values (?, ?, ?)",
+                          [(0, None, None), (1, None, None),
+                           (2, '1.5', '1.5E3'), (3, '2.125', '-2')])
+            self.tstcon.commit()
+            c.execute("select c1, c2 from arrowscale order by c0")
+            batches = list(c.fetch_arrow_batches(2))
+            self.assertEqual([b.num_rows for b in batches], [2, 2])
+            for batch in batches:
+                self.assertEqual(batch.schema.types,
+                                 [pyarrow.decimal128(38, 3), pyarrow.float64()])
+            table = pyarrow.Table.from_batches(batches)
+            self.assertEqual(table.column('c1').to_pylist(),
+                             [None, None, decimal.Decimal('1.500'),
+                              decimal.Decimal('2.125')])
+            self.assertEqual(table.column('c2').to_pylist(),
+                             [None, None, 1500.0, -2.0])
+
+    def test_fetch_arrow_table(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table arrowtable (c1 DECIMAL(10,2), c2 DATE)"
+                      " in pybank")
+            c.executemany("insert into arrowtable values (?, ?)",
+                          [('1.25', '2020-01-01'), (None, None)])
+            self.tstcon.commit()
+            c.execute("select * from arrowtable order by c1")
+            table = c.fetch_arrow_table()
+            self.assertEqual(table.schema.types, [pyarrow.decimal128(38, 2),
+                                                  pyarrow.date32()])
+            self.assertEqual(table.num_rows, 2)
+            self.assertEqual(c.fetch_arrow_table().num_rows, 0)
+            with self.assertRaises(ProgrammingError):
+                c.fetch_arrow_batches(0)
+
+    def test_export_parquet(self):
+        import pyarrow.parquet
+        with self.tstcon.cursor() as c:
+            c.execute("create table arrowparquet (c1 INTEGER, c2 NVARCHAR(20))"
+                      " in pybank")
+            c.executemany("insert into arrowparquet values (?, ?)",
+                          [(i, 'even' if i % 2 == 0 else 'odd')
+                           for i in range(100)])
+            self.tstcon.commit()
+            with tempfile.TemporaryDirectory() as path:
+                c.execute("select * from arrowparquet order by c1")
+                files = c.export_parquet(os.path.join(path, 'all'),
+                                         row_group_size=10)
+                self.assertEqual(len(files), 1)
+                metadata = pyarrow.parquet.ParquetFile(files[0]).metadata
+                self.assertEqual(metadata.num_row_groups, 10)
+                self.assertEqual(pyarrow.parquet.read_table(files[0])
+                                 .column('c1').to_pylist(), list(range(100)))
+                c.execute("select * from arrowparquet order by c1")
+                files = c.export_parquet(os.path.join(path, 'parts'),
+                                         partition_by='c2')
+                self.assertEqual(sorted(os.path.basename(os.path.dirname(f))
+                                        for f in files),
+                                 ['c2=even', 'c2=odd'])
+                for f in files:
+                    table = pyarrow.parquet.read_table(f)
+                    self.assertEqual(table.column_names, ['c1'])
+                    self.assertEqual(table.num_rows, 50)
+
+@unittest.skipIf(pandas is None, "Requires pandas")
+class TestDataFrameMethods(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        (self.syscon, self.tstcon) = db_config.setup()
+
+    @classmethod
+    def tearDownClass(self):
+        db_config.teardown(tstcon=self.tstcon, syscon=self.syscon)
+
+    def tearDown(self):
+        self.tstcon.rollback()
+
+########################################################################
+## Tests below
+########################################################################
+
+    def test_fetch_dataframe(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table framefetch (c1 INTEGER, c2 DECIMAL(10,2),"
+                      " c3 DATE, c4 TIMESTAMP, c5 NVARCHAR(20)) in pybank")
+            c.executemany("insert into framefetch values (?, ?, ?, ?, ?)",
+                          [(1, '1.25', '2020-01-01', '2020-01-01 10:00:00', 'a'),
+                           (None, None, None, None, None)])
+            self.tstcon.commit()
+            c.execute("select * from framefetch order by c1")
+            frame = c.fetch_dataframe()
+            self.assertEqual(list(frame.columns), ['c1', 'c2', 'c3', 'c4', 'c5'])
+            self.assertEqual(frame['c1'].dtype, numpy.float64)
+            self.assertEqual(frame['c3'].dtype.kind, 'M')
+            self.assertEqual(frame['c4'].dtype.kind, 'M')
+            self.assertEqual(frame['c2'].tolist()[0], decimal.Decimal('1.25'))
+            self.assertTrue(pandas.isna(frame['c3'][1]))
+            c.execute("select * from framefetch order by c1")
+            frame = c.fetch_dataframe(dtype_backend='numpy_nullable',
+                                      decimal='scaled')
+            self.assertEqual(str(frame['c1'].dtype), 'Int32')
+            self.assertEqual(frame['c2'][0], 125)
+            self.assertEqual(frame.attrs['decimal_scale'], {'c2': 2})
+            c.execute("select * from framefetch order by c1")
+            frame = c.fetch_dataframe(decimal='float')
+            self.assertEqual(frame['c2'][0], 1.25)
+
+    def test_fetch_dataframe_chunks(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table framechunk (c1 INTEGER) in pybank")
+            c.executemany("insert into framechunk values (?)",
+                          [(i,) for i in range(10)])
+            self.tstcon.commit()
+            c.execute("select * from framechunk order by c1")
+            chunks = list(c.fetch_dataframe(chunksize=4))
+            self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+            self.assertEqual(chunks[2]['c1'].tolist(), [8, 9])
+            c.execute("select * from framechunk")
+            with self.assertRaises(ProgrammingError):
+                c.fetch_dataframe(decimal='text')
+
+    def test_fetch_dataframe_scaled_chunks(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table framescale (c0 INTEGER, c1 DECIMAL(10,3))"
+                      " in pybank")
+            c.executemany("insert into framescale values (?, ?)",
+                          [(0, None), (1, None), (2, '1.5'), (3, '2.125')])
+            self.tstcon.commit()
+            for backend in (None, 'pyarrow'):
+                c.execute("select c1 from framescale order by c0")
+                chunks = list(c.fetch_dataframe(chunksize=2, decimal='scaled',
+                                                dtype_backend=backend))
+                self.assertEqual(len(chunks), 2)
+                for chunk in chunks:
+                    self.assertEqual(chunk.attrs['decimal_scale'], {'c1': 3})
+                self.assertEqual(chunks[1]['c1'].tolist(), [1500, 2125])
+                self.assertTrue(chunks[0]['c1'].isna().all())
+
+if __name__ == '__main__':
+    unittest.TestLoader.sortTestMethodsUsing = None
+    unittest.main()
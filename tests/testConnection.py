@@ -664,6 +664,52 @@ class TestConnectionMethods(unittest.TestCase):
         b = a.execute("select * from bob6")
         a.close()
 
+    def test_statement_cache(self):
+        con = mimerpy.connect(statement_cache_size=2, **db_config.TSTUSR)
+        cache = con.statement_cache
+        con.execute("create table stmtcache (c1 INTEGER) in pybank")
+        for i in range(5):
+            cur = con.execute("insert into stmtcache values (?)", (i,))
+            cur.close()
+        # One miss for the create table and one for the first insert
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 4)
+        for q in ("select c1 from stmtcache",
+                  "select c1 + 1 from stmtcache",
+                  "select c1 + 2 from stmtcache"):
+            cur = con.execute(q)
+            self.assertEqual(len(cur.fetchall()), 5)
+            cur.close()
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.evictions, 2)
+        con.execute("drop table stmtcache")
+        self.assertEqual(len(cache), 0)
+        con.close()
+
+    def test_statement_cache_ddl(self):
+        con = mimerpy.connect(**db_config.TSTUSR)
+        cache = con.statement_cache
+        con.execute("create table stmtddl (c1 INTEGER) in pybank")
+        cur = con.execute("select c1 from stmtddl")
+        con.execute("alter table stmtddl add c2 INTEGER")
+        cur.close()
+        self.assertEqual(len(cache), 0)
+        cur = con.execute("select c1 from stmtddl")
+        self.assertEqual(cur.fetchall(), [])
+        cur.close()
+        self.assertEqual(len(cache), 1)
+        con.execute("drop table stmtddl")
+        con.close()
+
+    def test_statement_cache_disabled(self):
+        con = mimerpy.connect(statement_cache_size=0, **db_config.TSTUSR)
+        for i in range(3):
+            cur = con.execute("select * from system.onerow")
+            cur.fetchall()
+            cur.close()
+        self.assertEqual(len(con.statement_cache), 0)
+        self.assertEqual(con.statement_cache.hits, 0)
+        con.close()
 
 if __name__ == '__main__':
     unittest.main()
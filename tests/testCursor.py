@@ -20,7 +20,7 @@
 #
 # See license for more details.
 
-import unittest, time, math, random, uuid, decimal, os
+import unittest, time, math, random, uuid, decimal, os, io, json
 import mimerpy
 from mimerpy import mimerapi
 from mimerpy.mimPyExceptions import *
@@ -2283,6 +2283,212 @@ create table longboi (c1 char(10),
         cur.close()
         con.close()
 
+    def test_fetch_wide_row(self):
+        """All fetch methods decode a many-column row identically."""
+        cols = ", ".join("c%d INTEGER" % i for i in range(40))
+        with self.tstcon.cursor() as c:
+            c.execute("create table widefetch (%s) in pybank" % cols)
+            markers = ", ".join("?" * 40)
+            c.executemany("insert into widefetch values (%s)" % markers,
+                          [tuple(range(r, r + 40)) for r in range(5)])
+            c.execute("select * from widefetch order by c0")
+            first = c.fetchone()
+            many = c.fetchmany(2)
+            rest = c.fetchall()
+            self.assertEqual(first, tuple(range(0, 40)))
+            self.assertEqual(many, [tuple(range(1, 41)), tuple(range(2, 42))])
+            self.assertEqual(rest, [tuple(range(3, 43)), tuple(range(4, 44))])
+            self.assertEqual(c.fetchone(), None)
+            c.execute("select * from widefetch order by c0")
+            self.assertEqual([r for r in c], [first] + many + rest)
+
+    def test_fetch_growing_values(self):
+        """Values larger than the initial output buffer are fetched intact."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table growfetch (c1 NVARCHAR(5000),"
+                      " c2 VARBINARY(5000)) in pybank")
+            rows = [("s" * 10, b"b" * 10),
+                    ("s" * 3000, b"b" * 3000),
+                    ("t" * 20, b"c" * 20),
+                    ("u" * 4500, b"d" * 4500)]
+            c.executemany("insert into growfetch values (?, ?)", rows)
+            self.tstcon.commit()
+            c.execute("select * from growfetch")
+            self.assertEqual(sorted(c.fetchall()), sorted(rows))
+
+    def test_iter_batches(self):
+        with self.tstcon.cursor() as c:
+            c.execute("create table iterbatch (c1 INTEGER) in pybank")
+            c.executemany("insert into iterbatch values (?)",
+                          [(i,) for i in range(10)])
+            self.tstcon.commit()
+            c.execute("select c1 from iterbatch order by c1")
+            sizes = []
+            rows = []
+            for batch in c.iter_batches(4):
+                sizes.append(len(batch))
+                rows.extend(batch)
+            self.assertEqual(sizes, [4, 4, 2])
+            self.assertEqual(rows, [(i,) for i in range(10)])
+            c.execute("select c1 from iterbatch order by c1")
+            self.assertEqual(c.fetchone(), (0,))
+            self.assertEqual(list(c.iter_rows(3)), [(i,) for i in range(1, 10)])
+            with self.assertRaises(ProgrammingError):
+                c.iter_batches(0)
+
+    def test_iter_batches_no_select(self):
+        with self.tstcon.cursor() as c:
+            with self.assertRaises(ProgrammingError):
+                c.iter_batches(10)
+
+    def test_bind_plan_reuse(self):
+        """A cached statement binds sequences and mappings correctly."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table bindplan (c1 INTEGER, c2 NVARCHAR(20))"
+                      " in pybank")
+            query = "insert into bindplan values (:a, :b)"
+            c.execute(query, (1, "one"))
+            c.execute(query, {'b': "two", 'a': 2, 'x': 0})
+            c.execute(query, (3, None))
+            c.executemany(query, [(4, "four"), {'a': 5, 'b': "five"}])
+            with self.assertRaises(ProgrammingError):
+                c.executemany(query, [(6,)])
+            with self.assertRaises(ProgrammingError):
+                c.executemany(query, [6])
+            c.execute(query, (7, "seven"))
+            self.tstcon.commit()
+            c.execute("select * from bindplan order by c1")
+            self.assertEqual(c.fetchall(), [(1, "one"), (2, "two"),
+                                            (3, None), (4, "four"),
+                                            (5, "five"), (7, "seven")])
+
+    def test_bind_buffer_reuse(self):
+        """Reused bind buffers do not leak data between parameter sets."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table bindreuse (c1 NVARCHAR(5000),"
+                      " c2 VARBINARY(5000)) in pybank")
+            rows = [("long" * 1000, b"\x01" * 4000),
+                    ("s", b"\x02"),
+                    ("", b""),
+                    ("mid" * 30, b"\x03" * 90)]
+            for row in rows:
+                c.execute("insert into bindreuse values (?, ?)", row)
+            c.executemany("insert into bindreuse values (?, ?)", rows)
+            self.tstcon.commit()
+            c.execute("select * from bindreuse")
+            self.assertEqual(sorted(c.fetchall()), sorted(rows + rows))
+
+    def test_executemany_generator_batches(self):
+        """executemany streams an iterator in batches."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table manybatch (c1 INTEGER, c2 NVARCHAR(20))"
+                      " in pybank")
+            c.executemany("insert into manybatch values (?, ?)",
+                          ((i, str(i)) for i in range(25)), batch_size=10)
+            self.assertEqual(c.rowcount, 25)
+            c.executemany("insert into manybatch values (?, ?)",
+                          iter([(i, str(i)) for i in range(25, 100)]),
+                          adaptive=True)
+            self.assertEqual(c.rowcount, 75)
+            c.executemany("insert into manybatch values (?, ?)", [])
+            self.assertEqual(c.rowcount, 0)
+            with self.assertRaises(ProgrammingError):
+                c.executemany("insert into manybatch values (?, ?)",
+                              [(1, 'a')], batch_size=0)
+            self.tstcon.commit()
+            c.execute("select * from manybatch order by c1")
+            self.assertEqual(c.fetchall(), [(i, str(i)) for i in range(100)])
+
+    def test_fetchall_columnar(self):
+        """fetchall(columnar=True) returns the same rows as a ResultSet."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table fetchcol (c1 INTEGER, c2 NVARCHAR(20),"
+                      " c3 DECIMAL(10,2), c4 DATE) in pybank")
+            rows = [(1, 'one', decimal.Decimal('1.50'), date(2020, 1, 1)),
+                    (2, None, None, None),
+                    (3, 'three', decimal.Decimal('-3.25'), date(2021, 3, 4))]
+            c.executemany("insert into fetchcol values (?, ?, ?, ?)", rows)
+            self.tstcon.commit()
+            c.execute("select * from fetchcol order by c1")
+            result = c.fetchall(columnar=True)
+            self.assertEqual(len(result), 3)
+            self.assertEqual(list(result), rows)
+            self.assertEqual(result[-1], rows[-1])
+            self.assertEqual(list(result[1:]), rows[1:])
+            self.assertEqual(result.column('c2'), ['one', None, 'three'])
+            self.assertEqual(result.column(0), [1, 2, 3])
+            with self.assertRaises(IndexError):
+                result[3]
+            self.assertEqual(len(c.fetchall(columnar=True)), 0)
+            c.execute("select * from fetchcol where c1 > 10")
+            result = c.fetchall(columnar=True)
+            self.assertEqual(len(result), 0)
+            self.assertEqual(list(result), [])
+            self.assertEqual(result.column('c1'), [])
+
+    def test_stream_json(self):
+        """stream_json writes rows as JSON Lines or as a JSON array."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table streamjson (c1 INTEGER, c2 NVARCHAR(20),"
+                      " c3 DECIMAL(10,2), c4 DATE, c5 BOOLEAN) in pybank")
+            c.executemany("insert into streamjson values (?, ?, ?, ?, ?)",
+                          [(1, 'a "quoted" \u00e5', '1.50', '2020-01-01', True),
+                           (2, None, None, None, False)])
+            self.tstcon.commit()
+            c.execute("select * from streamjson order by c1")
+            out = io.StringIO()
+            self.assertEqual(c.stream_json(out), 2)
+            rows = [json.loads(line) for line in out.getvalue().splitlines()]
+            self.assertEqual(rows[0], {'c1': 1, 'c2': 'a "quoted" \u00e5',
+                                       'c3': 1.5, 'c4': '2020-01-01',
+                                       'c5': True})
+            self.assertEqual(rows[1]['c2'], None)
+            c.execute("select c1, c5 from streamjson order by c1")
+            out = io.BytesIO()
+            c.stream_json(out, format='array', row_format='array',
+                          chunk_rows=1)
+            self.assertEqual(json.loads(out.getvalue()), [[1, True], [2, False]])
+            c.execute("select * from streamjson where c1 > 2")
+            out = io.StringIO()
+            self.assertEqual(c.stream_json(out, format='array'), 0)
+            self.assertEqual(json.loads(out.getvalue()), [])
+            c.execute("select * from streamjson")
+            with self.assertRaises(ProgrammingError):
+                c.stream_json(io.StringIO(), format='xml')
+
+    def test_copy_to_copy_from(self):
+        """copy_to and copy_from move rows through CSV and TSV text."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table copysrc (c1 INTEGER, c2 NVARCHAR(20),"
+                      " c3 DECIMAL(10,2), c4 DATE) in pybank")
+            c.execute("create table copydst (c1 INTEGER, c2 NVARCHAR(20),"
+                      " c3 DECIMAL(10,2), c4 DATE) in pybank")
+            rows = [(i, 'name, %d' % i, decimal.Decimal('%d.25' % i),
+                     date(2020, 1, i + 1)) for i in range(10)]
+            rows.append((10, None, None, None))
+            c.executemany("insert into copysrc values (?, ?, ?, ?)", rows)
+            self.tstcon.commit()
+            for format in ('csv', 'tsv'):
+                out = io.StringIO(newline='')
+                self.assertEqual(c.copy_to(out, "select * from copysrc order by c1",
+                                           format=format), 11)
+                out.seek(0)
+                self.assertEqual(c.copy_from(out, "copydst", format=format,
+                                             batch_size=4), 11)
+                self.assertEqual(c.rowcount, 11)
+                c.execute("select * from copydst order by c1")
+                self.assertEqual(c.fetchall(), rows)
+                c.execute("delete from copydst")
+            c.copy_from(io.StringIO("c2,c1\nx,1\n"), "copydst")
+            c.execute("select c1, c2 from copydst")
+            self.assertEqual(c.fetchall(), [(1, 'x')])
+            with self.assertRaises(DataError):
+                c.copy_from(io.StringIO("1,a,x,2020-01-01\n"),
+                            "insert into copydst values (?, ?, ?, ?)",
+                            header=False)
+            with self.assertRaises(ProgrammingError):
+                c.copy_to(io.StringIO(), "select * from copysrc", format='xls')
+
 if __name__ == '__main__':
     unittest.TestLoader.sortTestMethodsUsing = None
     unittest.main()
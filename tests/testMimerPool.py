@@ -319,5 +319,136 @@ class TestMimerPool(unittest.TestCase):
             con1.close()
             con2.close()
 
+    def test_pool_threads(self):
+        """Threads sharing a blocking pool never exceed maxconnections."""
+        import threading
+        errors = []
+        with MimerPool(maxconnections=4, block=True, deep_health_check=True,
+                       dsn=self.DSN, user=self.USER, password=self.PASSWORD) as pool:
+            def work():
+                try:
+                    for _ in range(20):
+                        con = pool.get_connection()
+                        self.assertLessEqual(pool.used_connections, 4)
+                        cur = con.execute("select m from system.onerow")
+                        cur.fetchone()
+                        con.close()
+                except Exception as e:
+                    errors.append(e)
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(errors, [])
+            self.assertEqual(pool.used_connections, 0)
+            self.assertLessEqual(pool.cached_connections, 4)
+
+    def test_pool_broken_connection(self):
+        """A connection closed behind the pool's back is not handed out again."""
+        with MimerPool(maxconnections=1, dsn=self.DSN, user=self.USER,
+                       password=self.PASSWORD) as pool:
+            con = pool.get_connection()
+            con._close()
+            con.close()
+            con.close()
+            self.assertEqual(pool.connections, 0)
+            con = pool.get_connection()
+            self.assertTrue(con.is_open())
+            con.close()
+
+    def test_pool_maintenance(self):
+        """Maintenance keeps min_idle connections and retires idle ones."""
+        import time
+        # The interval is long enough for the thread not to run during the
+        # test, the maintenance rounds are run explicitly instead.
+        with MimerPool(min_idle=2, idle_timeout=0.3, maintenance_interval=3600,
+                       maxconnections=10, dsn=self.DSN, user=self.USER,
+                       password=self.PASSWORD) as pool:
+            self.assertEqual(pool.cached_connections, 0)
+            pool._maintain()
+            self.assertEqual(pool.cached_connections, 2)
+            cons = [pool.get_connection() for _ in range(5)]
+            for con in cons:
+                con.close()
+            self.assertEqual(pool.cached_connections, 5)
+            # Most recently returned connection first
+            self.assertIs(pool.get_connection(), cons[-1])
+            cons[-1].close()
+            time.sleep(0.5)
+            pool._maintain()
+            self.assertEqual(pool.cached_connections, 2)
+
+    def test_pool_maintenance_check(self):
+        """Connections being checked by maintenance count towards maxconnections."""
+        import threading
+        import time
+        from mimerpy.pool import PooledConnection
+        with MimerPool(initialconnections=1, maxconnections=1,
+                       maintenance_interval=3600, dsn=self.DSN, user=self.USER,
+                       password=self.PASSWORD) as pool:
+            pool._maintenance_interval = 0  # Check every unused connection
+            gate = threading.Event()
+            ping = PooledConnection._ping
+            def slow_ping(con):
+                gate.wait()
+                return ping(con)
+            PooledConnection._ping = slow_ping
+            try:
+                t = threading.Thread(target=pool._maintain)
+                t.start()
+                time.sleep(0.2)
+                self.assertEqual(pool.cached_connections, 0)
+                self.assertEqual(pool.connections, 1)
+                self.assertRaises(MimerPoolExhausted, pool.get_connection)
+                gate.set()
+                t.join()
+            finally:
+                PooledConnection._ping = ping
+            self.assertEqual(pool.cached_connections, 1)
+            self.assertEqual(pool.connections, 1)
+
+    def test_pool_max_lifetime(self):
+        """Connections are replaced after max_lifetime."""
+        import time
+        with MimerPool(initialconnections=2, max_lifetime=0.2,
+                       maintenance_interval=0.1, dsn=self.DSN, user=self.USER,
+                       password=self.PASSWORD) as pool:
+            self.assertEqual(pool.cached_connections, 2)
+            con = pool.get_connection()
+            time.sleep(0.5)
+            self.assertEqual(pool.cached_connections, 0)
+            con.close()
+            self.assertEqual(pool.connections, 0)
+            con2 = pool.get_connection()
+            self.assertIsNot(con2, con)
+            con2.close()
+
+    def test_pool_validation(self):
+        """Validation policies and broken connections."""
+        with self.assertRaises(ValueError):
+            MimerPool(validation='never', dsn=self.DSN, user=self.USER,
+                      password=self.PASSWORD)
+        for validation in ('always', 'idle', 'sample', 'background'):
+            with MimerPool(validation=validation, maxconnections=2,
+                           dsn=self.DSN, user=self.USER,
+                           password=self.PASSWORD) as pool:
+                for _ in range(5):
+                    con = pool.get_connection()
+                    cur = con.execute("select m from system.onerow")
+                    self.assertEqual(cur.fetchone(), ('x',))
+                    con.close()
+                self.assertEqual(pool.cached_connections, 1)
+
+        def syntax_error(errorclass, errorvalue):
+            return issubclass(errorclass, mimerpy.ProgrammingError)
+        with MimerPool(is_broken_error=syntax_error, dsn=self.DSN,
+                       user=self.USER, password=self.PASSWORD) as pool:
+            con = pool.get_connection()
+            with self.assertRaises(mimerpy.ProgrammingError):
+                con.execute("selectt m from system.onerow")
+            con.close()
+            self.assertEqual(pool.connections, 0)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,99 @@
+# Copyright (c) 2017 Mimer Information Technology
+
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# See license for more details.
+
+import datetime
+import unittest
+import mimerpy
+import db_config
+
+from mimerpy.parallel import scan, scatter, split_range
+from mimerpy.pool import MimerPool
+
+class TestParallelScan(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(self):
+        (self.syscon, self.tstcon) = db_config.setup()
+        with self.tstcon.cursor() as c:
+            c.execute("create table parscan (c1 INTEGER, c2 NVARCHAR(20))"
+                      " in pybank")
+            c.executemany("insert into parscan values (?, ?)",
+                          [(i, str(i)) for i in range(1000)] + [(None, 'null')])
+        self.tstcon.commit()
+
+    @classmethod
+    def tearDownClass(self):
+        db_config.teardown(tstcon=self.tstcon, syscon=self.syscon)
+
+    def test_split_range(self):
+        self.assertEqual(split_range(0, 99, 4), [25, 50, 75])
+        self.assertEqual(split_range(1, 2, 4), [2])
+        self.assertEqual(split_range(datetime.date(2020, 1, 1),
+                                     datetime.date(2020, 1, 11), 2),
+                         [datetime.date(2020, 1, 6)])
+        with self.assertRaises(TypeError):
+            split_range('a', 'z', 2)
+
+    def test_scan_unordered(self):
+        with MimerPool(**db_config.TSTUSR) as pool:
+            rows = [row for batch in scan(pool, "select * from parscan", "c1",
+                                          partitions=4, batch_size=100)
+                    for row in batch]
+        self.assertEqual(len(rows), 1001)
+        self.assertEqual(sorted(r[0] for r in rows if r[0] is not None),
+                         list(range(1000)))
+
+    def test_scan_ordered_bounds(self):
+        with MimerPool(**db_config.TSTUSR) as pool:
+            batches = list(scan(pool, "select c1 from parscan where c1 < ?",
+                                "c1", bounds=[100, 200], params=(300,),
+                                ordered=True, batch_size=1000))
+            self.assertEqual(len(batches), 3)
+            self.assertEqual([sorted(r[0] for r in b) for b in batches],
+                             [list(range(100)), list(range(100, 200)),
+                              list(range(200, 300))])
+            scanned = scan(pool, "select * from parscan", "c1", batch_size=10)
+            next(scanned)
+            scanned.close()
+            self.assertEqual(pool.used_connections, 0)
+
+    def test_scatter(self):
+        with MimerPool(**db_config.TSTUSR) as p1, MimerPool(**db_config.TSTUSR) as p2:
+            rows = list(scatter([p1, p2, self.tstcon],
+                                "select c1 from parscan where c1 < 50",
+                                batch_size=7))
+            self.assertEqual(sorted(rows), sorted(3 * [(i,) for i in range(50)]))
+            rows = list(scatter([p1, p2], "select c1, c2 from parscan"
+                                " order by c1 desc", order_by=[("c1", True)]))
+            self.assertEqual(len(rows), 2002)
+            self.assertEqual(rows[:3], [(None, 'null'), (None, 'null'), (999, '999')])
+            rows = list(scatter([p1, p2], "select c1 from parscan where c1 >= ?"
+                                " order by c1", params=(10,), order_by=[0], limit=5))
+            self.assertEqual(rows, [(10,), (10,), (11,), (11,), (12,)])
+            rows = list(scatter([p1, p2], "select c1 from parscan where c1 >= 10"
+                                " order by c1 fetch first 3 rows only",
+                                order_by=[0], limit=4))
+            self.assertEqual(rows, [(10,), (10,), (11,), (11,)])
+            self.assertEqual(p1.used_connections + p2.used_connections, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,6 +23,8 @@
 import unittest
 import time
 import math
+import decimal
+from datetime import date
 import mimerpy
 
 from mimerpy.mimPyExceptions import *
@@ -1272,6 +1274,72 @@ class TestScrollCursorMethods(unittest.TestCase):
         r = b.fetchall()
         a.close()
 
+    def test_scroll_client_side(self):
+        """Server side and client side scroll cursors return the same rows."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table scrollmodes (c1 INTEGER) in pybank")
+            c.executemany("insert into scrollmodes values (?)",
+                          [(i,) for i in range(1, 21)])
+        self.tstcon.commit()
+        results = []
+        for client_side in (False, True):
+            with self.tstcon.cursor(scrollable=True,
+                                    client_side=client_side) as c:
+                c.execute("select c1 from scrollmodes order by c1")
+                self.assertEqual(c.rowcount, 20)
+                res = [c.fetchone()]
+                c.scroll(5, mode='absolute')
+                res.append(c.fetchmany(3))
+                c.scroll(-4, mode='relative')
+                res.append(c.fetchone())
+                c.scroll(18, mode='absolute')
+                res.append(c.fetchall())
+                res.append(c.fetchone())
+                results.append(res)
+        self.assertEqual(results[0], [(1,), [(6,), (7,), (8,)], (5,),
+                                      [(19,), (20,)], None])
+        self.assertEqual(results[0], results[1])
+
+    def test_scroll_client_side_spill(self):
+        """A client side result set larger than memory_limit is spilled."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table scrollspill (c1 INTEGER, c2 NVARCHAR(100),"
+                      " c3 DOUBLE PRECISION, c4 DATE) in pybank")
+            c.executemany("insert into scrollspill values (?, ?, ?, ?)",
+                          [(i, 'row%d' % i, i / 4, None if i % 3 else '2024-01-02')
+                           for i in range(500)])
+        self.tstcon.commit()
+        with self.tstcon.cursor(scrollable=True, client_side=True,
+                                memory_limit=1024) as c:
+            c.execute("select * from scrollspill order by c1")
+            self.assertTrue(c._ScrollCursor__result_set.spilled)
+            self.assertEqual(c.rowcount, 500)
+            c.scroll(300, mode='absolute')
+            self.assertEqual(c.fetchone(), (300, 'row300', 75.0, date(2024, 1, 2)))
+            c.scroll(-101, mode='relative')
+            self.assertEqual(c.fetchone(), (200, 'row200', 50.0, None))
+            self.assertEqual(len(c.fetchall()), 299)
+
+    def test_scroll_columnar(self):
+        """Columnar fetches start at rownumber in both scroll modes."""
+        with self.tstcon.cursor() as c:
+            c.execute("create table scrollcol (c1 INTEGER, c2 DECIMAL(10,2),"
+                      " c3 DATE) in pybank")
+            rows = [(i, None if i % 3 else decimal.Decimal('%d.50' % i),
+                     date(2024, 1, i + 1)) for i in range(10)]
+            c.executemany("insert into scrollcol values (?, ?, ?)", rows)
+        self.tstcon.commit()
+        for client_side in (False, True):
+            with self.tstcon.cursor(scrollable=True,
+                                    client_side=client_side) as c:
+                c.execute("select * from scrollcol order by c1")
+                c.scroll(4, mode='absolute')
+                self.assertEqual(list(c.fetchall(columnar=True)), rows[4:])
+                self.assertEqual(c.rownumber, 10)
+                self.assertEqual(c.fetchone(), None)
+                c.scroll(0, mode='absolute')
+                self.assertEqual(list(c.fetchall(columnar=True)), rows)
+
 if __name__ == '__main__':
     unittest.TestLoader.sortTestMethodsUsing = None
     unittest.main()